@@ -1,3 +1,5 @@
+import os
+import sys
 from audioop import cross
 from pathlib import Path
 
@@ -22,6 +24,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     'backendApp.Faculty',
     'backendApp.Building',
     'backendApp.RoomWithItems',
@@ -41,6 +44,9 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # First, so the latency it records includes every other middleware
+    'backendApp.middleware.MetricsMiddleware',
+    'backendApp.middleware.SlowQueryMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -72,18 +78,97 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = 'backend.wsgi.application'
+ASGI_APPLICATION = 'backend.asgi.application'
+
+# Connection parameters come from the environment (docker-compose sets DATABASE_*). Set DATABASE_POOL_MODE to
+# "pgbouncer" when DATABASE_HOST/DATABASE_PORT point at a pgbouncer running in transaction pooling mode.
+DATABASE_POOL_MODE = os.environ.get('DATABASE_POOL_MODE', '')
 
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.postgresql',
-        'NAME': 'postgres',
-        'USER': 'myuser',
-        'PASSWORD': 'mypassword',
-        'HOST': 'db',
-        'PORT': '5432',
+        'NAME': os.environ.get('DATABASE_NAME', 'postgres'),
+        'USER': os.environ.get('DATABASE_USER', 'myuser'),
+        'PASSWORD': os.environ.get('DATABASE_PASSWORD', 'mypassword'),
+        'HOST': os.environ.get('DATABASE_HOST', 'db'),
+        'PORT': os.environ.get('DATABASE_PORT', '5432'),
+        # Reuse a worker's connection for this many seconds instead of reconnecting on every request.
+        # Under ASGI every request runs its queries on a new thread, so use 0 there and pool with pgbouncer.
+        'CONN_MAX_AGE': int(os.environ.get('DATABASE_CONN_MAX_AGE', '60')),
+        # Check a reused connection before the request uses it, so a database restart costs one reconnect
+        # instead of a failed request
+        'CONN_HEALTH_CHECKS': True,
+        # pgbouncer gives every transaction whichever server connection is free, so a cursor opened by
+        # one transaction cannot be read from the next one
+        'DISABLE_SERVER_SIDE_CURSORS': DATABASE_POOL_MODE == 'pgbouncer',
     }
 }
 
+# Shared (L2) tier of the catalog cache in backendApp/cache.py. It has to be visible to every worker
+# process for invalidations to reach them, so it defaults to a directory on the local disk.
+if os.environ.get('REDIS_URL'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.environ['REDIS_URL'],
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': os.environ.get('CACHE_DIR', '/tmp/backend_cache'),
+        }
+    }
+# The test runner gets a cache of its own, so no payload cached by the development server or an
+# earlier test run is ever read by a test
+if sys.argv[1:2] == ['test']:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
+# Every worker process writes its request metrics here; /metrics adds them up (see backendApp/metrics.py)
+METRICS_DIR = os.environ.get('METRICS_DIR', '/tmp/backend_metrics')
+
+# Queries slower than this are written to SLOW_QUERY_LOG_FILE with their view (see backendApp/slow_queries.py);
+# this share of them also gets an EXPLAIN plan, run with ANALYZE (and rolled back) for plain SELECTs if
+# SLOW_QUERY_EXPLAIN_ANALYZE is set
+SLOW_QUERY_THRESHOLD_MS = float(os.environ.get('SLOW_QUERY_THRESHOLD_MS', '200'))
+SLOW_QUERY_EXPLAIN_SAMPLE_RATE = float(os.environ.get('SLOW_QUERY_EXPLAIN_SAMPLE_RATE', '0.2'))
+SLOW_QUERY_EXPLAIN_ANALYZE = os.environ.get('SLOW_QUERY_EXPLAIN_ANALYZE', '') in ('1', 'true', 'yes')
+SLOW_QUERY_LOG_FILE = os.environ.get('SLOW_QUERY_LOG_FILE', '/tmp/backend_slow_queries.log')
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'formatters': {
+        'timestamped': {'format': '%(asctime)s pid=%(process)d %(message)s'},
+    },
+    'handlers': {
+        'slow_queries': {
+            'class': 'logging.handlers.RotatingFileHandler',
+            'filename': SLOW_QUERY_LOG_FILE,
+            'maxBytes': 10 * 1024 * 1024,
+            'backupCount': 5,
+            'delay': True,
+            'formatter': 'timestamped',
+        },
+    },
+    'loggers': {
+        'backendApp.slow_queries': {'handlers': ['slow_queries'], 'level': 'WARNING', 'propagate': False},
+    },
+}
+
+# Where resetdb keeps the COPY snapshot of the initial data. Inside the project directory it survives
+# container restarts through the docker-compose volume.
+DB_SNAPSHOT_DIR = os.environ.get('DB_SNAPSHOT_DIR', str(BASE_DIR / 'db_snapshot'))
+
+# archive_bookings moves returned bookings that ended more than this many days ago to the archive tables
+# (see backendApp/archive.py)
+BOOKING_ARCHIVE_AFTER_DAYS = int(os.environ.get('BOOKING_ARCHIVE_AFTER_DAYS') or 180)
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
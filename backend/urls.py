@@ -18,6 +18,7 @@ from django.contrib import admin
 from django.urls import include, path
 
 from backendApp.Admin.views import login
+from backendApp.metrics import metrics
 from backendApp.Student.views import student_login
 from rest_framework_swagger.views import get_swagger_view
 from drf_spectacular.views import SpectacularAPIView, SpectacularSwaggerView, SpectacularRedocView
@@ -30,5 +31,6 @@ urlpatterns = [
     path('admin_paths/', include('backendApp.Admin.urls')),      # Include Admin app routes
     path('api/schema/', SpectacularAPIView.as_view(), name='schema'),
     path('api/docs/', SpectacularSwaggerView.as_view(url_name='schema'), name='swagger-ui'),
+    path('metrics', metrics, name='metrics'),
 
 ]
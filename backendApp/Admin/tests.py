@@ -1,3 +1,461 @@
-from django.test import TestCase
+import json
+import os
+import tempfile
+import time
+from datetime import timedelta
 
-# Create your tests here.
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from backendApp import cache as catalog_cache
+from backendApp import metrics
+from backendApp.Booking.models import Booking
+from backendApp.Building.models import Building
+from backendApp.Faculty.models import Faculty
+from backendApp.Item.models import Item
+from backendApp.ItemBooking.models import ItemBooking
+from backendApp.RoomToRent.models import RoomReservation, RoomToRent
+from backendApp.RoomWithItems.models import RoomWithItems
+from backendApp.Type.models import Type
+from backendApp.responses import FastJsonResponse
+
+
+class KeysetPaginationTests(TestCase):
+    def setUp(self):
+        for i in range(5):
+            Item.objects.create(name=f"Item {i}", amount=i)
+
+    def test_pages_follow_next_cursor(self):
+        response = self.client.get('/admin_paths/get_all_items', {'limit': 2})
+        self.assertEqual(response.status_code, 200)
+        first = response.json()
+        self.assertEqual([item['name'] for item in first['items']], ['Item 0', 'Item 1'])
+        self.assertEqual(first['next_cursor'], first['items'][-1]['id'])
+
+        names = [item['name'] for item in first['items']]
+        cursor = first['next_cursor']
+        while cursor is not None:
+            page = self.client.get('/admin_paths/get_all_items', {'after': cursor, 'limit': 2}).json()
+            names += [item['name'] for item in page['items']]
+            cursor = page['next_cursor']
+        self.assertEqual(names, [f"Item {i}" for i in range(5)])
+
+    def test_page_query_seeks_instead_of_offset(self):
+        first_id = Item.objects.order_by('item_id').values_list('item_id', flat=True).first()
+        # The ETag lookup, then the page
+        with self.assertNumQueries(2) as ctx:
+            self.client.get('/admin_paths/get_all_items', {'after': first_id, 'limit': 2})
+        sql = ctx.captured_queries[-1]['sql']
+        self.assertIn('"item_id" >', sql)
+        self.assertNotIn('OFFSET', sql)
+
+    def test_unpaginated_flag_keeps_old_shape(self):
+        response = self.client.get('/admin_paths/get_all_items', {'paginate': 'false'})
+        self.assertEqual(response.status_code, 200)
+        body = response.json()
+        self.assertEqual(list(body), ['items'])
+        self.assertEqual(len(body['items']), 5)
+
+    def test_invalid_cursor_is_rejected(self):
+        response = self.client.get('/admin_paths/get_all_items', {'after': 'abc'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_returned_item_bookings_are_paginated(self):
+        for i in range(3):
+            ItemBooking.objects.create(item_id=str(i), student_id='123456', returned=True)
+        ItemBooking.objects.create(item_id='9', student_id='123456', returned=False)
+
+        body = self.client.get('/admin_paths/returned_item_bookings', {'limit': 2}).json()
+        self.assertEqual(len(body['item_bookings']), 2)
+        body = self.client.get('/admin_paths/returned_item_bookings',
+                               {'after': body['next_cursor'], 'limit': 2}).json()
+        self.assertEqual(len(body['item_bookings']), 1)
+        self.assertIsNone(body['next_cursor'])
+
+
+class BuildingsByFacultyTests(TestCase):
+    def setUp(self):
+        catalog_cache.clear()
+
+    def create_buildings(self, count):
+        for i in range(count):
+            building = Building.objects.create(name=f"B{i}", faculty="W04N")
+            RoomToRent.objects.create(room_number=100 + i, building=building.name, faculty="W04N")
+            RoomWithItems.objects.create(room_number=200 + i, building=building.name, faculty="W04N")
+
+    def test_response_groups_rooms_under_their_building(self):
+        self.create_buildings(2)
+        Building.objects.create(name="X1", faculty="W8")
+
+        response = self.client.get('/admin_paths/get_buildings_by_faculty/w04')
+
+        self.assertEqual(response.status_code, 200)
+        first = response.json()['buildings'][0]
+        self.assertEqual(list(first), ["id", "name", "RoomToRent", "RoomWithItems"])
+        self.assertEqual(first["name"], "B0")
+        self.assertEqual(first["RoomToRent"], [{
+            "id": RoomToRent.objects.get(building="B0").id,
+            "room_number": 100,
+            "is_to_rent": True,
+            "building": "B0",
+            "faculty": "W04N",
+        }])
+        self.assertEqual([room["room_number"] for room in first["RoomWithItems"]], [200])
+        # Buildings are listed in the order they were created
+        self.assertEqual([building["name"] for building in response.json()['buildings']], ["B0", "B1"])
+
+    def test_query_count_does_not_grow_with_buildings(self):
+        self.create_buildings(40)
+        # The ETag lookup, the buildings and one query per room table
+        with self.assertNumQueries(4):
+            response = self.client.get('/admin_paths/get_buildings_by_faculty/W04N')
+        self.assertEqual(len(response.json()['buildings']), 40)
+
+
+class CatalogCacheTests(TestCase):
+    def setUp(self):
+        catalog_cache.clear()
+
+    def test_second_read_is_served_from_memory(self):
+        self.client.post('/admin_paths/types/create', json.dumps({'type_name': 'Laptop'}),
+                         content_type='application/json')
+
+        first = self.client.get('/admin_paths/types').json()
+        # Only the ETag lookup reaches the database
+        with self.assertNumQueries(1) as ctx:
+            second = self.client.get('/admin_paths/types').json()
+        self.assertIn('table_version', ctx.captured_queries[0]['sql'])
+
+        self.assertEqual(first, second)
+        self.assertEqual(catalog_cache.stats()['types']['misses'], 1)
+        self.assertEqual(catalog_cache.stats()['types']['l1_hits'], 1)
+
+    def test_l2_serves_after_l1_is_dropped(self):
+        self.client.get('/admin_paths/attributes')
+        catalog_cache.l1.clear()
+
+        with self.assertNumQueries(1):
+            self.client.get('/admin_paths/attributes')
+        self.assertEqual(catalog_cache.stats()['attributes']['l2_hits'], 1)
+
+    def test_writes_invalidate_cached_listings(self):
+        self.assertEqual(self.client.get('/admin_paths/types').json(), {'types': []})
+        self.client.post('/admin_paths/types/create', json.dumps({'type_name': 'Laptop'}),
+                         content_type='application/json')
+        self.assertEqual([t['type_name'] for t in self.client.get('/admin_paths/types').json()['types']], ['Laptop'])
+
+        self.client.get('/admin_paths/get_buildings_by_faculty/W04N')
+        self.client.post('/admin_paths/add_building', json.dumps({'building_name': 'B1', 'faculty_name': 'W04N'}),
+                         content_type='application/json')
+        buildings = self.client.get('/admin_paths/get_buildings_by_faculty/W04N').json()['buildings']
+        self.assertEqual([b['name'] for b in buildings], ['B1'])
+
+    def test_stale_memory_of_another_worker_is_not_served_with_a_new_etag(self):
+        first = self.client.get('/admin_paths/types')
+        # The memory of a worker that did not handle the write keeps its copy after the invalidation
+        other_worker = dict(catalog_cache.l1._entries)
+        self.client.post('/admin_paths/types/create', json.dumps({'type_name': 'Laptop'}),
+                         content_type='application/json')
+        catalog_cache.l1._entries.update(other_worker)
+
+        response = self.client.get('/admin_paths/types', HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], first['ETag'])
+        self.assertEqual([t['type_name'] for t in response.json()['types']], ['Laptop'])
+
+        # A write that has not invalidated the cache yet is not hidden behind its new ETag either
+        Type.objects.create(type_name='Phone')
+        response = self.client.get('/admin_paths/types')
+        self.assertEqual(sorted(t['type_name'] for t in response.json()['types']), ['Laptop', 'Phone'])
+        self.assertEqual(self.client.get('/admin_paths/types', HTTP_IF_NONE_MATCH=response['ETag']).status_code, 304)
+
+    def test_clearing_keeps_other_keys_of_the_backend(self):
+        self.client.get('/admin_paths/types')
+        cache.set('session:abc', 'kept')
+
+        catalog_cache.clear()
+
+        self.assertEqual(cache.get('session:abc'), 'kept')
+        self.client.get('/admin_paths/types')
+        self.assertEqual(catalog_cache.stats()['types']['misses'], 1)
+
+    def test_stats_endpoint_reports_counters(self):
+        self.client.get('/admin_paths/get_all_faculty')
+        self.client.get('/admin_paths/get_all_faculty')
+
+        stats = self.client.get('/admin_paths/cache_stats').json()['cache']
+        self.assertEqual(stats['faculties']['misses'], 1)
+        self.assertEqual(stats['faculties']['l1_hits'], 1)
+
+
+class ConditionalGetTests(TestCase):
+    def test_unchanged_list_answers_not_modified_without_running_the_query(self):
+        Item.objects.create(name="Laptop", amount=1)
+        response = self.client.get('/admin_paths/get_all_items')
+        etag = response['ETag']
+
+        with self.assertNumQueries(1):
+            response = self.client.get('/admin_paths/get_all_items', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b'')
+
+    def test_any_write_to_the_table_changes_the_etag(self):
+        item = Item.objects.create(name="Laptop", amount=1)
+        etag = self.client.get('/student/get_available_items/123456')['ETag']
+
+        ItemBooking.objects.create(item_id=item.item_id, student_id='123456', returned=False)
+        response = self.client.get('/student/get_available_items/123456', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['items'], [])
+
+        etag = response['ETag']
+        Item.objects.filter(item_id=item.item_id).update(amount=2)
+        response = self.client.get('/student/get_available_items/123456', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_writes_to_other_tables_keep_the_etag(self):
+        etag = self.client.get('/admin_paths/bookings')['ETag']
+
+        Item.objects.create(name="Laptop", amount=1)
+
+        self.assertEqual(self.client.get('/admin_paths/bookings', HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+
+class FastJsonResponseTests(TestCase):
+    def test_dates_are_encoded_like_django_json_response(self):
+        Booking.objects.create(room_number="101", user="123456", building="B1", faculty="W04N",
+                               start_time="2024-10-01", end_time="2024-10-08", returned=True)
+
+        response = self.client.get('/admin_paths/bookings')
+
+        self.assertEqual(response['Content-Type'], 'application/json')
+        booking = response.json()['bookings'][0]
+        self.assertEqual((booking['start_time'], booking['end_time']), ('2024-10-01', '2024-10-08'))
+
+    def test_non_dict_payload_requires_safe_false(self):
+        with self.assertRaises(TypeError):
+            FastJsonResponse([1, 2])
+        self.assertEqual(FastJsonResponse([1, 2], safe=False).content, b'[1,2]')
+
+
+@override_settings(METRICS_DIR=os.path.join(tempfile.gettempdir(), 'backend_metrics_tests'))
+class MetricsTests(TestCase):
+    def setUp(self):
+        metrics.clear_directory()
+        metrics.collector.reset()
+
+    def test_counts_requests_and_queries_per_route(self):
+        Item.objects.create(name="Laptop", amount=1)
+        self.client.get('/admin_paths/get_all_items')
+        self.client.get('/admin_paths/get_all_items')
+        self.client.get('/student/reserved_items/123456')
+
+        response = self.client.get('/metrics')
+
+        self.assertEqual(response['Content-Type'], metrics.CONTENT_TYPE)
+        body = response.content.decode()
+        self.assertIn('http_requests_total{route="admin_paths/get_all_items",method="GET",status="200"} 2', body)
+        self.assertIn('http_requests_total{route="student/reserved_items/<str:username>",method="GET",status="200"} 1',
+                      body)
+        # The ETag lookup and the page query, twice
+        self.assertIn('db_queries_total{route="admin_paths/get_all_items",method="GET"} 4', body)
+        self.assertIn('http_request_duration_seconds_count{route="admin_paths/get_all_items",method="GET"} 2', body)
+        self.assertIn('http_request_duration_seconds_bucket{route="admin_paths/get_all_items",method="GET",le="+Inf"} 2',
+                      body)
+
+    def test_requests_are_written_without_another_request_or_scrape(self):
+        self.client.get('/admin_paths/types')
+
+        deadline = time.monotonic() + 5 * metrics.FLUSH_INTERVAL
+        while not metrics.merged_series() and time.monotonic() < deadline:
+            time.sleep(0.05)
+
+        self.assertEqual(list(metrics.merged_series()), [('admin_paths/types', 'GET', '200')])
+
+    def test_adds_up_the_files_of_other_workers(self):
+        series = metrics._new_series()
+        series.update(count=1, duration=0.02, queries=1, query_duration=0.001)
+        os.makedirs(settings.METRICS_DIR, exist_ok=True)
+        with open(os.path.join(settings.METRICS_DIR, 'other-worker.json'), 'w') as f:
+            json.dump([[['admin_paths/types', 'GET', '200'], series]], f)
+        self.client.get('/admin_paths/types')
+
+        body = self.client.get('/metrics').content.decode()
+
+        self.assertIn('http_requests_total{route="admin_paths/types",method="GET",status="200"} 2', body)
+
+
+class CascadeDeleteTests(TestCase):
+    def create_building(self, name, faculty="W04N", rooms=2):
+        building = Building.objects.create(name=name, faculty=faculty)
+        for number in range(rooms):
+            room = RoomToRent.objects.create(room_number=100 + number, building=name, faculty=faculty)
+            RoomReservation.objects.create(room=room, user="123456", start_date="2030-01-01", end_date="2030-01-02")
+            RoomWithItems.objects.create(room_number=200 + number, building=name, faculty=faculty)
+            item = Item.objects.create(name=f"{name} laptop {number}", amount=1, room_number=str(200 + number),
+                                       building=name, faculty=faculty)
+            ItemBooking.objects.create(item_id=item.item_id, student_id="123456", returned=True)
+        return building
+
+    def delete_faculty(self, buildings):
+        faculty = Faculty.objects.create(name="W04N")
+        for n in range(buildings):
+            self.create_building(f"B{n}")
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.delete(f'/admin_paths/delete_faculty/{faculty.faculty_id}')
+        self.assertEqual(response.status_code, 200)
+        return response.json()["deleted"], len(queries)
+
+    def test_statement_count_does_not_depend_on_the_number_of_buildings(self):
+        deleted, statements = self.delete_faculty(buildings=1)
+        self.assertEqual(deleted, {"closed_item_bookings": 0, "closed_room_bookings": 0, "items": 2,
+                                   "room_reservations": 2, "rooms_to_rent": 2, "rooms_with_items": 2,
+                                   "buildings": 1, "faculties": 1})
+
+        deleted, more_statements = self.delete_faculty(buildings=5)
+        self.assertEqual(deleted["items"], 10)
+        self.assertEqual(more_statements, statements)
+
+    def test_delete_faculty_keeps_history_and_clears_its_foreign_keys(self):
+        self.create_building("C1", faculty="W8")
+        Faculty.objects.create(name="W8")
+        self.delete_faculty(buildings=2)
+
+        self.assertFalse(Faculty.objects.filter(name="W04N").exists())
+        self.assertEqual(list(Building.objects.values_list("name", flat=True)), ["C1"])
+        self.assertEqual(Item.objects.count(), 2)
+        self.assertEqual(RoomReservation.objects.count(), 2)
+        self.assertEqual(ItemBooking.objects.count(), 6)
+        self.assertEqual(ItemBooking.objects.filter(item_ref__isnull=False).count(), 2)
+
+    def test_remove_building_removes_only_that_building(self):
+        Faculty.objects.create(name="W04N")
+        building = self.create_building("B1")
+        self.create_building("B2")
+
+        response = self.client.delete(f'/admin_paths/remove_building/{building.id}')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["deleted"], {"closed_item_bookings": 0, "closed_room_bookings": 0,
+                                                      "items": 2, "room_reservations": 2, "rooms_to_rent": 2,
+                                                      "rooms_with_items": 2, "buildings": 1})
+        self.assertEqual(set(Item.objects.values_list("building", flat=True)), {"B2"})
+        self.assertEqual(self.client.delete(f'/admin_paths/remove_building/{building.id}').status_code, 404)
+
+    def test_closes_the_open_bookings_of_deleted_rooms_and_items(self):
+        Faculty.objects.create(name="W04N")
+        building = self.create_building("B1", rooms=1)
+        self.create_building("B2", rooms=1)
+        for name in ("B1", "B2"):
+            item = Item.objects.get(building=name)
+            ItemBooking.objects.create(item_id=item.item_id, student_id="123456", start_date="2024-10-01",
+                                       end_date="2024-10-08")
+            Booking.objects.create(room_number="100", building=name, faculty="W04N", user="123456",
+                                   start_time="2024-10-01", end_time="2024-10-08",
+                                   room_ref=RoomToRent.objects.get(building=name))
+        # A booking that was never linked to its item is matched by the item id alone
+        unlinked = ItemBooking.objects.create(item_id=Item.objects.get(building="B1").item_id, student_id="654321")
+        ItemBooking.objects.filter(pk=unlinked.pk).update(item_ref=None)
+
+        response = self.client.delete(f'/admin_paths/remove_building/{building.id}')
+
+        deleted = response.json()["deleted"]
+        self.assertEqual((deleted["closed_item_bookings"], deleted["closed_room_bookings"]), (2, 1))
+        today = timezone.localdate()
+        self.assertEqual(list(ItemBooking.objects.filter(returned=False).values_list("item_ref__building", flat=True)),
+                         ["B2"])
+        self.assertEqual(ItemBooking.objects.get(returned=True, end_date=today.isoformat(), student_id="123456").item_ref,
+                         None)
+        self.assertTrue(ItemBooking.objects.get(pk=unlinked.pk).returned)
+        self.assertEqual(list(Booking.objects.filter(returned=False).values_list("building", flat=True)), ["B2"])
+        self.assertEqual(Booking.objects.get(building="B1").end_time, today)
+
+
+class BulkReturnTests(TestCase):
+    def rent_items(self, students):
+        item = Item.objects.create(name=f"Laptop {Item.objects.count()}", amount=0)
+        for student in students:
+            ItemBooking.objects.create(item_id=str(item.item_id), student_id=student)
+        return item
+
+    def return_items(self, returns):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post('/admin_paths/return_items', {"returns": returns},
+                                        content_type='application/json')
+        self.assertEqual(response.status_code, 200)
+        return response.json(), len(queries)
+
+    def test_return_items_reports_every_entry(self):
+        item = self.rent_items(["111111", "222222"])
+
+        body, _ = self.return_items([
+            {"item_id": item.item_id, "reserved_by": "111111"},
+            {"item_id": str(item.item_id), "reserved_by": "111111"},
+            {"item_id": item.item_id, "reserved_by": "333333"},
+            {"item_id": 999999, "reserved_by": "111111"},
+            {"item_id": "laptop", "reserved_by": "111111"},
+            {"reserved_by": "111111"},
+            {"item_id": item.item_id, "reserved_by": "222222"},
+        ])
+
+        self.assertEqual((body["returned"], body["failed"]), (2, 5))
+        self.assertEqual([result["status"] for result in body["results"]],
+                         ["returned", "invalid", "not_found", "not_found", "invalid", "invalid", "returned"])
+        self.assertEqual(body["results"][3], {"item_id": 999999, "reserved_by": "111111", "status": "not_found",
+                                              "error": "Item not found"})
+        item.refresh_from_db()
+        self.assertEqual(item.amount, 2)
+        self.assertFalse(ItemBooking.objects.filter(returned=False).exists())
+
+    def test_return_items_statement_count_does_not_depend_on_the_number_of_entries(self):
+        item = self.rent_items(["111111"])
+        _, statements = self.return_items([{"item_id": item.item_id, "reserved_by": "111111"}])
+
+        students = [str(200000 + n) for n in range(20)]
+        items = [self.rent_items(students) for _ in range(3)]
+        body, more_statements = self.return_items([{"item_id": item.item_id, "reserved_by": student}
+                                                   for item in items for student in students])
+
+        self.assertEqual(body["returned"], 60)
+        self.assertEqual(more_statements, statements)
+        self.assertEqual(sorted(Item.objects.filter(item_id__in=[item.item_id for item in items])
+                                .values_list("amount", flat=True)), [20, 20, 20])
+
+    def test_return_rooms_releases_rooms_and_trims_reservations(self):
+        today = timezone.localdate()
+        rooms = []
+        for number, student in ((101, "111111"), (102, "222222")):
+            room = RoomToRent.objects.create(room_number=number, building="B1", faculty="W04N", available=False)
+            booking = Booking.objects.create(room_number=str(number), user=student, building="B1", faculty="W04N",
+                                             start_time=today, end_time=today + timedelta(days=3))
+            RoomReservation.objects.create(room=room, user=student, start_date=today,
+                                           end_date=today + timedelta(days=3), booking=booking)
+            rooms.append(room)
+
+        response = self.client.post('/admin_paths/return_rooms', {"returns": [
+            {"room_number": "0101", "building": "B1", "faculty": "W04N", "reserved_by": "111111"},
+            {"room_number": 102, "building": "B1", "faculty": "W04N", "reserved_by": "111111"},
+            {"room_number": 103, "building": "B1", "faculty": "W04N", "reserved_by": "111111"},
+        ]}, content_type='application/json')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([result["status"] for result in response.json()["results"]],
+                         ["returned", "not_found", "not_found"])
+        self.assertEqual([result["error"] for result in response.json()["results"][1:]],
+                         ["Booking not found", "Room not found"])
+        self.assertEqual(list(RoomToRent.objects.order_by("room_number").values_list("available", flat=True)),
+                         [True, False])
+        self.assertEqual(RoomReservation.objects.get(room=rooms[0]).end_date, today)
+        self.assertEqual(RoomReservation.objects.get(room=rooms[1]).end_date, today + timedelta(days=3))
+        self.assertTrue(Booking.objects.get(user="111111").returned)
+
+    def test_rejects_malformed_requests(self):
+        for body in ({}, {"returns": []}, {"returns": [{}] * 1001}):
+            response = self.client.post('/admin_paths/return_items', body, content_type='application/json')
+            self.assertEqual(response.status_code, 400)
+        self.assertEqual(self.client.get('/admin_paths/return_rooms').status_code, 405)
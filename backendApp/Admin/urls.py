@@ -10,20 +10,26 @@ urlpatterns = [
     path('add_building', views.add_building, name='add_building'),
     path('add_room', views.add_room, name='add_room'),
     path('add_student', views.add_student, name='add_student'),
+    path('import_students', views.import_students, name='import_students'),
     path('add_admin', views.add_admin, name='add_admin'),
     path('remove_room', views.remove_room, name='remove_room'),
     path('remove_building/<int:building_id>', views.remove_building, name='remove_building'),
     path('delete_faculty/<int:faculty_id>', views.delete_faculty, name='delete_faculty'),
     path('add_item', views.add_item, name='add_item'),
+    path('import_items', views.import_items, name='import_items'),
     path('delete_item/<int:item_id>', views.delete_item, name='delete_item'),
     path('return_room', views.return_room, name='return_room'),
     path('return_item', views.return_item, name='return_item'),
+    path('return_items', views.return_items, name='return_items'),
+    path('return_rooms', views.return_rooms, name='return_rooms'),
     path('get_buildings_by_faculty/<str:faculty_name>', views.get_buildings_by_faculty,
          name='get_buildings_by_faculty'),
     path('get_rooms_by_building/<str:building_name>', views.get_rooms_by_building, name='get_rooms_by_building'),
     path('delete_student/<int:student_id>', views.delete_student, name='delete_student'),
     path('delete_admin/<int:admin_id>', views.delete_admin, name='delete_admin'),
     path('get_all_items', views.get_all_items, name='get_all_items'),
+    path('inventory', views.get_inventory, name='get_inventory'),
+    path('utilization', views.get_utilization, name='get_utilization'),
     path('get_reserved_rooms', views.get_reserved_rooms, name='get_reserved_rooms'),
     path('get_reserved_items', views.get_reserved_items, name='get_reserved_items'),
     path('types', views.getTypes, name='get_types'),  # GET all types and POST create new type
@@ -35,4 +41,5 @@ urlpatterns = [
     path('attributes/create', views.createAttribute, name='attribute-create'),  # POST create new attribute
     path('attributes/delete', views.deleteAttribute, name='attribute-delete'),  # DELETE attribute by ID
     path('returned_item_bookings', views.get_returned_item_bookings, name='get_returned_item_bookings'),
+    path('cache_stats', views.get_cache_stats, name='get_cache_stats'),
 ]
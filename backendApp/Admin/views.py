@@ -1,27 +1,97 @@
 from django.core.exceptions import ObjectDoesNotExist
-from django.http import JsonResponse
+from backendApp.responses import FastJsonResponse
 from django.views.decorators.csrf import ensure_csrf_cookie
 import json
+from collections import defaultdict
+from functools import reduce
+from itertools import islice
+from operator import or_
 from django.views.decorators.csrf import csrf_exempt
 from django.middleware.csrf import get_token
 from django.apps import apps
 from datetime import datetime
 
+from django.db import connection, transaction
+from django.db.models import Case, CharField, F, IntegerField, Q, Sum, Value, When
+from django.db.models.functions import Cast
+from django.utils import timezone
 from django.views.decorators.http import require_http_methods
 from drf_spectacular.utils import extend_schema
 
-from backendApp import Attribute
+from backendApp.Attribute.models import Attribute
+from backendApp import cache as catalog_cache
+from backendApp import inventory, item_import, student_import
+from backendApp.conditional import conditional_on
+from backendApp.pagination import PAGINATION_PARAMETERS, PaginationError, list_payload
 from backendApp.Admin.models import Admin
 from backendApp.Booking.models import Booking
 from backendApp.Building.models import Building
 from backendApp.Faculty.models import Faculty
-from backendApp.Item.models import Item
+from backendApp.Item.models import InventoryCounter, Item
+from backendApp.models import ReturnedBooking, ReturnedItemBooking, UtilizationSummary
 from backendApp.ItemBooking.models import ItemBooking
 from backendApp.Student.models import Student
 from backendApp.RoomWithItems.models import RoomWithItems
-from backendApp.RoomToRent.models import RoomToRent
+from backendApp.RoomToRent.models import RoomReservation, RoomToRent
 from backendApp.Type.models import Type
 
+ITEM_LIST_FIELDS = ('name', 'amount', 'type', 'room_number', 'attribute', 'user', 'building', 'faculty')
+RESERVED_ROOM_FIELDS = ('room_number', 'building', 'faculty', 'start_time', 'end_time', 'user')
+BOOKING_FIELDS = ('item_id', 'room_number', 'user', 'building', 'faculty', 'start_time', 'end_time', 'isRoomToRent')
+ITEM_BOOKING_FIELDS = ('item_id', 'name', 'student_id', 'start_date', 'end_date', 'returned')
+
+
+def serialize_item(item):
+    return {
+        'id': item['item_id'],
+        'name': item['name'],
+        'amount': item['amount'],
+        'type': item['type'],
+        'room_number': item['room_number'],
+        'attribute': item['attribute'],
+        'user': item['user'],
+        'building': item['building'],
+        'faculty': item['faculty']
+    }
+
+
+def serialize_reserved_room(room):
+    return {
+        "id": room["booking_id"],
+        "room_number": room["room_number"],
+        "building": room["building"],
+        "faculty": room["faculty"],
+        "start_date": room["start_time"],
+        "end_date": room["end_time"],
+        "reserved_by": room["user"]
+    }
+
+
+def serialize_booking(booking):
+    return {
+        "id": booking["booking_id"],
+        "item_id": booking["item_id"],
+        "room_number": booking["room_number"],
+        "user": booking["user"],
+        "building": booking["building"],
+        "faculty": booking["faculty"],
+        "start_time": booking["start_time"],
+        "end_time": booking["end_time"],
+        "isRoomToRent": booking["isRoomToRent"]
+    }
+
+
+def serialize_item_booking(booking):
+    return {
+        "id": booking["id"],
+        "item_id": booking["item_id"],
+        "name": booking["name"],
+        "student_id": booking["student_id"],
+        "start_date": booking["start_date"],
+        "end_date": booking["end_date"],
+        "returned": booking["returned"]
+    }
+
 
 @csrf_exempt
 @extend_schema(
@@ -37,6 +107,7 @@ from backendApp.Type.models import Type
         405: {"type": "object", "properties": {"error": {"type": "string"}}}
     },
 )
+@conditional_on(Admin)
 def get_all_admins(request, username):
     """
     Fetch all admin users except the one with the provided username.
@@ -44,29 +115,34 @@ def get_all_admins(request, username):
     if request.method == "GET":
         admins = Admin.objects.exclude(username=username)
         admin_list = [{"id": admin.id, "login": admin.username, "super_admin": admin.is_superuser} for admin in admins]
-        return JsonResponse({"admins": admin_list}, status=200)
-    return JsonResponse({"error": "Method not allowed"}, status=405)
+        return FastJsonResponse({"admins": admin_list}, status=200)
+    return FastJsonResponse({"error": "Method not allowed"}, status=405)
 
 
 @csrf_exempt
 @extend_schema(
     summary="Get all students",
     description="Fetch all students from the database.",
+    parameters=PAGINATION_PARAMETERS,
     responses={
         200: {"type": "object", "properties": {"students": {"type": "array", "items": {"type": "object", "properties": {
             "id": {"type": "integer"}, "login": {"type": "string"}}}}}},
         405: {"type": "object", "properties": {"error": {"type": "string"}}}
     },
 )
+@conditional_on(Student)
 def get_all_students(request):
     """
     Fetch all students.
     """
     if request.method == "GET":
-        students = Student.objects.all()
-        student_list = [{"id": student.id, "login": student.__str__()} for student in students]
-        return JsonResponse({"students": student_list}, status=200)
-    return JsonResponse({"error": "Method not allowed"}, status=405)
+        try:
+            payload = list_payload(request, "students", Student.objects.all(), "id", ("username",),
+                                   lambda student: {"id": student["id"], "login": student["username"]})
+        except PaginationError as e:
+            return FastJsonResponse({"error": str(e)}, status=400)
+        return FastJsonResponse(payload, status=200)
+    return FastJsonResponse({"error": "Method not allowed"}, status=405)
 
 
 @csrf_exempt
@@ -82,16 +158,18 @@ def get_all_students(request):
         405: {"type": "object", "properties": {"error": {"type": "string"}}}
     },
 )
+@conditional_on(Faculty)
 def get_all_faculty(request):
     """
     Fetch all faculties.
     """
     if request.method == "GET":
-        faculties = Faculty.objects.all()
-        faculty_list = [{"id": faculty.faculty_id, "name": faculty.name, "admin": faculty.admin_id} for faculty in
-                        faculties]
-        return JsonResponse({"faculties": faculty_list}, status=200)
-    return JsonResponse({"error": "Method not allowed"}, status=405)
+        payload = catalog_cache.get_or_build(catalog_cache.FACULTIES, '', lambda: {"faculties": [
+            {"id": faculty.faculty_id, "name": faculty.name, "admin": faculty.admin_id}
+            for faculty in Faculty.objects.all()
+        ]}, version=request.table_etag)
+        return FastJsonResponse(payload, status=200)
+    return FastJsonResponse({"error": "Method not allowed"}, status=405)
 
 
 @csrf_exempt
@@ -129,7 +207,7 @@ def add_admin(request):
 
             # Validate required fields
             if not username or not password:
-                return JsonResponse(
+                return FastJsonResponse(
                     {"error": "Invalid data. 'username', 'password', and 'email' are required."},
                     status=400
                 )
@@ -146,14 +224,14 @@ def add_admin(request):
                 is_active=is_active,
             )
 
-            return JsonResponse({"message": f"Admin '{new_admin.username}' added successfully"}, status=201)
+            return FastJsonResponse({"message": f"Admin '{new_admin.username}' added successfully"}, status=201)
 
         except json.JSONDecodeError:
-            return JsonResponse({"error": "Invalid JSON"}, status=400)
+            return FastJsonResponse({"error": "Invalid JSON"}, status=400)
         except Exception as e:
-            return JsonResponse({"error": str(e)}, status=500)
+            return FastJsonResponse({"error": str(e)}, status=500)
 
-    return JsonResponse({"error": "Method not allowed"}, status=405)
+    return FastJsonResponse({"error": "Method not allowed"}, status=405)
 
 
 @csrf_exempt
@@ -185,14 +263,69 @@ def add_student(request):
             additional_field = data.get("additional_field")
 
             if not student_name or not password:
-                return JsonResponse({"error": "Invalid data. 'student_name' and 'password' are required."}, status=400)
+                return FastJsonResponse({"error": "Invalid data. 'student_name' and 'password' are required."}, status=400)
 
-            new_student = Student.objects.create(username=student_name, password=password,
-                                                 additional_field=additional_field)
-            return JsonResponse({"message": f"Student '{new_student.username}' added successfully"}, status=200)
+            if Student.objects.filter(username=student_name).exists():
+                return FastJsonResponse({"error": f"Student '{student_name}' already exists"}, status=400)
+
+            # create_user stores the password hashed, as authenticate() expects it
+            new_student = Student.objects.create_user(username=student_name, password=password,
+                                                      additional_field=additional_field)
+            return FastJsonResponse({"message": f"Student '{new_student.username}' added successfully"}, status=200)
         except json.JSONDecodeError:
-            return JsonResponse({"error": "Invalid JSON"}, status=400)
-    return JsonResponse({"error": "Method not allowed"}, status=405)
+            return FastJsonResponse({"error": "Invalid JSON"}, status=400)
+    return FastJsonResponse({"error": "Method not allowed"}, status=405)
+
+
+@csrf_exempt
+@extend_schema(
+    summary="Import students in bulk",
+    description="Create many student accounts from a CSV upload with the columns `username` and `password` and "
+                "optionally `email` and `additional_field`, sent as the request body or as the `file` field of a "
+                f"multipart form, of at most {student_import.MAX_UPLOAD_ROWS} rows; larger files are imported with "
+                "the import_students command. Passwords are stored hashed. Rows naming an existing or repeated "
+                "username are skipped and reported with their line number.",
+    responses={
+        200: {
+            "type": "object",
+            "properties": {
+                "created": {"type": "integer"},
+                "failed": {"type": "integer"},
+                "errors": {
+                    "type": "array",
+                    "items": {"type": "object", "properties": {"line": {"type": "integer"},
+                                                               "username": {"type": "string"},
+                                                               "error": {"type": "string"}}}
+                }
+            }
+        },
+        400: {"type": "object", "properties": {"error": {"type": "string"}}},
+        405: {"type": "object", "properties": {"error": {"type": "string"}}}
+    },
+)
+def import_students(request):
+    """
+    Bulk create student accounts from a CSV upload.
+    """
+    if request.method != "POST":
+        return FastJsonResponse({"error": "Method not allowed"}, status=405)
+
+    # The body is read line by line from the stream instead of being loaded whole
+    source = request.FILES.get('file') or request
+    lines = (line.decode('utf-8-sig') for line in source)
+    try:
+        records = list(islice(student_import.read_rows(lines), student_import.MAX_UPLOAD_ROWS + 1))
+        if len(records) > student_import.MAX_UPLOAD_ROWS:
+            return FastJsonResponse(
+                {"error": f"At most {student_import.MAX_UPLOAD_ROWS} students per request; "
+                          "use the import_students command for larger files"}, status=400)
+        # Hashed in this thread: a process pool per request would compete with the other workers for the cores
+        report = student_import.StudentImporter(workers=1).run(records)
+    except student_import.InvalidImport as e:
+        return FastJsonResponse({"error": str(e)}, status=400)
+    except UnicodeDecodeError:
+        return FastJsonResponse({"error": "The upload is not UTF-8 text"}, status=400)
+    return FastJsonResponse(report, status=200)
 
 
 @csrf_exempt
@@ -223,20 +356,21 @@ def add_faculty(request):
             faculty_name = data.get('faculty_name')
             admin_id = '123456'  # Default value
             if not faculty_name:
-                return JsonResponse({"error": "Invalid data. 'faculty_name' is required."}, status=400)
+                return FastJsonResponse({"error": "Invalid data. 'faculty_name' is required."}, status=400)
             if not admin_id:
-                return JsonResponse({"error": "Invalid data. 'admin_id' is required."}, status=400)
+                return FastJsonResponse({"error": "Invalid data. 'admin_id' is required."}, status=400)
 
             # Create and save new Faculty instance
             new_faculty = Faculty.objects.create(name=faculty_name, admin_id=admin_id)
-            return JsonResponse({"message": f"Faculty '{new_faculty.name}' added successfully"}, status=200)
+            catalog_cache.invalidate(catalog_cache.FACULTIES)
+            return FastJsonResponse({"message": f"Faculty '{new_faculty.name}' added successfully"}, status=200)
 
         except json.JSONDecodeError:
-            return JsonResponse({"error": "Invalid JSON"}, status=400)
+            return FastJsonResponse({"error": "Invalid JSON"}, status=400)
         except Exception as e:
-            return JsonResponse({"error": str(e)}, status=500)
+            return FastJsonResponse({"error": str(e)}, status=500)
 
-    return JsonResponse({"error": "Method not allowed"}, status=405)
+    return FastJsonResponse({"error": "Method not allowed"}, status=405)
 
 
 @csrf_exempt
@@ -269,20 +403,21 @@ def add_building(request):
 
             # Validate input
             if not building_name:
-                return JsonResponse({"error": "Invalid data. 'building_name' is required."}, status=400)
+                return FastJsonResponse({"error": "Invalid data. 'building_name' is required."}, status=400)
             if not faculty_name:
-                return JsonResponse({"error": "Invalid data. 'faculty_name' is required."}, status=400)
+                return FastJsonResponse({"error": "Invalid data. 'faculty_name' is required."}, status=400)
 
             # Create and save new Building instance
             new_building = Building.objects.create(name=building_name, faculty=faculty_name)
-            return JsonResponse({"message": f"Building '{new_building.name}' added successfully"}, status=201)
+            catalog_cache.invalidate(catalog_cache.BUILDINGS, catalog_cache.ROOMS)
+            return FastJsonResponse({"message": f"Building '{new_building.name}' added successfully"}, status=201)
 
         except json.JSONDecodeError:
-            return JsonResponse({"error": "Invalid JSON"}, status=400)
+            return FastJsonResponse({"error": "Invalid JSON"}, status=400)
         except Exception as e:
-            return JsonResponse({"error": str(e)}, status=500)
+            return FastJsonResponse({"error": str(e)}, status=500)
 
-    return JsonResponse({"error": "Method not allowed"}, status=405)
+    return FastJsonResponse({"error": "Method not allowed"}, status=405)
 
 
 @csrf_exempt
@@ -318,9 +453,9 @@ def add_room(request):
 
             # Validate input
             if not room_number:
-                return JsonResponse({"error": "Invalid data. 'room_number' is required."}, status=400)
+                return FastJsonResponse({"error": "Invalid data. 'room_number' is required."}, status=400)
             if not building_name:
-                return JsonResponse({"error": "Invalid data. 'building_name' is required."}, status=400)
+                return FastJsonResponse({"error": "Invalid data. 'building_name' is required."}, status=400)
 
             # Create a new room
             if is_room_for_rent:
@@ -336,14 +471,15 @@ def add_room(request):
                     faculty=faculty_name
                 )
 
-            return JsonResponse({"message": f"Room '{new_room.room_number}' added successfully"}, status=201)
+            catalog_cache.invalidate(catalog_cache.BUILDINGS, catalog_cache.ROOMS)
+            return FastJsonResponse({"message": f"Room '{new_room.room_number}' added successfully"}, status=201)
 
         except json.JSONDecodeError:
-            return JsonResponse({"error": "Invalid JSON"}, status=400)
+            return FastJsonResponse({"error": "Invalid JSON"}, status=400)
         except Exception as e:
-            return JsonResponse({"error": str(e)}, status=500)
+            return FastJsonResponse({"error": str(e)}, status=500)
 
-    return JsonResponse({"error": "Method not allowed"}, status=405)
+    return FastJsonResponse({"error": "Method not allowed"}, status=405)
 
 
 @csrf_exempt
@@ -376,7 +512,7 @@ def remove_room(request):
             is_room_for_rent = bool(data.get('is_room_for_rent'))
 
             if not room_number or not building or not faculty:
-                return JsonResponse(
+                return FastJsonResponse(
                     {"error": "Invalid data. 'room_number', 'building', and 'faculty' are required."},
                     status=400
                 )
@@ -395,106 +531,163 @@ def remove_room(request):
                 ).first()
 
             if not room:
-                return JsonResponse({"error": "Room not found"}, status=404)
+                return FastJsonResponse({"error": "Room not found"}, status=404)
 
             if Booking.objects.filter(room_number=room_number, building=building, faculty=faculty, returned=False).exists():
-                return JsonResponse(
+                return FastJsonResponse(
                     {"error": "Couldn't remove room because it has unreturned items/bookings"},
                     status=400
                 )
 
             room.delete()
+            catalog_cache.invalidate(catalog_cache.BUILDINGS, catalog_cache.ROOMS)
 
-            return JsonResponse(
+            return FastJsonResponse(
                 {"message": f"Room '{room_number}' in building '{building}' of faculty '{faculty}' removed successfully"},
                 status=200
             )
         except json.JSONDecodeError:
-            return JsonResponse({"error": "Invalid JSON"}, status=400)
+            return FastJsonResponse({"error": "Invalid JSON"}, status=400)
         except Exception as e:
-            return JsonResponse({"error": str(e)}, status=500)
-    return JsonResponse({"error": "Method not allowed"}, status=405)
+            return FastJsonResponse({"error": str(e)}, status=500)
+    return FastJsonResponse({"error": "Method not allowed"}, status=405)
+
+
+def delete_rows(queryset):
+    """
+    Delete the rows of a queryset with a single DELETE and return their number.
+
+    Unlike QuerySet.delete(), the rows are not loaded by Django's collector first, so the foreign keys
+    pointing at them must already have been dealt with.
+    """
+    quote = connection.ops.quote_name
+    meta = queryset.model._meta
+    subquery, params = queryset.values('pk').query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {quote(meta.db_table)} WHERE {quote(meta.pk.column)} IN ({subquery})", params)
+        return cursor.rowcount
+
+
+def delete_buildings(buildings):
+    """
+    Delete the given buildings with their rooms, the rooms' reservations and the items housed in them.
+
+    Runs a fixed number of set-based statements whatever the number of rows, so it must be called inside
+    a transaction. The open bookings of the deleted rooms and items are closed as of today, as a return
+    would, since they could not be returned once their room or item is gone. The *_ref foreign keys
+    pointing at deleted rows are cleared, as SET_NULL would, before the rows are deleted.
+    Returns the number of closed bookings and deleted rows per kind.
+    """
+    names = buildings.values('name')
+    rooms_to_rent = RoomToRent.objects.filter(Q(building__in=names) | Q(building_ref__in=buildings))
+    rooms_with_items = RoomWithItems.objects.filter(building__in=names)
+    items = Item.objects.filter(Q(building__in=names) | Q(building_ref__in=buildings) |
+                                Q(room_ref__in=rooms_with_items))
+    reservations = RoomReservation.objects.filter(room__in=rooms_to_rent)
+
+    today = timezone.localdate()
+    counts = {
+        # Rows written before item_ref existed only carry the item id as text
+        "closed_item_bookings": ItemBooking.objects.filter(
+            Q(item_ref__in=items) | Q(item_id__in=items.annotate(id_str=Cast('item_id', CharField())).values('id_str')),
+            returned=False).update(end_date=today.strftime('%Y-%m-%d'), returned=True),
+        "closed_room_bookings": Booking.objects.filter(
+            Q(room_ref__in=rooms_to_rent) | Q(building__in=names), returned=False).update(
+            end_time=today, returned=True),
+    }
+    ItemBooking.objects.filter(item_ref__in=items).update(item_ref=None)
+    Booking.objects.filter(room_ref__in=rooms_to_rent).update(room_ref=None)
+    Booking.objects.filter(building_ref__in=buildings).update(building_ref=None)
+
+    inventory.subtract(items)
+    # Children first, as each queryset is defined through the rows deleted after it
+    counts["items"] = delete_rows(items)
+    counts["room_reservations"] = delete_rows(reservations)
+    counts["rooms_to_rent"] = delete_rows(rooms_to_rent)
+    counts["rooms_with_items"] = delete_rows(rooms_with_items)
+    counts["buildings"] = delete_rows(buildings)
+    return counts
 
 
 @csrf_exempt
 @extend_schema(
     summary="Remove a building by ID",
-    description="Delete a building from the database using its unique ID.",
+    description="Delete a building from the database using its unique ID, together with its rooms, their "
+                "reservations and the items housed in it, in one transaction. Open bookings of the deleted rooms "
+                "and items are closed as returned today. Returns the number of closed bookings and deleted rows.",
     parameters=[
         {"name": "building_id", "in": "path", "required": True, "description": "ID of the building to delete",
          "schema": {"type": "integer"}}
     ],
     responses={
-        200: {"type": "object", "properties": {"message": {"type": "string"}}},
+        200: {"type": "object", "properties": {"message": {"type": "string"}, "deleted": {"type": "object"}}},
         404: {"type": "object", "properties": {"error": {"type": "string"}}},
         405: {"type": "object", "properties": {"error": {"type": "string"}}}
     },
 )
 def remove_building(request, building_id):
     """
-    Remove a building by ID and delete associated rooms in RoomToRent and RoomWithItems tables.
+    Remove a building by ID and delete its rooms, their reservations and the items housed in it.
     """
     if request.method == "DELETE":
         try:
-            # Check if the building exists
-            building = Building.objects.filter(id=building_id).first()
-            if not building:
-                return JsonResponse({"error": f"Building with ID {building_id} not found"}, status=404)
+            with transaction.atomic():
+                buildings = Building.objects.filter(id=building_id)
+                if not buildings.select_for_update().exists():
+                    return FastJsonResponse({"error": f"Building with ID {building_id} not found"}, status=404)
 
-            # Delete rooms in RoomToRent and RoomWithItems associated with the building
-            RoomToRent.objects.filter(building=building.name).delete()
-            RoomWithItems.objects.filter(building=building.name).delete()
+                deleted = delete_buildings(buildings)
+            catalog_cache.invalidate(catalog_cache.BUILDINGS, catalog_cache.ROOMS)
 
-            # Delete the building itself
-            building.delete()
-
-            return JsonResponse({"message": f"Building {building_id} and its associated rooms removed successfully"},
-                                status=200)
+            return FastJsonResponse({"message": f"Building {building_id} and its associated rooms removed successfully",
+                                     "deleted": deleted}, status=200)
         except Exception as e:
-            return JsonResponse({"error": str(e)}, status=500)
-    return JsonResponse({"error": "Method not allowed"}, status=405)
+            return FastJsonResponse({"error": str(e)}, status=500)
+    return FastJsonResponse({"error": "Method not allowed"}, status=405)
 
 
 @csrf_exempt
 @extend_schema(
     summary="Delete a faculty by ID",
-    description="Remove a faculty from the database using its unique ID.",
+    description="Remove a faculty from the database using its unique ID, together with its buildings, their rooms, "
+                "reservations and items, in one transaction. Open bookings of the deleted rooms and items are "
+                "closed as returned today. Returns the number of closed bookings and deleted rows.",
     parameters=[
         {"name": "faculty_id", "in": "path", "required": True, "description": "ID of the faculty to delete",
          "schema": {"type": "integer"}}
     ],
     responses={
-        200: {"type": "object", "properties": {"message": {"type": "string"}}},
+        200: {"type": "object", "properties": {"message": {"type": "string"}, "deleted": {"type": "object"}}},
         404: {"type": "object", "properties": {"error": {"type": "string"}}},
         405: {"type": "object", "properties": {"error": {"type": "string"}}}
     },
 )
 def delete_faculty(request, faculty_id):
     """
-    Delete a faculty by ID, along with its associated buildings and rooms.
+    Delete a faculty by ID, along with its buildings and their rooms, reservations and items.
     """
     if request.method == "DELETE":
         try:
-            faculty = Faculty.objects.filter(faculty_id=faculty_id).first()
-            if not faculty:
-                return JsonResponse({"error": f"Faculty with ID {faculty_id} not found"}, status=404)
-
-            buildings = Building.objects.filter(faculty=faculty.name)
-
-            for building in buildings:
-                RoomToRent.objects.filter(building=building.name).delete()
-                RoomWithItems.objects.filter(building=building.name).delete()
-
-            buildings.delete()
-
-            faculty.delete()
-
-            return JsonResponse(
-                {"message": f"Faculty {faculty_id} and its associated buildings and rooms removed successfully"},
+            with transaction.atomic():
+                faculty = Faculty.objects.select_for_update().filter(faculty_id=faculty_id).first()
+                if not faculty:
+                    return FastJsonResponse({"error": f"Faculty with ID {faculty_id} not found"}, status=404)
+
+                faculties = Faculty.objects.filter(faculty_id=faculty_id)
+                deleted = delete_buildings(Building.objects.filter(faculty=faculty.name))
+                # Rows elsewhere that still name the faculty keep their strings and lose the foreign key
+                Item.objects.filter(faculty_ref__in=faculties).update(faculty_ref=None)
+                Booking.objects.filter(faculty_ref__in=faculties).update(faculty_ref=None)
+                deleted["faculties"] = delete_rows(faculties)
+            catalog_cache.invalidate(catalog_cache.FACULTIES, catalog_cache.BUILDINGS, catalog_cache.ROOMS)
+
+            return FastJsonResponse(
+                {"message": f"Faculty {faculty_id} and its associated buildings and rooms removed successfully",
+                 "deleted": deleted},
                 status=200)
         except Exception as e:
-            return JsonResponse({"error": str(e)}, status=500)
-    return JsonResponse({"error": "Method not allowed"}, status=405)
+            return FastJsonResponse({"error": str(e)}, status=500)
+    return FastJsonResponse({"error": "Method not allowed"}, status=405)
 
 
 @csrf_exempt
@@ -535,24 +728,80 @@ def add_item(request):
 
             # Create the item
             Item = apps.get_model('Item', 'Item')
-            item = Item.objects.create(
-                name=name,
-                amount=amount,
-                room_number=room_id,
-                type=item_type,
-                attribute=attribute,
-                faculty=faculty,
-                building=building
-            )
+            with transaction.atomic():
+                item = Item.objects.create(
+                    name=name,
+                    amount=amount,
+                    room_number=room_id,
+                    type=item_type,
+                    attribute=attribute,
+                    faculty=faculty,
+                    building=building
+                )
+                inventory.adjust(inventory.group_of(item), items=1, available=int(item.amount))
 
-            return JsonResponse({'message': 'Item created successfully', 'item_id': item.item_id}, status=200)
+            return FastJsonResponse({'message': 'Item created successfully', 'item_id': item.item_id}, status=200)
 
         except json.JSONDecodeError:
-            return JsonResponse({'error': 'Invalid JSON.'}, status=400)
+            return FastJsonResponse({'error': 'Invalid JSON.'}, status=400)
         except Exception as e:
-            return JsonResponse({'error': str(e)}, status=500)
+            return FastJsonResponse({'error': str(e)}, status=500)
+
+    return FastJsonResponse({'error': 'Method not allowed.'}, status=405)
+
+
+@csrf_exempt
+@extend_schema(
+    summary="Import items in bulk",
+    description="Create or update many items from a CSV or JSON Lines upload, either as the request body or as the "
+                "`file` field of a multipart form. Rows are matched on the item name: an existing item with the "
+                "same name is updated. Every row must name a known type, attribute, faculty and a building of that "
+                "faculty; `room_number` is optional. Invalid rows are skipped and reported with their line number.",
+    parameters=[
+        {"name": "format", "in": "query", "required": False,
+         "description": "csv or ndjson; taken from the content type or file name when omitted",
+         "schema": {"type": "string", "enum": list(item_import.FORMATS)}}
+    ],
+    responses={
+        200: {
+            "type": "object",
+            "properties": {
+                "created": {"type": "integer"},
+                "updated": {"type": "integer"},
+                "failed": {"type": "integer"},
+                "errors": {
+                    "type": "array",
+                    "items": {"type": "object", "properties": {"line": {"type": "integer"}, "name": {"type": "string"},
+                                                               "error": {"type": "string"}}}
+                }
+            }
+        },
+        400: {"type": "object", "properties": {"error": {"type": "string"}}},
+        405: {"type": "object", "properties": {"error": {"type": "string"}}}
+    },
+)
+def import_items(request):
+    """
+    Bulk create or update items from a CSV or JSON Lines upload.
+    """
+    if request.method != "POST":
+        return FastJsonResponse({"error": "Method not allowed"}, status=405)
 
-    return JsonResponse({'error': 'Method not allowed.'}, status=405)
+    upload = request.FILES.get('file')
+    if upload is not None:
+        source, detected = upload, item_import.format_for(upload.name, upload.content_type or '')
+    else:
+        # The body is read line by line from the stream instead of being loaded whole
+        source, detected = request, item_import.format_for('', request.content_type or '')
+    lines = (line.decode('utf-8-sig') for line in source)
+
+    try:
+        report = item_import.ItemImporter().run(item_import.read_rows(lines, request.GET.get('format') or detected))
+    except item_import.InvalidImport as e:
+        return FastJsonResponse({"error": str(e)}, status=400)
+    except UnicodeDecodeError:
+        return FastJsonResponse({"error": "The upload is not UTF-8 text"}, status=400)
+    return FastJsonResponse(report, status=200)
 
 
 @csrf_exempt
@@ -578,27 +827,31 @@ def delete_item(request, item_id):
             unreturned_bookings = ItemBooking.objects.filter(item_id=item_id, returned=False).exists()
 
             if unreturned_bookings:
-                return JsonResponse(
+                return FastJsonResponse(
                     {"error": "Couldn't delete item because it has unreturned bookings"},
                     status=400
                 )
 
-            item_deleted, _ = Item.objects.filter(item_id=item_id).delete()
+            with transaction.atomic():
+                item = Item.objects.select_for_update().filter(item_id=item_id).first()
+                if item is not None:
+                    item.delete()
+                    inventory.adjust(inventory.group_of(item), items=-1, available=-item.amount)
 
-            if item_deleted:
-                return JsonResponse(
+            if item is not None:
+                return FastJsonResponse(
                     {"message": f"Item '{item_id}' deleted successfully"},
                     status=200
                 )
             else:
-                return JsonResponse(
+                return FastJsonResponse(
                     {"error": f"Item with ID '{item_id}' not found"},
                     status=404
                 )
         except Exception as e:
-            return JsonResponse({"error": str(e)}, status=500)
+            return FastJsonResponse({"error": str(e)}, status=500)
 
-    return JsonResponse({"error": "Method not allowed"}, status=405)
+    return FastJsonResponse({"error": "Method not allowed"}, status=405)
 
 
 @csrf_exempt
@@ -631,30 +884,33 @@ def return_room(request):
             faculty = data.get('faculty')
             building = data.get('building')
         except json.JSONDecodeError:
-            return JsonResponse({"error": "Invalid JSON"}, status=400)
+            return FastJsonResponse({"error": "Invalid JSON"}, status=400)
 
         # Validate that the room exists
         try:
             room = RoomToRent.objects.get(room_number=room_number, building=building, faculty=faculty)
         except RoomToRent.DoesNotExist:
-            return JsonResponse({"error": "Room not found"}, status=404)
+            return FastJsonResponse({"error": "Room not found"}, status=404)
 
         # Check if the student has rented the room
         try:
             booking = Booking.objects.get(room_number=room_number, building=building, faculty=faculty, user=reserved_by, returned=False)
         except Booking.DoesNotExist:
-            return JsonResponse({"error": "Booking not found"}, status=404)
-
-        booking.end_time = datetime.now()
-        booking.returned = True
-        booking.save()
-
-        room.available = True
-        room.save()
-
-        return JsonResponse({"message": f"Room {room_number} marked as returned by student {reserved_by} successfully"},
+            return FastJsonResponse({"error": "Booking not found"}, status=404)
+
+        today = timezone.localdate()
+        with transaction.atomic():
+            # Only one of concurrent returns of the booking gets to close it
+            if not Booking.objects.filter(pk=booking.pk, returned=False).update(end_time=datetime.now(), returned=True):
+                return FastJsonResponse({"error": "Booking not found"}, status=404)
+            # Release the rest of the stay so the room can be reserved again from tomorrow
+            RoomReservation.objects.filter(booking=booking, start_date__gt=today).delete()
+            RoomReservation.objects.filter(booking=booking, end_date__gt=today).update(end_date=today)
+            RoomToRent.objects.filter(pk=room.pk).update(available=True)
+
+        return FastJsonResponse({"message": f"Room {room_number} marked as returned by student {reserved_by} successfully"},
                             status=200)
-    return JsonResponse({"error": "Method not allowed"}, status=405)
+    return FastJsonResponse({"error": "Method not allowed"}, status=405)
 
 
 @csrf_exempt
@@ -687,29 +943,224 @@ def return_item(request):
             reserved_by = data.get('reserved_by')
             item_id = data.get('item_id')
         except json.JSONDecodeError:
-            return JsonResponse({"error": "Invalid JSON"}, status=400)
+            return FastJsonResponse({"error": "Invalid JSON"}, status=400)
+
+        group = Item.objects.filter(item_id=db_id).values_list(*inventory.GROUP_FIELDS).first()
+        if group is None:
+            return FastJsonResponse({"error": "Item not found"}, status=404)
+
+        with transaction.atomic():
+            # Close the open bookings first: a concurrent return of the same booking waits on the row
+            # locks and then matches nothing, so the stock is only given back once
+            returned = ItemBooking.objects.filter(item_id=item_id, student_id=reserved_by, returned=False).update(
+                end_date=datetime.now().strftime('%Y-%m-%d'),
+                returned=True
+            )
+            if not returned:
+                return FastJsonResponse({"error": "Booking not found or already returned"}, status=404)
 
-        try:
-            item = Item.objects.get(item_id=db_id)
-        except Item.DoesNotExist:
-            return JsonResponse({"error": "Item not found"}, status=404)
-        
-        print(item)
+            Item.objects.filter(item_id=db_id).update(amount=F('amount') + 1)
+            inventory.adjust(group, available=1)
 
-        itemBookings = ItemBooking.objects.filter(item_id=item_id, student_id=reserved_by, returned=False)
-        if not itemBookings.exists():
-            return JsonResponse({"error": "Booking not found or already returned"}, status=404)
+        return FastJsonResponse({"message": f"Item {item_id} returned by student {reserved_by} successfully"}, status=200)
+    return FastJsonResponse({"error": "Method not allowed"}, status=405)
 
-        item.amount += 1
-        item.save()
 
-        for itemBooking in itemBookings:
-            itemBooking.end_date = datetime.now().strftime('%Y-%m-%d')
-            itemBooking.returned = True
-            itemBooking.save()
+MAX_BULK_RETURNS = 1000
 
-        return JsonResponse({"message": f"Item {item_id} returned by student {reserved_by} successfully"}, status=200)
-    return JsonResponse({"error": "Method not allowed"}, status=405)
+
+def bulk_return_entries(request, fields, integer_fields):
+    """
+    Parse the `returns` list of a bulk return request.
+
+    Returns (entries, results, error): the valid entries as (index, values) pairs, one result per entry
+    echoing its fields (with the status of the invalid ones already set), or an error response for a
+    malformed request.
+    """
+    try:
+        returns = json.loads(request.body).get('returns')
+    except (json.JSONDecodeError, AttributeError):
+        return None, None, FastJsonResponse({"error": "Invalid JSON"}, status=400)
+    if not isinstance(returns, list) or not returns:
+        return None, None, FastJsonResponse({"error": "returns must be a non-empty list"}, status=400)
+    if len(returns) > MAX_BULK_RETURNS:
+        return None, None, FastJsonResponse(
+            {"error": f"At most {MAX_BULK_RETURNS} returns per request"}, status=400)
+
+    entries, results, seen = [], [], set()
+    for index, entry in enumerate(returns):
+        entry = entry if isinstance(entry, dict) else {}
+        result = {field: entry.get(field) for field in fields}
+        results.append(result)
+        values = tuple(str(entry.get(field, '')).strip() for field in fields)
+        if not all(values):
+            result.update(status="invalid", error=f"{', '.join(fields)} are required")
+            continue
+        if not all(value.isdigit() for field, value in zip(fields, values) if field in integer_fields):
+            result.update(status="invalid", error=f"{', '.join(integer_fields)} must be an integer")
+            continue
+        values = tuple(str(int(value)) if field in integer_fields else value for field, value in zip(fields, values))
+        if values in seen:
+            result.update(status="invalid", error="Duplicate entry")
+            continue
+        seen.add(values)
+        entries.append((index, values))
+    return entries, results, None
+
+
+def bulk_return_response(results):
+    returned = sum(1 for result in results if result["status"] == "returned")
+    return FastJsonResponse({"returned": returned, "failed": len(results) - returned, "results": results}, status=200)
+
+
+@csrf_exempt
+@extend_schema(
+    summary="Return many rented items",
+    description="Mark a list of (item, student) rentals as returned and give their stock back, in one transaction. "
+                "Every entry gets its own result; entries that fail do not stop the others.",
+    request={
+        "type": "object",
+        "properties": {
+            "returns": {
+                "type": "array",
+                "items": {
+                    "type": "object",
+                    "properties": {
+                        "item_id": {"type": "integer", "example": 1},
+                        "reserved_by": {"type": "string", "example": "123456"},
+                    },
+                },
+            },
+        },
+    },
+    responses={
+        200: {"type": "object", "properties": {"returned": {"type": "integer"}, "failed": {"type": "integer"},
+                                               "results": {"type": "array", "items": {"type": "object"}}}},
+        400: {"type": "object", "properties": {"error": {"type": "string"}}},
+        405: {"type": "object", "properties": {"error": {"type": "string"}}}
+    },
+)
+def return_items(request):
+    """
+    Return many items at once with a fixed number of set-based statements.
+    """
+    if request.method != "POST":
+        return FastJsonResponse({"error": "Method not allowed"}, status=405)
+    entries, results, error = bulk_return_entries(request, ("item_id", "reserved_by"), ("item_id",))
+    if error:
+        return error
+
+    with transaction.atomic():
+        if entries:
+            existing = {str(item_id): group for item_id, *group in Item.objects.filter(
+                item_id__in=[int(item_id) for _, (item_id, _) in entries]
+            ).values_list('item_id', *inventory.GROUP_FIELDS)}
+            wanted = reduce(or_, (Q(item_id=item_id, student_id=student_id)
+                                  for _, (item_id, student_id) in entries if item_id in existing), Q(pk__in=[]))
+            # Locking the open bookings makes a concurrent return of the same rental wait and then find nothing
+            open_bookings = list(ItemBooking.objects.select_for_update().filter(wanted, returned=False)
+                                 .values_list('id', 'item_id', 'student_id'))
+            ItemBooking.objects.filter(id__in=[booking_id for booking_id, _, _ in open_bookings]).update(
+                returned=True, end_date=timezone.localdate().isoformat())
+
+            matched = {(item_id, student_id) for _, item_id, student_id in open_bookings}
+            # Like return_item, every returned rental gives back one unit of its item
+            returned_per_item = defaultdict(int)
+            returned_per_group = defaultdict(int)
+            for item_id, _ in matched:
+                returned_per_item[int(item_id)] += 1
+                returned_per_group[tuple(existing[item_id])] += 1
+            if returned_per_item:
+                Item.objects.filter(item_id__in=returned_per_item).update(amount=F('amount') + Case(
+                    *(When(item_id=item_id, then=Value(count)) for item_id, count in returned_per_item.items()),
+                    output_field=IntegerField()))
+                inventory.adjust_many({group: (0, count) for group, count in returned_per_group.items()})
+
+            for index, (item_id, student_id) in entries:
+                if item_id not in existing:
+                    results[index].update(status="not_found", error="Item not found")
+                elif (item_id, student_id) in matched:
+                    results[index].update(status="returned")
+                else:
+                    results[index].update(status="not_found", error="Booking not found or already returned")
+
+    return bulk_return_response(results)
+
+
+@csrf_exempt
+@extend_schema(
+    summary="Return many rented rooms",
+    description="Mark a list of (room, building, faculty, student) rentals as returned, release the rest of "
+                "their reserved days and make the rooms available again, in one transaction. Every entry gets "
+                "its own result; entries that fail do not stop the others.",
+    request={
+        "type": "object",
+        "properties": {
+            "returns": {
+                "type": "array",
+                "items": {
+                    "type": "object",
+                    "properties": {
+                        "room_number": {"type": "integer", "example": 101},
+                        "building": {"type": "string", "example": "B1"},
+                        "faculty": {"type": "string", "example": "W04N"},
+                        "reserved_by": {"type": "string", "example": "123456"},
+                    },
+                },
+            },
+        },
+    },
+    responses={
+        200: {"type": "object", "properties": {"returned": {"type": "integer"}, "failed": {"type": "integer"},
+                                               "results": {"type": "array", "items": {"type": "object"}}}},
+        400: {"type": "object", "properties": {"error": {"type": "string"}}},
+        405: {"type": "object", "properties": {"error": {"type": "string"}}}
+    },
+)
+def return_rooms(request):
+    """
+    Return many rooms at once with a fixed number of set-based statements.
+    """
+    if request.method != "POST":
+        return FastJsonResponse({"error": "Method not allowed"}, status=405)
+    entries, results, error = bulk_return_entries(request, ("room_number", "building", "faculty", "reserved_by"),
+                                                  ("room_number",))
+    if error:
+        return error
+
+    today = timezone.localdate()
+    with transaction.atomic():
+        if entries:
+            rooms = {
+                (str(room_number), building, faculty): room_id
+                for room_id, room_number, building, faculty in RoomToRent.objects.filter(reduce(or_, (
+                    Q(room_number=int(room_number), building=building, faculty=faculty)
+                    for _, (room_number, building, faculty, _) in entries
+                ))).values_list('id', 'room_number', 'building', 'faculty')
+            }
+            wanted = reduce(or_, (Q(room_number=room_number, building=building, faculty=faculty, user=user)
+                                  for _, (room_number, building, faculty, user) in entries
+                                  if (room_number, building, faculty) in rooms), Q(pk__in=[]))
+            open_bookings = list(Booking.objects.select_for_update().filter(wanted, returned=False)
+                                 .values_list('booking_id', 'room_number', 'building', 'faculty', 'user'))
+            booking_ids = [booking_id for booking_id, *_ in open_bookings]
+            matched = {tuple(key) for _, *key in open_bookings}
+
+            Booking.objects.filter(booking_id__in=booking_ids).update(returned=True, end_time=today)
+            # Release the rest of each stay so the rooms can be reserved again from tomorrow
+            RoomReservation.objects.filter(booking__in=booking_ids, start_date__gt=today).delete()
+            RoomReservation.objects.filter(booking__in=booking_ids, end_date__gt=today).update(end_date=today)
+            RoomToRent.objects.filter(id__in={rooms[key[:3]] for key in matched}).update(available=True)
+
+            for index, key in entries:
+                if key[:3] not in rooms:
+                    results[index].update(status="not_found", error="Room not found")
+                elif key in matched:
+                    results[index].update(status="returned")
+                else:
+                    results[index].update(status="not_found", error="Booking not found")
+
+    return bulk_return_response(results)
 
 
 @csrf_exempt
@@ -734,61 +1185,48 @@ def return_item(request):
         405: {"type": "object", "properties": {"error": {"type": "string"}}}
     },
 )
+@conditional_on(Building, RoomToRent, RoomWithItems)
 def get_buildings_by_faculty(request, faculty_name):
     """
     Get buildings by faculty name along with RoomToRent and RoomWithItems data.
     """
     if request.method == "GET":
         try:
-            # Filter buildings where the faculty name matches the given input
-            buildings = Building.objects.filter(faculty__icontains=faculty_name)
-
-            if not buildings.exists():
-                return JsonResponse({"buildings": []}, status=200)
-
-            # Collect data for each building
-            buildings_data = []
-            for building in buildings:
-                # Fetch RoomToRent and RoomWithItems for the building
-                room_to_rent = RoomToRent.objects.filter(building=building.name)
-                room_with_items = RoomWithItems.objects.filter(building=building.name)
-
-                # Serialize room data
-                room_to_rent_data = [
-                    {
-                        "id": room.id,
-                        "room_number": room.room_number,
-                        "is_to_rent": room.is_to_rent,
-                        "building": room.building,
-                        "faculty": room.faculty,
-                    }
-                    for room in room_to_rent
-                ]
-
-                room_with_items_data = [
+            def build():
+                # Filter buildings where the faculty name matches the given input
+                buildings = list(Building.objects.filter(faculty__icontains=faculty_name).order_by('id').values('id', 'name'))
+
+                if not buildings:
+                    return {"buildings": []}
+
+                # Fetch the rooms of every matched building at once and group them by building name
+                building_names = [building['name'] for building in buildings]
+                room_fields = ('id', 'room_number', 'is_to_rent', 'building', 'faculty')
+                room_to_rent_by_building = defaultdict(list)
+                for room in RoomToRent.objects.filter(building__in=building_names).order_by('id').values(*room_fields):
+                    room_to_rent_by_building[room['building']].append(room)
+                room_with_items_by_building = defaultdict(list)
+                for room in RoomWithItems.objects.filter(building__in=building_names).order_by('id').values(*room_fields):
+                    room_with_items_by_building[room['building']].append(room)
+
+                buildings_data = [
                     {
-                        "id": room.id,
-                        "room_number": room.room_number,
-                        "is_to_rent": room.is_to_rent,
-                        "building": room.building,
-                        "faculty": room.faculty,
+                        "id": building['id'],
+                        "name": building['name'],
+                        "RoomToRent": room_to_rent_by_building[building['name']],
+                        "RoomWithItems": room_with_items_by_building[building['name']],
                     }
-                    for room in room_with_items
+                    for building in buildings
                 ]
+                return {"buildings": buildings_data}
 
-                # Append building data with room details
-                buildings_data.append({
-                    "id": building.id,
-                    "name": building.name,
-                    "RoomToRent": room_to_rent_data,
-                    "RoomWithItems": room_with_items_data,
-                })
-
-            return JsonResponse({"buildings": buildings_data}, status=200)
+            payload = catalog_cache.get_or_build(catalog_cache.BUILDINGS, faculty_name, build,
+                                                 version=request.table_etag)
+            return FastJsonResponse(payload, status=200)
         except Exception as e:
-            return JsonResponse({"error": str(e)}, status=500)
+            return FastJsonResponse({"error": str(e)}, status=500)
 
-    return JsonResponse({"error": "Method not allowed"}, status=405)
+    return FastJsonResponse({"error": "Method not allowed"}, status=405)
 
 
 @csrf_exempt
@@ -820,25 +1258,29 @@ def get_buildings_by_faculty(request, faculty_name):
         405: {"type": "object", "properties": {"error": {"type": "string"}}}
     },
 )
+@conditional_on(Building, RoomToRent, RoomWithItems)
 def get_rooms_by_building(request, building_name):
     """
     Get all rooms by building name.
     """
     if request.method == "GET":
-        try:
+        def build():
             building = Building.objects.get(name=building_name)
-        except Building.DoesNotExist:
-            return JsonResponse({"error": "Building not found"}, status=404)
-
-        rooms = RoomWithItems.objects.filter(building=building)
-        rooms2 = RoomToRent.objects.filter(building=building)
-        rooms_data = ([{"id": room.id, "number": room.room_number, "type": room.is_to_rent} for room in rooms]
-                      + [{"id": room.id, "number": room.room_number, "type": room.is_to_rent} for room in rooms2])
+            rooms = RoomWithItems.objects.filter(building=building)
+            rooms2 = RoomToRent.objects.filter(building=building)
+            rooms_data = ([{"id": room.id, "number": room.room_number, "type": room.is_to_rent} for room in rooms]
+                          + [{"id": room.id, "number": room.room_number, "type": room.is_to_rent} for room in rooms2])
 
-        rooms_data.sort(key=lambda x: x["number"])
+            rooms_data.sort(key=lambda x: x["number"])
+            return {"rooms": rooms_data}
 
-        return JsonResponse({"rooms": rooms_data}, status=200)
-    return JsonResponse({"error": "Method not allowed"}, status=405)
+        try:
+            payload = catalog_cache.get_or_build(catalog_cache.ROOMS, building_name, build,
+                                                 version=request.table_etag)
+        except Building.DoesNotExist:
+            return FastJsonResponse({"error": "Building not found"}, status=404)
+        return FastJsonResponse(payload, status=200)
+    return FastJsonResponse({"error": "Method not allowed"}, status=405)
 
 
 @csrf_exempt
@@ -863,12 +1305,12 @@ def delete_student(request, student_id):
         try:
             student_deleted, _ = Student.objects.filter(id=student_id).delete()
             if student_deleted:
-                return JsonResponse({"message": f"Student {student_id} deleted successfully"}, status=200)
+                return FastJsonResponse({"message": f"Student {student_id} deleted successfully"}, status=200)
             else:
-                return JsonResponse({"error": "Student not found"}, status=404)
+                return FastJsonResponse({"error": "Student not found"}, status=404)
         except json.JSONDecodeError:
-            return JsonResponse({"error": "Invalid JSON"}, status=400)
-    return JsonResponse({"error": "Method not allowed"}, status=405)
+            return FastJsonResponse({"error": "Invalid JSON"}, status=400)
+    return FastJsonResponse({"error": "Method not allowed"}, status=405)
 
 
 @csrf_exempt
@@ -893,18 +1335,19 @@ def delete_admin(request, admin_id):
         try:
             admin_deleted, _ = Admin.objects.filter(id=admin_id).delete()
             if admin_deleted:
-                return JsonResponse({"message": f"Admin {admin_id} deleted successfully"}, status=200)
+                return FastJsonResponse({"message": f"Admin {admin_id} deleted successfully"}, status=200)
             else:
-                return JsonResponse({"error": "Admin not found"}, status=404)
+                return FastJsonResponse({"error": "Admin not found"}, status=404)
         except json.JSONDecodeError:
-            return JsonResponse({"error": "Invalid JSON"}, status=400)
-    return JsonResponse({"error": "Method not allowed"}, status=405)
+            return FastJsonResponse({"error": "Invalid JSON"}, status=400)
+    return FastJsonResponse({"error": "Method not allowed"}, status=405)
 
 
 @csrf_exempt
 @extend_schema(
     summary="Fetch all items",
     description="Retrieve a list of all items, including their room, building, and faculty details.",
+    parameters=PAGINATION_PARAMETERS,
     responses={
         200: {
             "type": "object",
@@ -930,32 +1373,162 @@ def delete_admin(request, admin_id):
         405: {"type": "object", "properties": {"error": {"type": "string"}}}
     },
 )
+@conditional_on(Item)
 def get_all_items(request):
     """
-    Fetch all items.
+    Fetch all items, one keyset page at a time (`?after=<id>&limit=N`) or all at once with `?paginate=false`.
     """
-
-    print("Entered function")
     if request.method == "GET":
         try:
-            Item = apps.get_model('Item', 'Item')
-            items = Item.objects.all()
-            print("Items in the database: ", items)
-            item_list = [{
-                'id': item.item_id,
-                'name': item.name,
-                'amount': item.amount,
-                'type': item.type,
-                'room_number': item.room_number,
-                'attribute': item.attribute,
-                'user': item.user,
-                'building': item.building,
-                'faculty': item.faculty
-            } for item in items]
-
-            return JsonResponse({'items': item_list}, status=200)
+            payload = list_payload(request, 'items', Item.objects.all(), 'item_id', ITEM_LIST_FIELDS, serialize_item)
+            return FastJsonResponse(payload, status=200)
+        except PaginationError as e:
+            return FastJsonResponse({'error': str(e)}, status=400)
         except Exception as e:
-            return JsonResponse({'error': str(e)}, status=500)
+            return FastJsonResponse({'error': str(e)}, status=500)
+    return FastJsonResponse({"error": "Method not allowed"}, status=405)
+
+
+@csrf_exempt
+@extend_schema(
+    summary="Inventory totals",
+    description="Number of items and of units available to rent, read from the maintained inventory counters. "
+                "Filter with any of `type`, `attribute`, `building` and `faculty`, and choose the dimensions of "
+                "the result with `group_by` (comma-separated, default all four; empty for a single total).",
+    parameters=[
+        *({"name": field, "in": "query", "required": False, "description": f"Only count items of this {field}",
+           "schema": {"type": "string"}} for field in inventory.GROUP_FIELDS),
+        {"name": "group_by", "in": "query", "required": False,
+         "description": "Comma-separated subset of type, attribute, building, faculty",
+         "schema": {"type": "string", "example": "type,building"}},
+    ],
+    responses={
+        200: {
+            "type": "object",
+            "properties": {
+                "group_by": {"type": "array", "items": {"type": "string"}},
+                "groups": {
+                    "type": "array",
+                    "items": {"type": "object", "properties": {"items": {"type": "integer"},
+                                                               "available": {"type": "integer"}}}
+                },
+                "total": {"type": "object", "properties": {"items": {"type": "integer"},
+                                                           "available": {"type": "integer"}}}
+            }
+        },
+        400: {"type": "object", "properties": {"error": {"type": "string"}}},
+        405: {"type": "object", "properties": {"error": {"type": "string"}}}
+    },
+)
+@require_http_methods(["GET"])
+@conditional_on(InventoryCounter)
+def get_inventory(request):
+    """
+    Item and available unit totals per group, computed from the counter rows only.
+    """
+    group_by = [field.strip() for field in request.GET.get('group_by', ','.join(inventory.GROUP_FIELDS)).split(',')
+                if field.strip()]
+    unknown = set(group_by) - set(inventory.GROUP_FIELDS)
+    if unknown:
+        return FastJsonResponse({"error": f"Cannot group by {', '.join(sorted(unknown))}"}, status=400)
+
+    counters = InventoryCounter.objects.filter(
+        **{field: request.GET[field] for field in inventory.GROUP_FIELDS if field in request.GET})
+    sums = {"item_count": Sum('items'), "available_count": Sum('available')}
+    if group_by:
+        rows = counters.values(*group_by).annotate(**sums).order_by(*group_by)
+    else:
+        rows = [counters.aggregate(**sums)]
+    groups = [
+        {**{field: row[field] for field in group_by}, "items": row['item_count'], "available": row['available_count']}
+        for row in rows
+        if row['item_count'] or row['available_count']
+    ]
+    total = {"items": sum(group["items"] for group in groups),
+             "available": sum(group["available"] for group in groups)}
+    return FastJsonResponse({"group_by": group_by, "groups": groups, "total": total}, status=200)
+
+
+UTILIZATION_GROUPS = {'building': ('kind', 'faculty', 'building'), 'faculty': ('kind', 'faculty')}
+UTILIZATION_SUMS = ('recent_bookings', 'returned_bookings', 'loan_days', 'stock', 'out')
+
+
+def serialize_utilization(row):
+    """
+    Derive the reported rates from the summed counts of one group of summary rows.
+    """
+    return {
+        **{field: row[field] for field in ('kind', 'faculty', 'building') if field in row},
+        "bookings_last_30_days": row['total_recent_bookings'],
+        "bookings_per_day": row['total_recent_bookings'] / UtilizationSummary.WINDOW_DAYS,
+        "average_loan_days": (row['total_loan_days'] / row['total_returned_bookings']
+                              if row['total_returned_bookings'] else None),
+        "stock": row['total_stock'],
+        "out": row['total_out'],
+        "share_out": row['total_out'] / row['total_stock'] if row['total_stock'] else None,
+    }
+
+
+@csrf_exempt
+@extend_schema(
+    summary="Room and item utilization",
+    description="Bookings per day over the last 30 days, average loan length and the share of stock currently "
+                "out, per building or per faculty, for rooms and items. Read from a materialized view refreshed "
+                "by the refresh_utilization command, so figures are as of `refreshed_at`.",
+    parameters=[
+        {"name": "group_by", "in": "query", "required": False, "description": "building (default) or faculty",
+         "schema": {"type": "string", "enum": list(UTILIZATION_GROUPS)}},
+        {"name": "kind", "in": "query", "required": False, "description": "Only rooms or only items",
+         "schema": {"type": "string", "enum": ["room", "item"]}},
+        {"name": "faculty", "in": "query", "required": False, "schema": {"type": "string"}},
+        {"name": "building", "in": "query", "required": False, "schema": {"type": "string"}},
+    ],
+    responses={
+        200: {
+            "type": "object",
+            "properties": {
+                "refreshed_at": {"type": "string", "format": "date-time"},
+                "utilization": {
+                    "type": "array",
+                    "items": {
+                        "type": "object",
+                        "properties": {
+                            "kind": {"type": "string"},
+                            "faculty": {"type": "string"},
+                            "building": {"type": "string"},
+                            "bookings_last_30_days": {"type": "integer"},
+                            "bookings_per_day": {"type": "number"},
+                            "average_loan_days": {"type": "number"},
+                            "stock": {"type": "integer"},
+                            "out": {"type": "integer"},
+                            "share_out": {"type": "number"}
+                        }
+                    }
+                }
+            }
+        },
+        400: {"type": "object", "properties": {"error": {"type": "string"}}},
+        405: {"type": "object", "properties": {"error": {"type": "string"}}}
+    },
+)
+@require_http_methods(["GET"])
+def get_utilization(request):
+    """
+    Utilization per building or faculty, from the utilization_summary materialized view only.
+    """
+    group_by = request.GET.get('group_by', 'building')
+    if group_by not in UTILIZATION_GROUPS:
+        return FastJsonResponse({"error": f"group_by must be one of: {', '.join(UTILIZATION_GROUPS)}"}, status=400)
+
+    summary = UtilizationSummary.objects.filter(
+        **{field: request.GET[field] for field in ('kind', 'faculty', 'building') if field in request.GET})
+    fields = UTILIZATION_GROUPS[group_by]
+    rows = (summary.values(*fields)
+            .annotate(**{f'total_{name}': Sum(name) for name in UTILIZATION_SUMS})
+            .order_by(*fields))
+    refreshed_at = UtilizationSummary.objects.values_list('refreshed_at', flat=True).first()
+    return FastJsonResponse({"refreshed_at": refreshed_at, "utilization": [serialize_utilization(row) for row in rows]},
+                            status=200)
 
 
 @csrf_exempt
@@ -985,31 +1558,32 @@ def login(request):
             username = data.get('username')
             password = data.get('password')
         except json.JSONDecodeError:
-            return JsonResponse({"error": "Invalid JSON"}, status=400)
+            return FastJsonResponse({"error": "Invalid JSON"}, status=400)
 
         # Query the Admin model
         try:
             admin = Admin.objects.get(username=username)
         except Admin.DoesNotExist:
-            return JsonResponse({"error": "Invalid credentials"}, status=401)
+            return FastJsonResponse({"error": "Invalid credentials"}, status=401)
 
         # Compare passwords
         if admin.check_password(password):
             csrf_token = get_token(request)
-            return JsonResponse({
+            return FastJsonResponse({
                 "message": "Login successful",
                 "csrf_token": csrf_token
             }, status=200)
 
-        return JsonResponse({"error": "Invalid credentials"}, status=401)
+        return FastJsonResponse({"error": "Invalid credentials"}, status=401)
 
-    return JsonResponse({"error": "Invalid method"}, status=405)
+    return FastJsonResponse({"error": "Invalid method"}, status=405)
 
 
 @csrf_exempt
 @extend_schema(
     summary="Fetch all reserved rooms",
     description="Retrieve all reserved rooms with details such as building, faculty, and reservation period.",
+    parameters=PAGINATION_PARAMETERS,
     responses={
         200: {
             "type": "object",
@@ -1034,34 +1608,20 @@ def login(request):
         405: {"type": "object", "properties": {"error": {"type": "string"}}}
     },
 )
+@conditional_on(Booking)
 def get_reserved_rooms(request):
     """
     Fetch all reserved rooms filtered by user and is_to_rent=True.
     """
     if request.method == "GET":
-        # Get the username from the query parameters
-
-        # Filter bookings based on the user and is_to_rent=True
         rooms = Booking.objects.filter(isRoomToRent=True, returned=False)
-        if not rooms.exists():
-            return JsonResponse({"rooms": []}, status=200)
-
-        room_list = [
-            {
-                "id": room.booking_id,
-                "room_number": room.room_number,
-                "building": room.building,
-                "faculty": room.faculty,
-                "start_date": room.start_time,
-                "end_date": room.end_time,
-                "reserved_by": room.user
-            }
-            for room in rooms
-        ]
-
-        return JsonResponse({"rooms": room_list}, status=200)
+        try:
+            payload = list_payload(request, "rooms", rooms, "booking_id", RESERVED_ROOM_FIELDS, serialize_reserved_room)
+        except PaginationError as e:
+            return FastJsonResponse({"error": str(e)}, status=400)
+        return FastJsonResponse(payload, status=200)
 
-    return JsonResponse({"error": "Method not allowed"}, status=405)
+    return FastJsonResponse({"error": "Method not allowed"}, status=405)
 
 
 @csrf_exempt
@@ -1092,6 +1652,7 @@ def get_reserved_rooms(request):
             }
         },
         405: {"type": "object", "properties": {"error": {"type": "string"}}}})
+@conditional_on(ItemBooking)
 def get_reserved_items(request):
     """
     Fetch all reserved items.
@@ -1110,17 +1671,18 @@ def get_reserved_items(request):
                 'end_date': item_booking.end_date
             } for item_booking in reserved_items]
 
-            return JsonResponse({'reserved_items': item_list}, status=200)
+            return FastJsonResponse({'reserved_items': item_list}, status=200)
         except Exception as e:
-            return JsonResponse({'error': str(e)}, status=500)
+            return FastJsonResponse({'error': str(e)}, status=500)
 
-    return JsonResponse({"error": "Method not allowed"}, status=405)
+    return FastJsonResponse({"error": "Method not allowed"}, status=405)
 
 
 @csrf_exempt
 @extend_schema(
     summary="Get all bookings",
     description="Retrieve all bookings from the database with details such as room number, building, faculty, reserved by, and the booking period.",
+    parameters=PAGINATION_PARAMETERS,
     responses={
         200: {
             "type": "object",
@@ -1146,45 +1708,34 @@ def get_reserved_items(request):
         405: {"type": "object", "properties": {"error": {"type": "string"}}},
     },
 )
+# Archive rows are only ever written by archive_bookings as it deletes them from Booking, in the same
+# transaction, so the Booking (and ItemBooking) change counters also version the archived rows
+@conditional_on(Booking)
 def get_all_bookings(request):
     """
-    Fetch all bookings.
+    Fetch all returned bookings, live and archived.
     """
     if request.method == "GET":
-        bookings = Booking.objects.filter(returned=True)
-
-        if len(bookings) == 0:
-            return JsonResponse({"bookings": []}, status=200)
-
-        booking_list = [
-            {
-                "id": booking.booking_id,
-                "item_id": booking.item_id,
-                "room_number": booking.room_number,
-                "user": booking.user,
-                "building": booking.building,
-                "faculty": booking.faculty,
-                "start_time": booking.start_time,
-                "end_time": booking.end_time,
-                "isRoomToRent": booking.isRoomToRent
-            }
-            for booking in bookings
-        ]
-
-        return JsonResponse({"bookings": booking_list}, status=200)
-    return JsonResponse({"error": "Method not allowed"}, status=405)
+        bookings = ReturnedBooking.objects.all()
+        try:
+            payload = list_payload(request, "bookings", bookings, "booking_id", BOOKING_FIELDS, serialize_booking)
+        except PaginationError as e:
+            return FastJsonResponse({"error": str(e)}, status=400)
+        return FastJsonResponse(payload, status=200)
+    return FastJsonResponse({"error": "Method not allowed"}, status=405)
 
 
 @csrf_exempt
+@conditional_on(Type)
 def getTypes(request):
     try:
         Type = apps.get_model('Type', 'Type')  # Update to match your app name
-        types = Type.objects.all()
-
-        type_list = [{'id': type.id, 'type_name': type.type_name} for type in types]
-        return JsonResponse({'types': type_list}, status=200)
+        payload = catalog_cache.get_or_build(catalog_cache.TYPES, '', lambda: {
+            'types': [{'id': type.id, 'type_name': type.type_name} for type in Type.objects.all()]
+        }, version=request.table_etag)
+        return FastJsonResponse(payload, status=200)
     except Exception as e:
-        return JsonResponse({'error': str(e)}, status=500)
+        return FastJsonResponse({'error': str(e)}, status=500)
 
 
 @csrf_exempt
@@ -1195,13 +1746,14 @@ def createType(request):
             type_name = data.get('type_name')
 
             if not type_name:
-                return JsonResponse({'error': 'Type name is required.'}, status=400)
+                return FastJsonResponse({'error': 'Type name is required.'}, status=400)
 
             Type = apps.get_model('Type', 'Type')
             type = Type.objects.create(type_name=type_name)
-            return JsonResponse({'message': 'Type created successfully'}, status=200)
+            catalog_cache.invalidate(catalog_cache.TYPES)
+            return FastJsonResponse({'message': 'Type created successfully'}, status=200)
         except Exception as e:
-            return JsonResponse({'error': str(e)}, status=500)
+            return FastJsonResponse({'error': str(e)}, status=500)
 
 
 @csrf_exempt
@@ -1213,24 +1765,26 @@ def deleteType(request):
             Type = apps.get_model('Type', 'Type')  # Update to match your app name
             type_obj = Type.objects.get(id=type_id)
             type_obj.delete()
-            return JsonResponse({'message': 'Type deleted successfully'}, status=200)
+            catalog_cache.invalidate(catalog_cache.TYPES)
+            return FastJsonResponse({'message': 'Type deleted successfully'}, status=200)
         except Type.DoesNotExist:
-            return JsonResponse({'error': 'Type not found.'}, status=404)
+            return FastJsonResponse({'error': 'Type not found.'}, status=404)
         except Exception as e:
-            return JsonResponse({'error': str(e)}, status=500)
+            return FastJsonResponse({'error': str(e)}, status=500)
 
 
 @csrf_exempt
+@conditional_on(Attribute)
 def getAttributes(request):
     # Fetch all Attributes
     try:
         Attribute = apps.get_model('Attribute', 'Attribute')  # Update to match your app name
-        attributes = Attribute.objects.all()
-
-        attribute_list = [{'id': attr.id, 'attribute_name': attr.attribute_name} for attr in attributes]
-        return JsonResponse({'attributes': attribute_list}, status=200)
+        payload = catalog_cache.get_or_build(catalog_cache.ATTRIBUTES, '', lambda: {
+            'attributes': [{'id': attr.id, 'attribute_name': attr.attribute_name} for attr in Attribute.objects.all()]
+        }, version=request.table_etag)
+        return FastJsonResponse(payload, status=200)
     except Exception as e:
-        return JsonResponse({'error': str(e)}, status=500)
+        return FastJsonResponse({'error': str(e)}, status=500)
 
 
 @csrf_exempt
@@ -1241,14 +1795,15 @@ def createAttribute(request):
             attribute_name = data.get('attribute_name')
 
             if not attribute_name:
-                return JsonResponse({'error': 'Attribute name is required.'}, status=400)
+                return FastJsonResponse({'error': 'Attribute name is required.'}, status=400)
 
             Attribute = apps.get_model('Attribute', 'Attribute')  # Update to match your app name
             new_attribute = Attribute.objects.create(attribute_name=attribute_name)
-            return JsonResponse({'message': 'Attribute created successfully', 'attribute_id': new_attribute.id},
+            catalog_cache.invalidate(catalog_cache.ATTRIBUTES)
+            return FastJsonResponse({'message': 'Attribute created successfully', 'attribute_id': new_attribute.id},
                                 status=200)
         except Exception as e:
-            return JsonResponse({'error': str(e)}, status=500)
+            return FastJsonResponse({'error': str(e)}, status=500)
 
 
 @csrf_exempt
@@ -1261,33 +1816,36 @@ def deleteAttribute(request):
             Attribute = apps.get_model('Attribute', 'Attribute')  # Update to match your app name
             attribute = Attribute.objects.get(id=attribute_id)
             attribute.delete()
-            return JsonResponse({'message': 'Attribute deleted successfully'}, status=200)
+            catalog_cache.invalidate(catalog_cache.ATTRIBUTES)
+            return FastJsonResponse({'message': 'Attribute deleted successfully'}, status=200)
         except Attribute.DoesNotExist:
-            return JsonResponse({'error': 'Attribute not found.'}, status=404)
+            return FastJsonResponse({'error': 'Attribute not found.'}, status=404)
         except Exception as e:
-            return JsonResponse({'error': str(e)}, status=500)
+            return FastJsonResponse({'error': str(e)}, status=500)
 
 
 @csrf_exempt
 @require_http_methods(["GET"])
+@conditional_on(ItemBooking)
 def get_returned_item_bookings(request):
     """
-    Fetch all item bookings where returned is True.
+    Fetch all item bookings where returned is True, live and archived.
     """
     try:
-        item_bookings = ItemBooking.objects.filter(returned=True)
-        booking_list = [
-            {
-                "id": booking.id,
-                "item_id": booking.item_id,
-                "name": booking.name,
-                "student_id": booking.student_id,
-                "start_date": booking.start_date,
-                "end_date": booking.end_date,
-                "returned": booking.returned
-            }
-            for booking in item_bookings
-        ]
-        return JsonResponse({"item_bookings": booking_list}, status=200)
+        item_bookings = ReturnedItemBooking.objects.all()
+        payload = list_payload(request, "item_bookings", item_bookings, "id", ITEM_BOOKING_FIELDS,
+                               serialize_item_booking)
+        return FastJsonResponse(payload, status=200)
+    except PaginationError as e:
+        return FastJsonResponse({"error": str(e)}, status=400)
     except Exception as e:
-        return JsonResponse({"error": str(e)}, status=500)
+        return FastJsonResponse({"error": str(e)}, status=500)
+
+
+@csrf_exempt
+@require_http_methods(["GET"])
+def get_cache_stats(request):
+    """
+    Hit/miss counters of the catalog cache in this worker process.
+    """
+    return FastJsonResponse({"cache": catalog_cache.stats()}, status=200)
@@ -0,0 +1,59 @@
+# Generated by Django 5.1.3 on 2026-10-18 19:01
+
+import django.db.models.deletion
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    # Nullable columns are added without a table rewrite and the indexes are built
+    # concurrently, so the table stays writable while this migration runs.
+    atomic = False
+
+    dependencies = [
+        ('Booking', '0007_booking_returned'),
+        ('Building', '0004_building_faculty'),
+        ('Faculty', '0004_remove_faculty_id_alter_faculty_faculty_id'),
+        ('RoomToRent', '0005_roomtorent_available'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='booking',
+            name='building_ref',
+            field=models.ForeignKey(blank=True, db_index=False, null=True, on_delete=django.db.models.deletion.SET_NULL, to='Building.building'),
+        ),
+        migrations.AddField(
+            model_name='booking',
+            name='faculty_ref',
+            field=models.ForeignKey(blank=True, db_index=False, null=True, on_delete=django.db.models.deletion.SET_NULL, to='Faculty.faculty'),
+        ),
+        migrations.AddField(
+            model_name='booking',
+            name='room_ref',
+            field=models.ForeignKey(blank=True, db_index=False, null=True, on_delete=django.db.models.deletion.SET_NULL, to='RoomToRent.roomtorent'),
+        ),
+        migrations.AddField(
+            model_name='booking',
+            name='user_ref',
+            field=models.ForeignKey(blank=True, db_index=False, null=True, on_delete=django.db.models.deletion.SET_NULL, to=settings.AUTH_USER_MODEL),
+        ),
+        AddIndexConcurrently(
+            model_name='booking',
+            index=models.Index(fields=['user_ref'], name='booking_user_ref_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='booking',
+            index=models.Index(fields=['building_ref'], name='booking_building_ref_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='booking',
+            index=models.Index(fields=['faculty_ref'], name='booking_faculty_ref_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='booking',
+            index=models.Index(fields=['room_ref'], name='booking_room_ref_idx'),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.1.3 on 2026-10-18 19:20
+
+from django.conf import settings
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    # Indexes are built concurrently so the table stays writable meanwhile.
+    atomic = False
+
+    dependencies = [
+        ('Booking', '0008_booking_building_ref_booking_faculty_ref_and_more'),
+        ('Building', '0004_building_faculty'),
+        ('Faculty', '0004_remove_faculty_id_alter_faculty_faculty_id'),
+        ('RoomToRent', '0006_roomtorent_building_ref_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='booking',
+            index=models.Index(condition=models.Q(('returned', False)), fields=['room_number', 'building', 'faculty'], name='booking_open_room_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='booking',
+            index=models.Index(condition=models.Q(('returned', False)), fields=['user'], name='booking_open_user_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='booking',
+            index=models.Index(condition=models.Q(('isRoomToRent', True), ('returned', False)), fields=['booking_id'], name='booking_open_rooms_idx'),
+        ),
+    ]
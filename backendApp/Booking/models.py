@@ -1,8 +1,10 @@
 from django.db import models
 from django.conf import settings
 
+from backendApp.relations import RefSyncMixin, as_int, resolve_ref
 
-class Booking(models.Model):
+
+class Booking(RefSyncMixin, models.Model):
 
     booking_id = models.AutoField(primary_key=True)
     item_id = models.CharField(max_length=100, unique=False, default='Unknown')
@@ -14,7 +16,45 @@ class Booking(models.Model):
     faculty = models.CharField(max_length=100, unique=False, default='Unknown')
     isRoomToRent = models.BooleanField(default=True, unique=False)
     returned = models.BooleanField(default=False, unique=False)
+    # Foreign keys replacing the string columns above, filled by sync_refs() and backfill_relations
+    user_ref = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True,
+                                 db_index=False)
+    building_ref = models.ForeignKey('Building.Building', on_delete=models.SET_NULL, null=True, blank=True,
+                                     db_index=False)
+    faculty_ref = models.ForeignKey('Faculty.Faculty', on_delete=models.SET_NULL, null=True, blank=True,
+                                    db_index=False)
+    room_ref = models.ForeignKey('RoomToRent.RoomToRent', on_delete=models.SET_NULL, null=True, blank=True,
+                                 db_index=False)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['user_ref'], name='booking_user_ref_idx'),
+            models.Index(fields=['building_ref'], name='booking_building_ref_idx'),
+            models.Index(fields=['faculty_ref'], name='booking_faculty_ref_idx'),
+            models.Index(fields=['room_ref'], name='booking_room_ref_idx'),
+            # Open bookings only: rent_room, return_room and remove_room look a room up by its
+            # (room_number, building, faculty), rent_room and the student views look a user up.
+            models.Index(fields=['room_number', 'building', 'faculty'], condition=models.Q(returned=False),
+                         name='booking_open_room_idx'),
+            models.Index(fields=['user'], condition=models.Q(returned=False), name='booking_open_user_idx'),
+            # Admin get_reserved_rooms walks open room bookings in primary key order
+            models.Index(fields=['booking_id'], condition=models.Q(isRoomToRent=True, returned=False),
+                         name='booking_open_rooms_idx'),
+        ]
+
+    def sync_refs(self):
+        """
+        Point the foreign keys at the rows named by the legacy string columns.
+        """
+        self.user_ref_id = resolve_ref(self, 'user_ref', username=self.user)
+        self.building_ref_id = resolve_ref(self, 'building_ref', name=self.building)
+        self.faculty_ref_id = resolve_ref(self, 'faculty_ref', name=self.faculty)
+        self.room_ref_id = resolve_ref(self, 'room_ref', room_number=as_int(self.room_number),
+                                       building=self.building)
 
+    def save(self, *args, **kwargs):
+        self.sync_refs()
+        super().save(*args, **kwargs)
 
     def __str__(self):
         return f"Booking by {self.user} for {self.booking_id}"
@@ -1,3 +1,280 @@
-from django.test import TestCase
+import json
+import os
+import shutil
+import tempfile
+from datetime import timedelta
+from io import StringIO
 
-# Create your tests here.
+from django.core.management import call_command
+from django.db import connection
+from django.test import RequestFactory, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from backendApp import archive
+from backendApp.Booking.models import Booking
+from backendApp.Faculty.models import Faculty
+from backendApp.Item.models import Item
+from backendApp.ItemBooking.models import ItemBooking
+from backendApp.RoomToRent.models import RoomReservation, RoomToRent
+from backendApp.management.commands import resetdb, seed
+from backendApp.models import ReturnedBooking, ReturnedItemBooking, UtilizationSummary
+from backendApp.slow_queries import SlowQueryRecorder
+
+
+class ExplainHotQueriesTests(TestCase):
+    def test_prints_a_plan_per_hot_query(self):
+        out = StringIO()
+        call_command("explain_hot_queries", stdout=out)
+
+        self.assertIn("get_available_items", out.getvalue())
+        self.assertIn("rent_room / return_room: open booking of a room", out.getvalue())
+        self.assertIn("Scan", out.getvalue())
+
+
+class ResetSnapshotTests(TestCase):
+    def setUp(self):
+        self.snapshot_dir = os.path.join(tempfile.mkdtemp(), "snapshot")
+        self.addCleanup(shutil.rmtree, os.path.dirname(self.snapshot_dir))
+        self.command = resetdb.Command(stdout=StringIO())
+
+    def test_restore_brings_back_the_snapshot_rows_and_ids(self):
+        Faculty.objects.create(name="W04N")
+        item = Item.objects.create(name="Laptop", amount=2)
+        self.command.write_snapshot(self.snapshot_dir, "fingerprint")
+
+        Item.objects.all().delete()
+        Item.objects.create(name="Mouse", amount=1)
+        # Outside a test the restore starts in its own transaction; here the deferred foreign key checks
+        # of the rows above would still be pending and block the TRUNCATE
+        connection.check_constraints()
+        self.command.restore_snapshot(self.snapshot_dir)
+
+        self.assertEqual(list(Item.objects.values_list("item_id", "name", "amount")), [(item.item_id, "Laptop", 2)])
+        self.assertEqual(list(Faculty.objects.values_list("name", flat=True)), ["W04N"])
+        self.assertGreater(Item.objects.create(name="Mouse", amount=1).item_id, item.item_id)
+
+    def test_snapshot_is_only_valid_for_the_migrations_it_was_taken_with(self):
+        fingerprint = self.command.fingerprint()
+        self.assertIsNone(self.command.snapshot_fingerprint(self.snapshot_dir))
+
+        self.command.write_snapshot(self.snapshot_dir, fingerprint)
+
+        self.assertEqual(self.command.snapshot_fingerprint(self.snapshot_dir), fingerprint)
+        self.assertEqual(self.command.fingerprint(), fingerprint)
+
+
+@override_settings(SLOW_QUERY_THRESHOLD_MS=0, SLOW_QUERY_EXPLAIN_SAMPLE_RATE=1)
+class SlowQueryLogTests(TestCase):
+    def test_logs_the_view_and_plan_of_slow_queries(self):
+        with self.assertLogs('backendApp.slow_queries', 'WARNING') as logs:
+            self.client.get('/student/reserved_rooms/123456')
+
+        booking_query = next(line for line in logs.output if '"Booking_booking"' in line)
+        self.assertIn('view=get_reserved_rooms', booking_query)
+        # Only the number and types of the parameters, never their values
+        self.assertIn("\nParams: 1 (str x1)\n", booking_query)
+        self.assertIn('Plan:', booking_query)
+        self.assertIn('Scan', booking_query)
+
+    def test_explain_inside_a_transaction_leaves_it_usable(self):
+        item = Item.objects.create(name="Laptop", amount=1)
+
+        with self.assertLogs('backendApp.slow_queries', 'WARNING') as logs:
+            response = self.client.post('/student/rent_item', json.dumps({
+                "student_id": "123456", "item_id": item.item_id, "start_date": "2024-10-01", "end_date": "2024-10-08",
+            }), content_type="application/json")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(any('UPDATE "Item_item"' in line and 'Plan:' in line for line in logs.output))
+        item.refresh_from_db()
+        self.assertEqual(item.amount, 0)
+
+    @override_settings(SLOW_QUERY_EXPLAIN_ANALYZE=True)
+    def test_analyze_only_runs_plain_selects_and_is_undone(self):
+        item = Item.objects.create(name="Laptop", amount=1)
+        recorder = SlowQueryRecorder(RequestFactory().get('/'))
+        table = connection.ops.quote_name(Item._meta.db_table)
+
+        plan = recorder.explain(connection, f"SELECT * FROM {table} WHERE item_id = %s", [item.item_id])
+        self.assertIn("actual time", plan)
+        for sql in (f"WITH moved AS (DELETE FROM {table} WHERE item_id = %s RETURNING *) SELECT * FROM moved",
+                    f"SELECT * FROM {table} WHERE item_id = %s FOR UPDATE"):
+            with self.subTest(sql):
+                self.assertNotIn("actual time", recorder.explain(connection, sql, [item.item_id]))
+
+        self.assertTrue(Item.objects.filter(pk=item.pk).exists())
+
+    @override_settings(SLOW_QUERY_EXPLAIN_SAMPLE_RATE=0)
+    def test_unsampled_queries_are_logged_without_a_plan(self):
+        with self.assertLogs('backendApp.slow_queries', 'WARNING') as logs:
+            self.client.get('/student/reserved_rooms/123456')
+
+        self.assertFalse(any('Plan:' in line for line in logs.output))
+
+
+class UtilizationSummaryTests(TestCase):
+    def setUp(self):
+        today = timezone.localdate()
+        for number in (101, 102):
+            RoomToRent.objects.create(room_number=number, building="B1", faculty="W04N")
+        RoomToRent.objects.create(room_number=101, building="C1", faculty="W8")
+        for start, days, returned in ((today - timedelta(days=40), 3, True), (today - timedelta(days=5), 1, True),
+                                      (today, 2, False)):
+            Booking.objects.create(room_number="101", user="123456", building="B1", faculty="W04N",
+                                   start_time=start, end_time=start + timedelta(days=days - 1), returned=returned)
+        item = Item.objects.create(name="Laptop", amount=3, building="B1", faculty="W04N")
+        for student, returned in (("111111", True), ("222222", False)):
+            ItemBooking.objects.create(item_id=str(item.item_id), student_id=student, returned=returned,
+                                       start_date=today.isoformat(), end_date=(today + timedelta(days=4)).isoformat())
+
+    def utilization(self, query=""):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(f'/admin_paths/utilization{query}')
+        self.assertEqual(response.status_code, 200)
+        # Reports never touch the live booking tables
+        self.assertFalse(any("Booking" in query["sql"] for query in queries.captured_queries))
+        return response.json()["utilization"]
+
+    def test_reports_rates_per_building_from_the_view(self):
+        call_command("refresh_utilization", stdout=StringIO())
+
+        items, rooms = self.utilization("?faculty=W04N")
+        self.assertEqual(rooms, {"kind": "room", "faculty": "W04N", "building": "B1", "bookings_last_30_days": 2,
+                                 "bookings_per_day": 2 / 30, "average_loan_days": 2.0, "stock": 2, "out": 1,
+                                 "share_out": 0.5})
+        self.assertEqual((items["kind"], items["average_loan_days"], items["stock"], items["out"]),
+                         ("item", 5.0, 4, 1))
+        self.assertEqual(self.utilization("?group_by=faculty&kind=room"), [
+            {"kind": "room", "faculty": "W04N", "bookings_last_30_days": 2, "bookings_per_day": 2 / 30,
+             "average_loan_days": 2.0, "stock": 2, "out": 1, "share_out": 0.5},
+            {"kind": "room", "faculty": "W8", "bookings_last_30_days": 0, "bookings_per_day": 0.0,
+             "average_loan_days": None, "stock": 1, "out": 0, "share_out": 0.0},
+        ])
+
+    def test_figures_change_only_when_refreshed(self):
+        call_command("refresh_utilization", stdout=StringIO())
+        Booking.objects.create(room_number="101", user="123456", building="C1", faculty="W8",
+                               start_time=timezone.localdate(), end_time=timezone.localdate())
+
+        self.assertEqual(self.utilization("?building=C1")[0]["out"], 0)
+        UtilizationSummary.refresh()
+        self.assertEqual(self.utilization("?building=C1")[0]["out"], 1)
+        self.assertEqual(self.client.get('/admin_paths/utilization?group_by=room').status_code, 400)
+
+
+class BookingArchiveTests(TestCase):
+    def setUp(self):
+        today = timezone.localdate()
+        room = RoomToRent.objects.create(room_number=101, building="B1", faculty="W04N")
+        self.bookings = []
+        for days_ago, returned in ((400, True), (40, True), (35, True), (5, True), (60, False)):
+            start = today - timedelta(days=days_ago)
+            self.bookings.append(Booking.objects.create(room_number="101", user="123456", building="B1",
+                                                        faculty="W04N", start_time=start, end_time=start,
+                                                        returned=returned))
+        RoomReservation.objects.create(room=room, user="123456", start_date=self.bookings[0].start_time,
+                                       end_date=self.bookings[0].end_time, booking=self.bookings[0])
+        for days_ago, end_date in ((100, None), (2, None), (100, "Unknown")):
+            day = (today - timedelta(days=days_ago)).isoformat()
+            ItemBooking.objects.create(item_id="1", student_id="123456", start_date=day, end_date=end_date or day,
+                                       returned=True)
+
+    def archive(self):
+        call_command("archive_bookings", older_than_days=30, batch_size=2, stdout=StringIO())
+        # The moved bookings' reservations must have been unlinked for the deferred foreign key check
+        connection.check_constraints()
+
+    def pages(self, path, key):
+        ids, cursor = [], ""
+        while cursor is not None:
+            body = self.client.get(f"{path}?limit=2&after={cursor}").json()
+            ids += [row["id"] for row in body[key]]
+            cursor = body["next_cursor"] if body["next_cursor"] is not None else None
+        return ids
+
+    def test_moves_old_returned_rows_and_keeps_listing_them(self):
+        before = self.pages("/admin_paths/bookings", "bookings"), self.pages("/admin_paths/returned_item_bookings",
+                                                                               "item_bookings")
+
+        self.archive()
+
+        self.assertEqual(sorted(Booking.objects.values_list("booking_id", flat=True)),
+                         [self.bookings[3].booking_id, self.bookings[4].booking_id])
+        self.assertEqual(list(ItemBooking.objects.values_list("end_date", flat=True).order_by("id"))[1:],
+                         ["Unknown"])
+        self.assertIsNone(RoomReservation.objects.get().booking_id)
+        after = self.pages("/admin_paths/bookings", "bookings"), self.pages("/admin_paths/returned_item_bookings",
+                                                                              "item_bookings")
+        self.assertEqual(after, before)
+        self.assertEqual(len(after[0]), 4)
+
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT min(inhrelid::regclass::text), max(inhrelid::regclass::text) FROM pg_inherits "
+                           "WHERE inhparent = 'booking_archive'::regclass")
+            # One partition per month from the oldest to the newest archived booking
+            self.assertEqual(cursor.fetchone(), (f"booking_archive_{self.bookings[0].end_time:%Y_%m}",
+                                                 f"booking_archive_{self.bookings[2].end_time:%Y_%m}"))
+
+    def test_archived_history_still_counts_towards_utilization(self):
+        UtilizationSummary.refresh()
+        before = list(UtilizationSummary.objects.values_list("kind", "returned_bookings", "loan_days"))
+
+        self.archive()
+        UtilizationSummary.refresh()
+
+        self.assertEqual(list(UtilizationSummary.objects.values_list("kind", "returned_bookings", "loan_days")),
+                         before)
+
+    def test_running_again_moves_nothing(self):
+        self.archive()
+        out = StringIO()
+        call_command("archive_bookings", older_than_days=30, stdout=out)
+
+        self.assertIn("Booking: 0 rows moved", out.getvalue())
+        self.assertEqual(ReturnedBooking.objects.count(), 4)
+
+    def test_text_dates_that_are_not_real_dates_stay_live(self):
+        booking = ItemBooking.objects.create(item_id="1", student_id="123456", start_date="2020-02-28",
+                                             end_date="2020-02-30", returned=True)
+
+        self.archive()
+
+        self.assertTrue(ItemBooking.objects.filter(pk=booking.pk).exists())
+
+    def test_archives_every_column_of_the_live_tables(self):
+        for spec in archive.ARCHIVES:
+            with self.subTest(spec.table):
+                self.assertEqual(sorted(spec.columns()),
+                                 sorted(field.column for field in spec.model._meta.concrete_fields))
+                self.assertEqual(spec.missing_columns(), [])
+
+    def empty_live_tables(self):
+        RoomReservation.objects.all().delete()
+        Booking.objects.all().delete()
+        ItemBooking.objects.all().delete()
+        self.assertTrue(ReturnedBooking.objects.exists())
+        self.assertTrue(ReturnedItemBooking.objects.exists())
+        connection.check_constraints()
+
+    def test_reset_empties_the_archives(self):
+        self.archive()
+        self.empty_live_tables()
+        snapshot_dir = os.path.join(tempfile.mkdtemp(), "snapshot")
+        self.addCleanup(shutil.rmtree, os.path.dirname(snapshot_dir))
+        command = resetdb.Command(stdout=StringIO())
+        command.write_snapshot(snapshot_dir, "fingerprint")
+
+        command.restore_snapshot(snapshot_dir)
+
+        self.assertFalse(ReturnedBooking.objects.exists())
+        self.assertFalse(ReturnedItemBooking.objects.exists())
+
+    def test_seed_flush_empties_the_archives(self):
+        self.archive()
+        self.empty_live_tables()
+
+        seed.Command(stdout=StringIO()).flush()
+
+        self.assertFalse(ReturnedBooking.objects.exists())
+        self.assertFalse(ReturnedItemBooking.objects.exists())
@@ -0,0 +1,48 @@
+# Generated by Django 5.1.3 on 2026-10-18 19:01
+
+import django.db.models.deletion
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    # Nullable columns are added without a table rewrite and the indexes are built
+    # concurrently, so the table stays writable while this migration runs.
+    atomic = False
+
+    dependencies = [
+        ('Building', '0004_building_faculty'),
+        ('Faculty', '0004_remove_faculty_id_alter_faculty_faculty_id'),
+        ('Item', '0008_remove_item_room_with_items_item_room_number'),
+        ('RoomWithItems', '0004_roomwithitems_faculty'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='item',
+            name='building_ref',
+            field=models.ForeignKey(blank=True, db_index=False, null=True, on_delete=django.db.models.deletion.SET_NULL, to='Building.building'),
+        ),
+        migrations.AddField(
+            model_name='item',
+            name='faculty_ref',
+            field=models.ForeignKey(blank=True, db_index=False, null=True, on_delete=django.db.models.deletion.SET_NULL, to='Faculty.faculty'),
+        ),
+        migrations.AddField(
+            model_name='item',
+            name='room_ref',
+            field=models.ForeignKey(blank=True, db_index=False, null=True, on_delete=django.db.models.deletion.SET_NULL, to='RoomWithItems.roomwithitems'),
+        ),
+        AddIndexConcurrently(
+            model_name='item',
+            index=models.Index(fields=['building_ref'], name='item_building_ref_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='item',
+            index=models.Index(fields=['faculty_ref'], name='item_faculty_ref_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='item',
+            index=models.Index(fields=['room_ref'], name='item_room_ref_idx'),
+        ),
+    ]
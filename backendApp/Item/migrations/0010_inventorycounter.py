@@ -0,0 +1,37 @@
+# Generated by Django 5.1.3 on 2026-10-18 19:32
+
+from django.db import migrations, models
+
+# Counters for the items that exist before the views start maintaining them
+FILL_COUNTERS = '''
+INSERT INTO "Item_inventorycounter" (type, attribute, building, faculty, items, available)
+SELECT type, attribute, building, faculty, count(*), sum(amount)
+  FROM "Item_item"
+ GROUP BY type, attribute, building, faculty;
+'''
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Item', '0009_item_building_ref_item_faculty_ref_item_room_ref_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='InventoryCounter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('type', models.CharField(max_length=100)),
+                ('attribute', models.CharField(max_length=100)),
+                ('building', models.CharField(max_length=100)),
+                ('faculty', models.CharField(max_length=100)),
+                ('items', models.IntegerField(default=0)),
+                ('available', models.BigIntegerField(default=0)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('type', 'attribute', 'building', 'faculty'), name='inventory_counter_group_unique')],
+            },
+        ),
+        migrations.RunSQL(FILL_COUNTERS, migrations.RunSQL.noop),
+    ]
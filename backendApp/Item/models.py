@@ -1,6 +1,8 @@
 from django.db import models
 
-class Item(models.Model):
+from backendApp.relations import RefSyncMixin, as_int, resolve_ref
+
+class Item(RefSyncMixin, models.Model):
     item_id = models.BigAutoField(primary_key=True)
     name = models.CharField(max_length=60, unique=True)
     amount = models.IntegerField()
@@ -12,6 +14,57 @@ class Item(models.Model):
     end_date = models.CharField(max_length=100, unique=False, default="Unknown")
     faculty = models.CharField(max_length=100, unique=False, default="Unknown")
     building = models.CharField(max_length=100, unique=False, default="Unknown")
+    # Foreign keys replacing the string columns above, filled by sync_refs() and backfill_relations
+    building_ref = models.ForeignKey('Building.Building', on_delete=models.SET_NULL, null=True, blank=True,
+                                     db_index=False)
+    faculty_ref = models.ForeignKey('Faculty.Faculty', on_delete=models.SET_NULL, null=True, blank=True,
+                                    db_index=False)
+    room_ref = models.ForeignKey('RoomWithItems.RoomWithItems', on_delete=models.SET_NULL, null=True, blank=True,
+                                 db_index=False)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['building_ref'], name='item_building_ref_idx'),
+            models.Index(fields=['faculty_ref'], name='item_faculty_ref_idx'),
+            models.Index(fields=['room_ref'], name='item_room_ref_idx'),
+        ]
+
+    def sync_refs(self):
+        """
+        Point the foreign keys at the rows named by the legacy string columns.
+        """
+        self.building_ref_id = resolve_ref(self, 'building_ref', name=self.building)
+        self.faculty_ref_id = resolve_ref(self, 'faculty_ref', name=self.faculty)
+        self.room_ref_id = resolve_ref(self, 'room_ref', room_number=as_int(self.room_number),
+                                       building=self.building)
+
+    def save(self, *args, **kwargs):
+        self.sync_refs()
+        super().save(*args, **kwargs)
 
     def __str__(self):
         return self.name
+
+
+class InventoryCounter(models.Model):
+    """
+    Number of items and of units available to rent per (type, attribute, building, faculty).
+
+    Kept up to date by the views that write items (see backendApp/inventory.py) and rebuilt from
+    the items by the reconcile_inventory command.
+    """
+    type = models.CharField(max_length=100)
+    attribute = models.CharField(max_length=100)
+    building = models.CharField(max_length=100)
+    faculty = models.CharField(max_length=100)
+    items = models.IntegerField(default=0)
+    available = models.BigIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['type', 'attribute', 'building', 'faculty'],
+                                    name='inventory_counter_group_unique'),
+        ]
+
+    def __str__(self):
+        return f"{self.type}/{self.attribute} in {self.building} ({self.faculty}): {self.available}"
@@ -1,3 +1,298 @@
+import json
+import os
+import tempfile
+from io import StringIO
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from backendApp import inventory
+from backendApp.Attribute.models import Attribute
+from backendApp.Booking.models import Booking
+from backendApp.Building.models import Building
+from backendApp.Faculty.models import Faculty
+from backendApp.Item.models import InventoryCounter, Item
+from backendApp.ItemBooking.models import ItemBooking
+from backendApp.RoomToRent.models import RoomToRent
+from backendApp.RoomWithItems.models import RoomWithItems
+from backendApp.Student.models import Student
+from backendApp.Type.models import Type
+
+
+class RelationRefsTests(TestCase):
+    def setUp(self):
+        self.faculty = Faculty.objects.create(name="W04N")
+        self.building = Building.objects.create(name="B1", faculty="W04N")
+        self.room = RoomWithItems.objects.create(room_number=101, building="B1", faculty="W04N")
+        self.room_to_rent = RoomToRent.objects.create(room_number=102, building="B1", faculty="W04N")
+        self.student = Student.objects.create(username="123456")
+
+    def test_save_fills_foreign_keys_from_strings(self):
+        item = Item.objects.create(name="Laptop", amount=1, room_number="101", building="B1", faculty="W04N")
+        booking = ItemBooking.objects.create(item_id=str(item.item_id), student_id="123456")
+
+        self.assertEqual(item.building_ref, self.building)
+        self.assertEqual(item.faculty_ref, self.faculty)
+        self.assertEqual(item.room_ref, self.room)
+        self.assertEqual(booking.item_ref, item)
+        self.assertEqual(booking.student_ref, self.student)
+        self.assertEqual(self.room_to_rent.building_ref, self.building)
+
+    def test_unknown_strings_leave_foreign_keys_empty(self):
+        item = Item.objects.create(name="Laptop", amount=1)
+
+        self.assertIsNone(item.building_ref_id)
+        self.assertIsNone(item.room_ref_id)
+
+    def test_saving_again_only_looks_up_changed_columns(self):
+        item = Item.objects.create(name="Laptop", amount=1, room_number="101", building="B1", faculty="W04N")
+        Building.objects.create(name="B2", faculty="W04N")
+
+        item = Item.objects.get(pk=item.pk)
+        item.amount = 2
+        with CaptureQueriesContext(connection) as queries:
+            item.save()
+        self.assertEqual(len(queries), 1)
+
+        item.building = "B2"
+        with CaptureQueriesContext(connection) as queries:
+            item.save()
+        # The building and the room (which is looked up in the building) are resolved again
+        self.assertEqual(len(queries), 3)
+        self.assertEqual(item.building_ref.name, "B2")
+        self.assertIsNone(item.room_ref_id)
+        self.assertEqual(item.faculty_ref, self.faculty)
+
+    def test_keys_given_for_a_new_row_are_not_looked_up(self):
+        item = Item.objects.create(name="Laptop", amount=1)
+
+        with CaptureQueriesContext(connection) as queries:
+            booking = ItemBooking.objects.create(item_id=str(item.item_id), student_id="123456",
+                                                 item_ref_id=item.item_id)
+        # The student's key and the INSERT
+        self.assertEqual(len(queries), 2)
+        self.assertEqual(booking.student_ref, self.student)
+
+    def test_backfill_fills_rows_written_without_save(self):
+        Item.objects.bulk_create([
+            Item(name=f"Item {i}", amount=1, room_number="101", building="B1", faculty="W04N") for i in range(5)
+        ])
+        item = Item.objects.first()
+        ItemBooking.objects.bulk_create([
+            ItemBooking(item_id=str(item.item_id), student_id="123456"),
+            ItemBooking(item_id="Unknown", student_id="123456"),
+        ])
+        Booking.objects.bulk_create([
+            Booking(room_number="102", user="123456", building="B1", faculty="W04N",
+                    start_time="2024-01-01", end_time="2024-01-08"),
+        ])
+
+        call_command("backfill_relations", batch_size=2, stdout=StringIO())
+
+        self.assertFalse(Item.objects.filter(building_ref__isnull=True).exists())
+        self.assertEqual(set(Item.objects.values_list('room_ref', flat=True)), {self.room.id})
+        self.assertEqual(ItemBooking.objects.get(item_id=item.item_id).item_ref, item)
+        self.assertIsNone(ItemBooking.objects.get(item_id="Unknown").item_ref)
+        booking = Booking.objects.select_related('room_ref', 'user_ref').get()
+        self.assertEqual(booking.room_ref, self.room_to_rent)
+        self.assertEqual(booking.user_ref, self.student)
+
+        out = StringIO()
+        call_command("backfill_relations", check=True, stdout=out)
+        self.assertIn("Every foreign key is filled", out.getvalue())
+
+
+class SeedCommandTests(TestCase):
+    def seed(self, seed):
+        # --flush truncates, which the deferred foreign key checks of an earlier seed in this test would block
+        connection.check_constraints()
+        call_command("seed", scale=0.002, seed=seed, flush=True, stdout=StringIO())
+        return (list(Item.objects.order_by("item_id").values_list("name", "amount", "room_number")),
+                list(ItemBooking.objects.order_by("id").values_list("item_id", "student_id", "start_date")))
+
+    def test_same_seed_generates_the_same_rows(self):
+        first = self.seed(1)
+
+        self.assertEqual(self.seed(1), first)
+        self.assertNotEqual(self.seed(2), first)
+
+    def test_generated_rows_have_their_foreign_keys(self):
+        self.seed(1)
+
+        self.assertEqual(Item.objects.count(), 10)
+        self.assertEqual(Student.objects.count(), 20)
+        self.assertEqual(ItemBooking.objects.filter(returned=True).count(), 200)
+        out = StringIO()
+        call_command("backfill_relations", check=True, stdout=out)
+        self.assertIn("Every foreign key is filled", out.getvalue())
+        self.assertEqual(Booking.objects.filter(returned=False).count(),
+                         RoomToRent.objects.filter(available=False).count())
+
+    def test_no_student_holds_two_rooms(self):
+        connection.check_constraints()
+        call_command("seed", scale=0.05, seed=1, flush=True, stdout=StringIO())
+
+        holders = list(Booking.objects.filter(returned=False).values_list("user", flat=True))
+        self.assertGreater(len(holders), 1)
+        self.assertEqual(len(holders), len(set(holders)))
+
+    def test_refuses_to_seed_twice_without_flush(self):
+        self.seed(1)
+
+        with self.assertRaises(CommandError):
+            call_command("seed", scale=0.002, stdout=StringIO())
+
+
+class ItemImportTests(TestCase):
+    def setUp(self):
+        Faculty.objects.create(name="W04N")
+        Faculty.objects.create(name="W8")
+        Building.objects.create(name="B1", faculty="W04N")
+        self.room = RoomWithItems.objects.create(room_number=101, building="B1", faculty="W04N")
+        Type.objects.create(type_name="Laptop")
+        Attribute.objects.create(attribute_name="Portable")
+
+    def import_csv(self, rows, header="name,amount,type,attribute,building,faculty,room_number"):
+        body = "\n".join([header] + rows) + "\n"
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post('/admin_paths/import_items', body, content_type='text/csv')
+        return response, len(queries)
+
+    def test_csv_upload_creates_updates_and_reports_rows(self):
+        Item.objects.create(name="Laptop 1", amount=1)
+
+        response, _ = self.import_csv([
+            "Laptop 1,5,Laptop,Portable,B1,W04N,101",
+            "Laptop 2,3,Laptop,Portable,B1,W04N,",
+            "Laptop 3,-1,Laptop,Portable,B1,W04N,101",
+            "Laptop 4,1,Tablet,Portable,B1,W04N,101",
+            "Laptop 5,1,Laptop,Portable,B1,W8,101",
+            "Laptop 6,1,Laptop,Portable,B1,W04N,999",
+            "Laptop 2,1,Laptop,Portable,B1,W04N,",
+        ])
+
+        self.assertEqual(response.status_code, 200)
+        report = response.json()
+        self.assertEqual((report["created"], report["updated"], report["failed"]), (1, 1, 5))
+        self.assertEqual([(error["line"], error["name"]) for error in report["errors"]],
+                         [(4, "Laptop 3"), (5, "Laptop 4"), (6, "Laptop 5"), (7, "Laptop 6"), (8, "Laptop 2")])
+        item = Item.objects.get(name="Laptop 1")
+        self.assertEqual((item.amount, item.room_number, item.room_ref_id), (5, "101", self.room.id))
+        self.assertEqual(item.building_ref.name, "B1")
+        self.assertEqual(Item.objects.get(name="Laptop 2").room_number, "Unknown")
+
+    def test_query_count_does_not_depend_on_the_number_of_rows(self):
+        _, queries = self.import_csv([f"Laptop {n},1,Laptop,Portable,B1,W04N,101" for n in range(5)])
+        _, more_queries = self.import_csv([f"Laptop {n},1,Laptop,Portable,B1,W04N,101" for n in range(500)])
+
+        self.assertEqual(more_queries, queries)
+        self.assertEqual(Item.objects.count(), 500)
+
+    def test_rejects_inputs_it_cannot_read(self):
+        response, _ = self.import_csv(["Laptop 1,1"], header="name,amount")
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("attribute", response.json()["error"])
+
+        response = self.client.post('/admin_paths/import_items', "name\n", content_type='text/plain')
+        self.assertEqual(response.status_code, 400)
+
+    def test_command_imports_json_lines(self):
+        lines = [
+            json.dumps({"name": "Laptop 1", "amount": 2, "type": "Laptop", "attribute": "Portable",
+                        "building": "B1", "faculty": "W04N", "room_number": 101}),
+            "",
+            "{not json",
+            json.dumps(["Laptop 2"]),
+        ]
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "items.ndjson")
+            errors = os.path.join(directory, "errors.ndjson")
+            with open(path, "w") as f:
+                f.write("\n".join(lines) + "\n")
+
+            out = StringIO()
+            call_command("import_items", path, batch_size=1, errors=errors, stdout=out)
+
+            with open(errors) as f:
+                self.assertEqual([json.loads(line)["line"] for line in f], [3, 4])
+        self.assertIn("1 created, 0 updated), 2 rows failed", out.getvalue())
+        self.assertEqual(Item.objects.get(name="Laptop 1").room_ref_id, self.room.id)
+
+
+class InventoryCounterTests(TestCase):
+    def setUp(self):
+        Faculty.objects.create(name="W04N")
+        Building.objects.create(name="B1", faculty="W04N")
+        Building.objects.create(name="B2", faculty="W04N")
+        Type.objects.create(type_name="Laptop")
+        Attribute.objects.create(attribute_name="Portable")
+
+    def add_item(self, name, amount, building="B1"):
+        response = self.client.post('/admin_paths/add_item', {
+            "name": name, "amount": amount, "type": "Laptop", "attribute": "Portable", "building": building,
+            "faculty": "W04N", "room_with_items": "101",
+        }, content_type='application/json')
+        return response.json()["item_id"]
+
+    def inventory(self, query=""):
+        response = self.client.get(f'/admin_paths/inventory{query}')
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_write_views_keep_the_counters_in_step_with_the_items(self):
+        laptop = self.add_item("Laptop 1", 3)
+        other = self.add_item("Laptop 2", 2, building="B2")
+        self.assertEqual(inventory.drift(), {})
+
+        for student in ("111111", "222222"):
+            self.client.post('/student/rent_item', {"student_id": student, "item_id": laptop,
+                                                    "start_date": "2030-01-01", "end_date": "2030-01-02"},
+                             content_type='application/json')
+        self.assertEqual(InventoryCounter.objects.get(building="B1").available, 1)
+
+        self.client.post('/admin_paths/return_item', {"id": laptop, "item_id": laptop, "reserved_by": "111111"},
+                         content_type='application/json')
+        self.client.post('/admin_paths/return_items', {"returns": [{"item_id": laptop, "reserved_by": "222222"}]},
+                         content_type='application/json')
+        self.assertEqual(InventoryCounter.objects.get(building="B1").available, 3)
+        self.assertEqual(inventory.drift(), {})
+
+        # Moving an item to another building through the import moves it between counters
+        self.client.post('/admin_paths/import_items', "name,amount,type,attribute,building,faculty\n"
+                                                      "Laptop 2,7,Laptop,Portable,B1,W04N\n", content_type='text/csv')
+        self.assertEqual(inventory.drift(), {})
+        self.assertEqual(self.inventory("?group_by=building")["groups"],
+                         [{"building": "B1", "items": 2, "available": 10}])
+
+        self.client.delete(f'/admin_paths/delete_item/{other}')
+        self.client.delete(f'/admin_paths/remove_building/{Building.objects.get(name="B1").id}')
+        self.assertEqual(inventory.drift(), {})
+        self.assertEqual(self.inventory()["total"], {"items": 0, "available": 0})
+
+    def test_totals_filtered_and_grouped(self):
+        self.add_item("Laptop 1", 3)
+        self.add_item("Laptop 2", 2)
+        self.add_item("Laptop 3", 4, building="B2")
+
+        self.assertEqual(self.inventory("?building=B1&group_by=type")["groups"],
+                         [{"type": "Laptop", "items": 2, "available": 5}])
+        self.assertEqual(self.inventory("?group_by=")["total"], {"items": 3, "available": 9})
+        self.assertEqual(self.client.get('/admin_paths/inventory?group_by=name').status_code, 400)
+
+    def test_reconcile_rebuilds_drifted_counters(self):
+        self.add_item("Laptop 1", 3)
+        Item.objects.filter(name="Laptop 1").update(amount=10)
+        Item.objects.create(name="Laptop 2", amount=1, type="Laptop", attribute="Portable", building="B2",
+                            faculty="W04N")
+
+        out = StringIO()
+        call_command("reconcile_inventory", check=True, stdout=out)
+        self.assertIn("2 counters have drifted", out.getvalue())
+        self.assertEqual(len(inventory.drift()), 2)
 
-# Create your tests here.
+        call_command("reconcile_inventory", stdout=StringIO())
+        self.assertEqual(inventory.drift(), {})
+        self.assertEqual(self.inventory("?group_by=building")["total"], {"items": 2, "available": 11})
@@ -0,0 +1,39 @@
+# Generated by Django 5.1.3 on 2026-10-18 19:01
+
+import django.db.models.deletion
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    # Nullable columns are added without a table rewrite and the indexes are built
+    # concurrently, so the table stays writable while this migration runs.
+    atomic = False
+
+    dependencies = [
+        ('Item', '0009_item_building_ref_item_faculty_ref_item_room_ref_and_more'),
+        ('ItemBooking', '0006_itembooking_name'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='itembooking',
+            name='item_ref',
+            field=models.ForeignKey(blank=True, db_index=False, null=True, on_delete=django.db.models.deletion.SET_NULL, to='Item.item'),
+        ),
+        migrations.AddField(
+            model_name='itembooking',
+            name='student_ref',
+            field=models.ForeignKey(blank=True, db_index=False, null=True, on_delete=django.db.models.deletion.SET_NULL, to=settings.AUTH_USER_MODEL),
+        ),
+        AddIndexConcurrently(
+            model_name='itembooking',
+            index=models.Index(fields=['item_ref'], name='itembooking_item_ref_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='itembooking',
+            index=models.Index(fields=['student_ref'], name='itembooking_student_ref_idx'),
+        ),
+    ]
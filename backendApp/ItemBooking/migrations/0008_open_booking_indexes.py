@@ -0,0 +1,23 @@
+# Generated by Django 5.1.3 on 2026-10-18 19:20
+
+from django.conf import settings
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    # Indexes are built concurrently so the table stays writable meanwhile.
+    atomic = False
+
+    dependencies = [
+        ('Item', '0009_item_building_ref_item_faculty_ref_item_room_ref_and_more'),
+        ('ItemBooking', '0007_itembooking_item_ref_itembooking_student_ref_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='itembooking',
+            index=models.Index(condition=models.Q(('returned', False)), fields=['student_id', 'item_id'], name='itembooking_open_student_idx'),
+        ),
+    ]
@@ -1,7 +1,10 @@
+from django.conf import settings
 from django.db import models
 
+from backendApp.relations import RefSyncMixin, as_int, resolve_ref
 
-class ItemBooking(models.Model):
+
+class ItemBooking(RefSyncMixin, models.Model):
     id = models.BigAutoField(primary_key=True)
     name = models.CharField(max_length=100, unique=False, default='Unknown')
     item_id = models.CharField(max_length=100, unique=False, default='Unknown')
@@ -9,6 +12,32 @@ class ItemBooking(models.Model):
     start_date = models.CharField(max_length=100, unique=False, default='Unknown')
     end_date = models.CharField(max_length=100, unique=False, default='Unknown')
     returned = models.BooleanField(default=False, unique=False)
+    # Foreign keys replacing the string columns above, filled by sync_refs() and backfill_relations
+    item_ref = models.ForeignKey('Item.Item', on_delete=models.SET_NULL, null=True, blank=True, db_index=False)
+    student_ref = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True,
+                                    db_index=False)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['item_ref'], name='itembooking_item_ref_idx'),
+            models.Index(fields=['student_ref'], name='itembooking_student_ref_idx'),
+            # Open bookings only. Student first, so the same index serves the (student_id) lookups of
+            # reserved_items and the (item_id, student_id) lookups of rent_item, return_item and the
+            # available items anti-join.
+            models.Index(fields=['student_id', 'item_id'], condition=models.Q(returned=False),
+                         name='itembooking_open_student_idx'),
+        ]
+
+    def sync_refs(self):
+        """
+        Point the foreign keys at the rows named by the legacy string columns.
+        """
+        self.item_ref_id = resolve_ref(self, 'item_ref', item_id=as_int(self.item_id))
+        self.student_ref_id = resolve_ref(self, 'student_ref', username=self.student_id)
+
+    def save(self, *args, **kwargs):
+        self.sync_refs()
+        super().save(*args, **kwargs)
 
     def __str__(self):
         return f"Item {self.id} booked by {self.student_id}"
@@ -0,0 +1,28 @@
+# Generated by Django 5.1.3 on 2026-10-18 19:01
+
+import django.db.models.deletion
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    # Nullable columns are added without a table rewrite and the indexes are built
+    # concurrently, so the table stays writable while this migration runs.
+    atomic = False
+
+    dependencies = [
+        ('Building', '0004_building_faculty'),
+        ('RoomToRent', '0005_roomtorent_available'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='roomtorent',
+            name='building_ref',
+            field=models.ForeignKey(blank=True, db_index=False, null=True, on_delete=django.db.models.deletion.SET_NULL, to='Building.building'),
+        ),
+        AddIndexConcurrently(
+            model_name='roomtorent',
+            index=models.Index(fields=['building_ref'], name='roomtorent_building_ref_idx'),
+        ),
+    ]
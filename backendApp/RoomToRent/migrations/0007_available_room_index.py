@@ -0,0 +1,21 @@
+# Generated by Django 5.1.3 on 2026-10-18 19:20
+
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    # Indexes are built concurrently so the table stays writable meanwhile.
+    atomic = False
+
+    dependencies = [
+        ('Building', '0004_building_faculty'),
+        ('RoomToRent', '0006_roomtorent_building_ref_and_more'),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='roomtorent',
+            index=models.Index(condition=models.Q(('available', True)), fields=['id'], name='roomtorent_available_idx'),
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.1.3 on 2026-10-18 19:45
+
+import backendApp.RoomToRent.models
+import django.contrib.postgres.constraints
+import django.contrib.postgres.fields.ranges
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Booking', '0009_open_booking_indexes'),
+        ('RoomToRent', '0007_available_room_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RoomReservation',
+            fields=[
+                ('id', models.AutoField(primary_key=True, serialize=False)),
+                ('user', models.CharField(max_length=100)),
+                ('start_date', models.DateField()),
+                ('end_date', models.DateField()),
+                ('booking', models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='reservation', to='Booking.booking')),
+                ('room', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='reservations', to='RoomToRent.roomtorent')),
+            ],
+            options={
+                'constraints': [models.CheckConstraint(condition=models.Q(('end_date__gte', models.F('start_date'))), name='roomreservation_dates_ordered'), django.contrib.postgres.constraints.ExclusionConstraint(expressions=[(backendApp.RoomToRent.models.IntegerRange('room', 'room', django.contrib.postgres.fields.ranges.RangeBoundary(inclusive_lower=True, inclusive_upper=True)), '&&'), (backendApp.RoomToRent.models.DateRange('start_date', 'end_date', django.contrib.postgres.fields.ranges.RangeBoundary(inclusive_lower=True, inclusive_upper=True)), '&&')], name='roomreservation_no_overlap')],
+            },
+        ),
+    ]
@@ -1,16 +1,86 @@
+from django.contrib.postgres.constraints import ExclusionConstraint
+from django.contrib.postgres.fields import DateRangeField, IntegerRangeField, RangeBoundary, RangeOperators
 from django.db import models
 
+from backendApp.relations import RefSyncMixin, resolve_ref
 
-class RoomToRent(models.Model):
+
+class RoomToRent(RefSyncMixin, models.Model):
     id = models.AutoField(primary_key=True)
     room_number = models.IntegerField()
     is_to_rent = models.BooleanField(default=True, editable=False, blank=True)
     building = models.CharField(max_length=100, unique=False, default='Unknown')
     faculty = models.CharField(max_length=100, unique=False, default='Unknown')
     available = models.BooleanField(default=True, unique=False)
-    
+    # Foreign key replacing the building string above, filled by sync_refs() and backfill_relations
+    building_ref = models.ForeignKey('Building.Building', on_delete=models.SET_NULL, null=True, blank=True,
+                                     db_index=False)
+
     class Meta:
         unique_together = ('room_number', 'building')  # Ograniczenie unikalności
+        indexes = [
+            models.Index(fields=['building_ref'], name='roomtorent_building_ref_idx'),
+            # get_available_rooms lists only the rooms nobody holds
+            models.Index(fields=['id'], condition=models.Q(available=True), name='roomtorent_available_idx'),
+        ]
+
+    def sync_refs(self):
+        """
+        Point the foreign key at the building named by the legacy string column.
+        """
+        self.building_ref_id = resolve_ref(self, 'building_ref', name=self.building)
+
+    def save(self, *args, **kwargs):
+        self.sync_refs()
+        super().save(*args, **kwargs)
 
     def __str__(self):
         return f"Room {self.room_number} in {self.building}"
+
+
+class DateRange(models.Func):
+    function = 'daterange'
+    output_field = DateRangeField()
+
+
+class IntegerRange(models.Func):
+    function = 'int4range'
+    output_field = IntegerRangeField()
+
+
+class RoomReservation(models.Model):
+    """
+    A room held by a student for a range of days, both ends included.
+
+    Overlapping reservations of the same room are rejected by a GiST exclusion constraint,
+    so conflicts are detected by an index probe inside the INSERT and stay correct under
+    concurrent requests. The room is compared as a one-point integer range so the constraint
+    only needs range operators from core PostgreSQL, not the btree_gist extension.
+    """
+    id = models.AutoField(primary_key=True)
+    room = models.ForeignKey(RoomToRent, on_delete=models.CASCADE, related_name='reservations')
+    user = models.CharField(max_length=100, unique=False)
+    start_date = models.DateField()
+    end_date = models.DateField()
+    # Set when the reservation is the stay of a room rented through rent_room
+    booking = models.OneToOneField('Booking.Booking', on_delete=models.SET_NULL, null=True, blank=True,
+                                   related_name='reservation')
+
+    class Meta:
+        constraints = [
+            models.CheckConstraint(condition=models.Q(end_date__gte=models.F('start_date')),
+                                   name='roomreservation_dates_ordered'),
+            ExclusionConstraint(
+                name='roomreservation_no_overlap',
+                expressions=[
+                    (IntegerRange('room', 'room', RangeBoundary(inclusive_lower=True, inclusive_upper=True)),
+                     RangeOperators.OVERLAPS),
+                    (DateRange('start_date', 'end_date', RangeBoundary(inclusive_lower=True, inclusive_upper=True)),
+                     RangeOperators.OVERLAPS),
+                ],
+                index_type='GIST',
+            ),
+        ]
+
+    def __str__(self):
+        return f"Room {self.room_id} reserved by {self.user} from {self.start_date} to {self.end_date}"
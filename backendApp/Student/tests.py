@@ -1,3 +1,332 @@
-from django.test import TestCase
+import json
+import os
+import shutil
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from io import StringIO
 
-# Create your tests here.
+from django.core.management import call_command
+from django.db import IntegrityError, connection, transaction
+from django.test import Client, LiveServerTestCase, TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+
+from backendApp import student_import
+from backendApp.Booking.models import Booking
+from backendApp.Building.models import Building
+from backendApp.Faculty.models import Faculty
+from backendApp.Item.models import Item
+from backendApp.ItemBooking.models import ItemBooking
+from backendApp.RoomToRent.models import RoomReservation, RoomToRent
+from backendApp.Student.models import Student
+
+
+class AvailableItemsTests(TestCase):
+    def test_excludes_items_the_student_still_holds(self):
+        held = Item.objects.create(name="Laptop", amount=3)
+        returned = Item.objects.create(name="Mouse", amount=3)
+        other_student = Item.objects.create(name="Monitor", amount=3)
+        Item.objects.create(name="Tablet", amount=0)
+        ItemBooking.objects.create(item_id=held.item_id, student_id='123456', returned=False)
+        ItemBooking.objects.create(item_id=returned.item_id, student_id='123456', returned=True)
+        ItemBooking.objects.create(item_id=other_student.item_id, student_id='234567', returned=False)
+
+        response = self.client.get('/student/get_available_items/123456')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([item['name'] for item in response.json()['items']], ['Mouse', 'Monitor'])
+
+    def test_query_count_is_constant_in_item_count(self):
+        Item.objects.bulk_create(Item(name=f"Item {i}", amount=1) for i in range(3000))
+        ItemBooking.objects.bulk_create(
+            ItemBooking(item_id=str(item_id), student_id='123456', returned=False)
+            for item_id in Item.objects.values_list('item_id', flat=True)[:1000]
+        )
+
+        # The ETag lookup and the anti-join
+        with self.assertNumQueries(2):
+            response = self.client.get('/student/get_available_items/123456')
+        self.assertEqual(len(response.json()['items']), 2000)
+
+
+class ConcurrentRentalTests(TransactionTestCase):
+    STOCK = 50
+    RENTALS = 300
+
+    def rent(self, student_id, item_id):
+        try:
+            response = Client().post('/student/rent_item', json.dumps({
+                "student_id": str(student_id), "item_id": item_id,
+                "start_date": "2024-10-01", "end_date": "2024-10-08",
+            }), content_type="application/json")
+            return response.status_code
+        finally:
+            connection.close()
+
+    def test_concurrent_rentals_never_oversell(self):
+        item = Item.objects.create(name="Laptop", amount=self.STOCK)
+
+        with ThreadPoolExecutor(max_workers=20) as pool:
+            statuses = list(pool.map(lambda student_id: self.rent(student_id, item.item_id), range(self.RENTALS)))
+
+        item.refresh_from_db()
+        bookings = ItemBooking.objects.filter(item_id=item.item_id, returned=False).count()
+        self.assertEqual(statuses.count(200), self.STOCK)
+        self.assertEqual(statuses.count(400), self.RENTALS - self.STOCK)
+        self.assertEqual(item.amount, 0)
+        self.assertEqual(bookings, self.STOCK)
+
+    def test_concurrent_rentals_by_one_student_book_the_item_once(self):
+        item = Item.objects.create(name="Laptop", amount=self.STOCK)
+
+        with ThreadPoolExecutor(max_workers=10) as pool:
+            statuses = list(pool.map(lambda _: self.rent(123456, item.item_id), range(20)))
+
+        item.refresh_from_db()
+        self.assertEqual(statuses.count(200), 1)
+        self.assertEqual(item.amount, self.STOCK - 1)
+        self.assertEqual(ItemBooking.objects.filter(item_id=item.item_id, student_id='123456').count(), 1)
+
+    def test_concurrent_returns_give_stock_back_once(self):
+        item = Item.objects.create(name="Laptop", amount=0)
+        ItemBooking.objects.create(item_id=item.item_id, student_id='123456', returned=False)
+
+        def return_item(_):
+            try:
+                return Client().post('/admin_paths/return_item', json.dumps({
+                    "id": item.item_id, "item_id": item.item_id, "reserved_by": '123456',
+                }), content_type="application/json").status_code
+            finally:
+                connection.close()
+
+        with ThreadPoolExecutor(max_workers=10) as pool:
+            statuses = list(pool.map(return_item, range(20)))
+
+        item.refresh_from_db()
+        self.assertEqual(statuses.count(200), 1)
+        self.assertEqual(item.amount, 1)
+
+
+class RoomReservationTests(TestCase):
+    def setUp(self):
+        self.room = RoomToRent.objects.create(room_number=101, building="B1", faculty="W04N")
+        self.other_room = RoomToRent.objects.create(room_number=102, building="B1", faculty="W04N")
+        self.next_week = timezone.localdate() + timedelta(days=7)
+
+    def reserve(self, student_id, start_offset, days, room_number=101):
+        start = self.next_week + timedelta(days=start_offset)
+        return self.client.post('/student/reserve_room', json.dumps({
+            "student_id": student_id, "room_number": room_number, "building": "B1", "faculty": "W04N",
+            "start_date": start.isoformat(), "end_date": (start + timedelta(days=days)).isoformat(),
+        }), content_type="application/json")
+
+    def test_overlapping_reservation_is_rejected_by_the_database(self):
+        self.assertEqual(self.reserve('123456', 0, 3).status_code, 201)
+
+        self.assertEqual(self.reserve('234567', 3, 2).status_code, 409)
+        self.assertEqual(self.reserve('234567', 4, 2).status_code, 201)
+        self.assertEqual(self.reserve('234567', 0, 3, room_number=102).status_code, 201)
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            RoomReservation.objects.create(room=self.room, user='345678', start_date=self.next_week,
+                                           end_date=self.next_week)
+
+    def test_room_held_this_week_can_be_reserved_for_next_week(self):
+        today = timezone.localdate()
+        response = self.client.post('/student/rent_room', json.dumps({
+            "student_id": '123456', "room_number": 101, "building": "B1", "faculty": "W04N",
+            "start_date": today.isoformat(), "end_date": (today + timedelta(days=6)).isoformat(),
+        }), content_type="application/json")
+        self.assertEqual(response.status_code, 201)
+
+        self.assertEqual(self.reserve('234567', -1, 1).status_code, 409)
+        self.assertEqual(self.reserve('234567', 0, 3).status_code, 201)
+        reservations = self.client.get('/student/room_reservations/234567').json()['reservations']
+        self.assertEqual([r['start_date'] for r in reservations], [self.next_week.isoformat()])
+
+    def test_rent_room_rejects_days_reserved_by_someone_else(self):
+        self.reserve('234567', 0, 3)
+
+        response = self.client.post('/student/rent_room', json.dumps({
+            "student_id": '123456', "room_number": 101, "building": "B1", "faculty": "W04N",
+            "start_date": self.next_week.isoformat(), "end_date": self.next_week.isoformat(),
+        }), content_type="application/json")
+
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(Booking.objects.exists())
+        self.room.refresh_from_db()
+        self.assertTrue(self.room.available)
+
+    def test_returning_a_room_closes_the_booking_and_frees_the_room(self):
+        today = timezone.localdate()
+        rental = {"room_number": 101, "building": "B1", "faculty": "W04N"}
+        self.client.post('/student/rent_room', json.dumps({
+            **rental, "student_id": '123456',
+            "start_date": today.isoformat(), "end_date": (today + timedelta(days=6)).isoformat(),
+        }), content_type="application/json")
+        self.room.refresh_from_db()
+        self.assertFalse(self.room.available)
+
+        response = self.client.post('/admin_paths/return_room', json.dumps({**rental, "reserved_by": '123456'}),
+                                    content_type="application/json")
+
+        self.assertEqual(response.status_code, 200)
+        self.room.refresh_from_db()
+        self.assertTrue(self.room.available)
+        self.assertTrue(Booking.objects.get().returned)
+        self.assertEqual(list(RoomReservation.objects.values_list('end_date', flat=True)), [today])
+        response = self.client.post('/admin_paths/return_room', json.dumps({**rental, "reserved_by": '123456'}),
+                                    content_type="application/json")
+        self.assertEqual(response.status_code, 404)
+
+    def test_renting_keeps_the_reserved_days_outside_the_stay(self):
+        self.reserve('123456', 0, 9)
+        self.reserve('123456', 12, 2)
+        start = self.next_week + timedelta(days=3)
+
+        response = self.client.post('/student/rent_room', json.dumps({
+            "student_id": '123456', "room_number": 101, "building": "B1", "faculty": "W04N",
+            "start_date": start.isoformat(), "end_date": (start + timedelta(days=2)).isoformat(),
+        }), content_type="application/json")
+
+        self.assertEqual(response.status_code, 201)
+        reservations = RoomReservation.objects.order_by("start_date")
+        self.assertEqual([(r.start_date - self.next_week).days for r in reservations], [0, 3, 6, 12])
+        self.assertEqual([(r.end_date - self.next_week).days for r in reservations], [2, 5, 9, 14])
+        self.assertEqual([r.booking_id is not None for r in reservations], [False, True, False, False])
+
+
+class AsyncReadViewsTests(TestCase):
+    def setUp(self):
+        item = Item.objects.create(name="Laptop", amount=3)
+        Item.objects.create(name="Mouse", amount=3)
+        ItemBooking.objects.create(item_id=item.item_id, name="Laptop", student_id='123456', returned=False)
+        RoomToRent.objects.create(room_number=101, building="B1", faculty="W04N")
+        Booking.objects.create(room_number="101", user="123456", building="B1", faculty="W04N",
+                               start_time="2024-10-01", end_time="2024-10-08")
+
+    async def test_async_views_return_the_sync_payloads(self):
+        for path in ('get_available_rooms/123456', 'get_available_items/123456',
+                     'reserved_items/123456', 'reserved_rooms/123456'):
+            sync_response = await self.async_client.get(f'/student/{path}')
+            async_response = await self.async_client.get(f'/student/async/{path}')
+
+            self.assertEqual(async_response.status_code, 200)
+            self.assertEqual(async_response.json(), sync_response.json())
+            self.assertEqual(async_response['ETag'], sync_response['ETag'])
+
+    async def test_async_views_answer_not_modified(self):
+        etag = (await self.async_client.get('/student/async/reserved_rooms/123456'))['ETag']
+
+        response = await self.async_client.get('/student/async/reserved_rooms/123456', headers={'if-none-match': etag})
+
+        self.assertEqual(response.status_code, 304)
+
+
+class LoadTestCommandTests(LiveServerTestCase):
+    def test_reports_percentiles_per_endpoint(self):
+        Student.objects.create(username="123456")
+        Item.objects.create(name="Laptop", amount=5)
+        Faculty.objects.create(name="W04N")
+        Building.objects.create(name="B1", faculty="W04N")
+        RoomToRent.objects.create(room_number=101, building="B1", faculty="W04N")
+        output = os.path.join(tempfile.mkdtemp(), "results.json")
+        self.addCleanup(shutil.rmtree, os.path.dirname(output))
+
+        call_command("loadtest", url=self.live_server_url, clients=2, duration=1, warmup=0, output=output,
+                     stdout=StringIO())
+
+        with open(output) as f:
+            results = json.load(f)
+        self.assertEqual(results["total_errors"], 0)
+        self.assertGreater(results["total_requests"], 0)
+        endpoint = results["endpoints"]["GET student/reserved_rooms"]
+        self.assertLessEqual(endpoint["p50_ms"], endpoint["p95_ms"])
+        self.assertLessEqual(endpoint["p95_ms"], endpoint["p99_ms"])
+
+
+@override_settings(PASSWORD_HASHERS=["django.contrib.auth.hashers.MD5PasswordHasher"])
+class StudentProvisioningTests(TestCase):
+    def login(self, username, password):
+        return self.client.post('/student/login', {"username": username, "password": password},
+                                content_type='application/json')
+
+    def test_add_student_stores_a_hashed_password(self):
+        response = self.client.post('/admin_paths/add_student', {"username": "123456", "password": "secret"},
+                                    content_type='application/json')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(Student.objects.get(username="123456").password, "secret")
+        self.assertEqual(self.login("123456", "secret").status_code, 200)
+        response = self.client.post('/admin_paths/add_student', {"username": "123456", "password": "other"},
+                                    content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+
+    def test_csv_upload_creates_students_and_reports_rows(self):
+        Student.objects.create_user(username="100000", password="old")
+        body = "\n".join([
+            "username,password,email",
+            "200001,first,200001@student.example.com",
+            "100000,new,",
+            "200002,,",
+            "200001,again,",
+            "200003,third,",
+        ]) + "\n"
+
+        response = self.client.post('/admin_paths/import_students', body, content_type='text/csv')
+
+        self.assertEqual(response.status_code, 200)
+        report = response.json()
+        self.assertEqual((report["created"], report["failed"]), (2, 3))
+        self.assertEqual([error["line"] for error in report["errors"]], [3, 4, 5])
+        self.assertEqual(Student.objects.get(username="200001").email, "200001@student.example.com")
+        self.assertEqual(self.login("200003", "third").status_code, 200)
+        self.assertEqual(self.login("100000", "new").status_code, 401)
+
+    def test_rejects_uploads_over_the_row_limit(self):
+        body = "username,password\n" + "".join(f"{200000 + n},pass\n"
+                                               for n in range(student_import.MAX_UPLOAD_ROWS + 1))
+
+        response = self.client.post('/admin_paths/import_students', body, content_type='text/csv')
+
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(Student.objects.exists())
+
+    def test_username_taken_during_the_import_is_reported(self):
+        class RacingImporter(student_import.StudentImporter):
+            def without_existing(self, batch):
+                remaining = super().without_existing(batch)
+                # Another request creates one of the usernames between the lookup and the insert
+                if not Student.objects.filter(username="200002").exists():
+                    Student.objects.create_user(username="200002", password="other")
+                return remaining
+
+        rows = [(2, {"username": "200001", "password": "a"}), (3, {"username": "200002", "password": "b"})]
+        report = RacingImporter(workers=1).run(rows)
+
+        self.assertEqual((report["created"], report["failed"]), (1, 1))
+        self.assertEqual(report["errors"][0]["line"], 3)
+        self.assertTrue(Student.objects.get(username="200001").check_password("a"))
+
+    def test_rejects_csv_without_password_column(self):
+        response = self.client.post('/admin_paths/import_students', "username\n200001\n", content_type='text/csv')
+
+        self.assertEqual(response.status_code, 400)
+
+
+@override_settings(PASSWORD_HASHERS=["django.contrib.auth.hashers.MD5PasswordHasher"])
+class ImportStudentsCommandTests(TestCase):
+    def test_hashes_passwords_in_a_process_pool(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "students.csv")
+            with open(path, "w") as f:
+                f.write("username,password\n" + "".join(f"{300000 + n},pass{n}\n" for n in range(3)))
+
+            out = StringIO()
+            call_command("import_students", path, workers=2, batch_size=2, stdout=out)
+
+        self.assertIn("Created 3 students, 0 rows failed", out.getvalue())
+        students = Student.objects.order_by("username")
+        self.assertEqual([student.check_password(f"pass{n}") for n, student in enumerate(students)],
+                         [True, True, True])
+        # The workers hashed with the hasher of this process, not with the one of the settings module
+        self.assertTrue(all(student.password.startswith("md5$") for student in students))
@@ -8,4 +8,11 @@ urlpatterns = [
     path('rent_room', views.rent_room, name='rent_room'),
     path('reserved_items/<str:username>', views.get_reserved_items, name='get_reserved_items'),
     path('reserved_rooms/<str:username>', views.get_reserved_rooms, name='get_reserved_rooms'),
-]
\ No newline at end of file
+    path('reserve_room', views.reserve_room, name='reserve_room'),
+    path('room_reservations/<str:username>', views.get_room_reservations, name='get_room_reservations'),
+    path('async/get_available_rooms/<str:username>', views.get_available_rooms_async,
+         name='get_available_rooms_async'),
+    path('async/get_available_items/<str:id>', views.get_available_items_async, name='get_available_items_async'),
+    path('async/reserved_items/<str:username>', views.get_reserved_items_async, name='get_reserved_items_async'),
+    path('async/reserved_rooms/<str:username>', views.get_reserved_rooms_async, name='get_reserved_rooms_async'),
+]
@@ -1,19 +1,72 @@
 import logging
+from datetime import date, timedelta
 
 from django.contrib.auth import authenticate, login
-from django.db.models import IntegerField
+from django.db import IntegrityError, transaction
+from django.db.models import CharField, Exists, F, IntegerField, OuterRef
 from django.db.models.functions import Cast
+from django.utils import timezone
 from django.views.decorators.csrf import csrf_exempt
+from backendApp import inventory
+from backendApp.conditional import async_conditional_on, conditional_on
 from django.middleware.csrf import get_token
 from backendApp.Booking.models import Booking
 from backendApp.Item.models import Item
 from backendApp.ItemBooking.models import ItemBooking
-from backendApp.RoomToRent.models import RoomToRent
-from django.http import JsonResponse
+from backendApp.RoomToRent.models import RoomReservation, RoomToRent
+from backendApp.responses import FastJsonResponse
 import json
 
 logger = logging.getLogger(__name__)
 
+AVAILABLE_ITEM_FIELDS = ('item_id', 'name', 'amount', 'room_number', 'type', 'attribute', 'building', 'faculty')
+
+
+def serialize_room_to_rent(room):
+    return {
+        "id": room.id,
+        "room_number": room.room_number,
+        "building": room.building,
+        "faculty": room.faculty,
+        "is_to_rent": room.is_to_rent,
+        "available": room.available,
+    }
+
+
+def serialize_available_item(item):
+    return {
+        "id": item["item_id"],
+        "name": item["name"],
+        "amount": item["amount"],
+        "room_number": item["room_number"],
+        "type": item["type"],
+        "attribute": item["attribute"],
+        "building": item["building"],
+        "faculty": item["faculty"]
+    }
+
+
+def serialize_reserved_item(item):
+    return {
+        "id": item.id,
+        "name": item.name,
+        "student_id": item.student_id,
+        "start_date": item.start_date,
+        "end_date": item.end_date,
+        "returned": item.returned,
+    }
+
+
+def serialize_reserved_room(room):
+    return {
+        "id": room.booking_id,
+        "room_number": room.room_number,
+        "building": room.building,
+        "faculty": room.faculty,
+        "start_date": room.start_time,
+        "end_date": room.end_time
+    }
+
 
 @csrf_exempt
 def student_login(request):
@@ -28,23 +81,24 @@ def student_login(request):
             password = data.get('password')
         except json.JSONDecodeError as e:
             logger.error(f"JSON decode error: {e}")
-            return JsonResponse({"error": "Invalid JSON"}, status=400)
+            return FastJsonResponse({"error": "Invalid JSON"}, status=400)
 
         user = authenticate(request, username=username, password=password)
         if user is not None:
             login(request, user)
             csrf_token = get_token(request)
-            return JsonResponse({
+            return FastJsonResponse({
                 "message": "Login successful",
                 "csrf_token": csrf_token
             }, status=200)
 
-        return JsonResponse({"error": "Invalid credentials"}, status=401)
+        return FastJsonResponse({"error": "Invalid credentials"}, status=401)
 
-    return JsonResponse({"error": "Invalid method"}, status=405)
+    return FastJsonResponse({"error": "Invalid method"}, status=405)
 
 
 @csrf_exempt
+@conditional_on(RoomToRent)
 def get_available_rooms(request, username):
     """
     Fetch all RoomToRent objects from the database.
@@ -54,28 +108,29 @@ def get_available_rooms(request, username):
         try:
             emptyRooms = RoomToRent.objects.filter(available=True)
             if len(emptyRooms) == 0:
-                return JsonResponse({"rooms": []}, status=200)
+                return FastJsonResponse({"rooms": []}, status=200)
 
             # Fetch all RoomToRent objects
-            room_list = [
-                {
-                    "id": room.id,
-                    "room_number": room.room_number,
-                    "building": room.building,
-                    "faculty": room.faculty,
-                    "is_to_rent": room.is_to_rent,
-                    "available": room.available,
-                }
-                for room in emptyRooms
-            ]
-            return JsonResponse({"rooms": room_list}, status=200)
+            room_list = [serialize_room_to_rent(room) for room in emptyRooms]
+            return FastJsonResponse({"rooms": room_list}, status=200)
         except Exception as e:
-            return JsonResponse({"error": str(e)}, status=500)
+            return FastJsonResponse({"error": str(e)}, status=500)
+
+    return FastJsonResponse({"error": "Method not allowed"}, status=405)
+
 
-    return JsonResponse({"error": "Method not allowed"}, status=405)
+def available_items(student_id):
+    """
+    Items in stock that the student is not currently holding, as a single NOT EXISTS query.
+    """
+    # Correlated on the item id, which ItemBooking stores as text
+    borrowed = ItemBooking.objects.filter(item_id=Cast(OuterRef('item_id'), CharField()),
+                                          student_id=student_id, returned=False)
+    return Item.objects.filter(amount__gt=0).filter(~Exists(borrowed)).order_by('item_id')
 
 
 @csrf_exempt
+@conditional_on(Item, ItemBooking)
 def get_available_items(request, id):
     """
     Fetch available items for students.
@@ -84,34 +139,17 @@ def get_available_items(request, id):
         try:
             student_id = id
             if not student_id:
-                return JsonResponse({"error": "student_id is required"}, status=400)
-
-            items = Item.objects.filter(amount__gt=0)
-            logger.debug(f"Items: {items}")
-            item_list = []
-
-            for item in items:
-                is_booked = ItemBooking.objects.filter(item_id=item.item_id, student_id=student_id,
-                                                       returned=False).exists()
-                if not is_booked:
-                    logger.debug(f"Item {item.item_id} is available")
-                    item_list.append({
-                        "id": item.item_id,
-                        "name": item.name,
-                        "amount": item.amount,
-                        "room_number": item.room_number,
-                        "type": item.type,
-                        "attribute": item.attribute,
-                        "building": item.building,
-                        "faculty": item.faculty
-                    })
-
-            return JsonResponse({"items": item_list}, status=200)
+                return FastJsonResponse({"error": "student_id is required"}, status=400)
+
+            items = available_items(student_id).values(*AVAILABLE_ITEM_FIELDS)
+            item_list = [serialize_available_item(item) for item in items]
+
+            return FastJsonResponse({"items": item_list}, status=200)
         except json.JSONDecodeError:
-            return JsonResponse({"error": "Invalid JSON"}, status=400)
+            return FastJsonResponse({"error": "Invalid JSON"}, status=400)
         except Exception as e:
-            return JsonResponse({"error": str(e)}, status=500)
-    return JsonResponse({"error": "Method not allowed"}, status=405)
+            return FastJsonResponse({"error": str(e)}, status=500)
+    return FastJsonResponse({"error": "Method not allowed"}, status=405)
 
 
 @csrf_exempt
@@ -127,40 +165,76 @@ def rent_item(request):
             start_date = data.get('start_date')
             end_date = data.get('end_date')
         except json.JSONDecodeError:
-            return JsonResponse({"error": "Invalid JSON"}, status=400)
-
-        # Validate that the item exists and has a positive amount
-        try:
-            item = Item.objects.get(item_id=item_id)
-        except Item.DoesNotExist:
-            return JsonResponse({"error": "Item not found"}, status=404)
-
-        if item.amount <= 0:
-            return JsonResponse({"error": "Item is not available for rent"}, status=400)
-
-        # Check if the student has already rented the same item
-        existing_rentals = ItemBooking.objects.filter(item_id=item_id, student_id=student_id, returned=False)
-        if existing_rentals.exists():
-            return JsonResponse({"error": "Item already rented by the student"}, status=400)
-
-        # Decrement the item amount
-        item.amount -= 1
-        item.save()
-
-        # Create a new ItemBooking
-        ItemBooking.objects.create(
-            item_id=item_id,
-            name=item.name,
-            student_id=student_id,
-            start_date=start_date,
-            end_date=end_date,
-            returned=False
-        )
-
-        return JsonResponse({
+            return FastJsonResponse({"error": "Invalid JSON"}, status=400)
+
+        with transaction.atomic():
+            # Lock the item, so that concurrent rentals of it by the same student wait for each other's
+            # booking before checking for one
+            try:
+                item = Item.objects.select_for_update().get(item_id=item_id)
+            except Item.DoesNotExist:
+                return FastJsonResponse({"error": "Item not found"}, status=404)
+
+            # Check if the student has already rented the same item
+            existing_rentals = ItemBooking.objects.filter(item_id=item_id, student_id=student_id, returned=False)
+            if existing_rentals.exists():
+                return FastJsonResponse({"error": "Item already rented by the student"}, status=400)
+
+            # Decrement the item amount in the database, only while there is stock left, so that
+            # concurrent rentals can neither oversell nor overwrite each other's decrement
+            rented = Item.objects.filter(item_id=item_id, amount__gt=0).update(amount=F('amount') - 1)
+            if not rented:
+                return FastJsonResponse({"error": "Item is not available for rent"}, status=400)
+            inventory.adjust(inventory.group_of(item), available=-1)
+
+            # Create a new ItemBooking; the item's key is at hand, so save() only looks up the student's
+            ItemBooking.objects.create(
+                item_id=item_id,
+                name=item.name,
+                student_id=student_id,
+                start_date=start_date,
+                end_date=end_date,
+                returned=False,
+                item_ref_id=item.item_id
+            )
+
+        return FastJsonResponse({
             "message": f"Student {student_id} rented item {item_id} successfully"
         }, status=200)
-    return JsonResponse({"error": "Method not allowed"}, status=405)
+    return FastJsonResponse({"error": "Method not allowed"}, status=405)
+
+
+def parse_date_range(start_date, end_date):
+    """
+    Parse ISO start and end dates, raising ValueError if either is invalid or the range is reversed.
+    """
+    try:
+        start, end = date.fromisoformat(start_date), date.fromisoformat(end_date)
+    except TypeError:
+        raise ValueError("'start_date' and 'end_date' are required")
+    if end < start:
+        raise ValueError("'end_date' must not be before 'start_date'")
+    return start, end
+
+
+def release_reserved_days(room, student_id, start, end):
+    """
+    Remove the days from `start` to `end` from the student's own reservations of the room: reservations
+    inside the range are deleted, the others are shortened, or split in two around it.
+    """
+    overlapping = RoomReservation.objects.select_for_update().filter(
+        room=room, user=student_id, booking__isnull=True, start_date__lte=end, end_date__gte=start)
+    for reservation in overlapping:
+        after = reservation.end_date
+        if reservation.start_date < start:
+            reservation.end_date = start - timedelta(days=1)
+            reservation.save(update_fields=['end_date'])
+        else:
+            reservation.delete()
+        # Created once the original no longer covers these days, which the overlap constraint would reject
+        if after > end:
+            RoomReservation.objects.create(room=room, user=student_id, start_date=end + timedelta(days=1),
+                                           end_date=after)
 
 
 @csrf_exempt
@@ -178,44 +252,59 @@ def rent_room(request):
             building = data.get('building')
             faculty = data.get('faculty')
         except json.JSONDecodeError:
-            return JsonResponse({"error": "Invalid JSON"}, status=400)
+            return FastJsonResponse({"error": "Invalid JSON"}, status=400)
+
+        try:
+            start, end = parse_date_range(start_date, end_date)
+        except ValueError as e:
+            return FastJsonResponse({"error": str(e)}, status=400)
 
         # Validate that the room exists
         try:
             room = RoomToRent.objects.get(room_number=room_number, building=building, faculty=faculty)
         except RoomToRent.DoesNotExist:
-            return JsonResponse({"error": "Room not found"}, status=404)
+            return FastJsonResponse({"error": "Room not found"}, status=404)
 
         # Check if the room is already rented
         if Booking.objects.filter(room_number=room_number, building=building, faculty=faculty, returned=False).exists():
-            return JsonResponse({"error": "Room is already rented"}, status=400)
+            return FastJsonResponse({"error": "Room is already rented"}, status=400)
 
         # Check if the student has already rented a room
         if Booking.objects.filter(user=student_id, returned=False).exists():
-            return JsonResponse({"error": "Student has already rented a room"}, status=400)
-
-        # Create a new Booking
-        Booking.objects.create(
-            room_number=room_number,
-            user=student_id,
-            start_time=start_date,
-            end_time=end_date,
-            building=room.building,
-            faculty=room.faculty,
-            isRoomToRent=True,
-            returned=False
-        )
-
-        room.available = False
-        room.save()
-
-        return JsonResponse({
+            return FastJsonResponse({"error": "Student has already rented a room"}, status=400)
+
+        try:
+            with transaction.atomic():
+                # Create a new Booking
+                booking = Booking.objects.create(
+                    room_number=room_number,
+                    user=student_id,
+                    start_time=start,
+                    end_time=end,
+                    building=room.building,
+                    faculty=room.faculty,
+                    isRoomToRent=True,
+                    returned=False,
+                    room_ref_id=room.id,
+                    building_ref_id=room.building_ref_id
+                )
+                # Hold the days of the stay, so nobody can reserve them in advance; the days of the stay
+                # are taken out of the reservations the student made earlier, which keep the rest
+                release_reserved_days(room, student_id, start, end)
+                RoomReservation.objects.create(room=room, user=student_id, start_date=start, end_date=end,
+                                               booking=booking)
+                RoomToRent.objects.filter(pk=room.pk).update(available=False)
+        except IntegrityError:
+            return FastJsonResponse({"error": "Room is reserved for these dates"}, status=400)
+
+        return FastJsonResponse({
             "message": f"Student {student_id} rented room {room_number} successfully"
         }, status=201)
-    return JsonResponse({"error": "Method not allowed"}, status=405)
+    return FastJsonResponse({"error": "Method not allowed"}, status=405)
 
 
 @csrf_exempt
+@conditional_on(ItemBooking)
 def get_reserved_items(request, username):
     """
     Fetch reserved items for a specific student by username.
@@ -223,24 +312,15 @@ def get_reserved_items(request, username):
     if request.method == "GET":
         try:
             items = ItemBooking.objects.filter(student_id=username, returned=False)
-            item_list = [
-                {
-                    "id": item.id,
-                    "name": item.name,
-                    "student_id": item.student_id,
-                    "start_date": item.start_date,
-                    "end_date": item.end_date,
-                    "returned": item.returned,
-                }
-                for item in items
-            ]
-            return JsonResponse({"items": item_list}, status=200)
+            item_list = [serialize_reserved_item(item) for item in items]
+            return FastJsonResponse({"items": item_list}, status=200)
         except Exception as e:
-            return JsonResponse({"error": str(e)}, status=500)
-    return JsonResponse({"error": "Method not allowed"}, status=405)
+            return FastJsonResponse({"error": str(e)}, status=500)
+    return FastJsonResponse({"error": "Method not allowed"}, status=405)
 
 
 @csrf_exempt
+@conditional_on(Booking)
 def get_reserved_rooms(request, username):
     """
     Fetch reserved rooms for a specific student by username.
@@ -248,18 +328,149 @@ def get_reserved_rooms(request, username):
     if request.method == "GET":
         try:
             rooms = Booking.objects.filter(user=username, returned=False)
-            room_list = [
+            room_list = [serialize_reserved_room(room) for room in rooms]
+            return FastJsonResponse({"rooms": room_list}, status=200)
+        except Exception as e:
+            return FastJsonResponse({"error": str(e)}, status=500)
+    return FastJsonResponse({"error": "Method not allowed"}, status=405)
+
+
+@csrf_exempt
+def reserve_room(request):
+    """
+    Allow students to reserve a room for a future range of days.
+    """
+    if request.method == "POST":
+        try:
+            data = json.loads(request.body)
+            student_id = data.get('student_id')
+            room_number = data.get('room_number')
+            building = data.get('building')
+            faculty = data.get('faculty')
+            start_date = data.get('start_date')
+            end_date = data.get('end_date')
+        except json.JSONDecodeError:
+            return FastJsonResponse({"error": "Invalid JSON"}, status=400)
+
+        if not student_id:
+            return FastJsonResponse({"error": "student_id is required"}, status=400)
+        try:
+            start, end = parse_date_range(start_date, end_date)
+        except ValueError as e:
+            return FastJsonResponse({"error": str(e)}, status=400)
+        if start < timezone.localdate():
+            return FastJsonResponse({"error": "Reservations cannot start in the past"}, status=400)
+
+        try:
+            room = RoomToRent.objects.get(room_number=room_number, building=building, faculty=faculty)
+        except RoomToRent.DoesNotExist:
+            return FastJsonResponse({"error": "Room not found"}, status=404)
+
+        # Overlaps are rejected by the exclusion constraint on (room, daterange)
+        try:
+            with transaction.atomic():
+                reservation = RoomReservation.objects.create(room=room, user=student_id, start_date=start,
+                                                             end_date=end)
+        except IntegrityError:
+            return FastJsonResponse({"error": "Room is already reserved for these dates"}, status=409)
+
+        return FastJsonResponse({
+            "message": f"Student {student_id} reserved room {room_number} from {start} to {end}",
+            "id": reservation.id
+        }, status=201)
+    return FastJsonResponse({"error": "Method not allowed"}, status=405)
+
+
+@csrf_exempt
+def get_room_reservations(request, username):
+    """
+    Fetch the current and upcoming room reservations of a student.
+    """
+    if request.method == "GET":
+        try:
+            reservations = (RoomReservation.objects
+                            .filter(user=username, end_date__gte=timezone.localdate())
+                            .select_related('room')
+                            .order_by('start_date'))
+            reservation_list = [
                 {
-                    "id": room.booking_id,
-                    "room_number": room.room_number,
-                    "building": room.building,
-                    "faculty": room.faculty,
-                    "start_date": room.start_time,
-                    "end_date": room.end_time
+                    "id": reservation.id,
+                    "room_number": reservation.room.room_number,
+                    "building": reservation.room.building,
+                    "faculty": reservation.room.faculty,
+                    "start_date": reservation.start_date,
+                    "end_date": reservation.end_date,
                 }
-                for room in rooms
+                for reservation in reservations
             ]
-            return JsonResponse({"rooms": room_list}, status=200)
+            return FastJsonResponse({"reservations": reservation_list}, status=200)
+        except Exception as e:
+            return FastJsonResponse({"error": str(e)}, status=500)
+    return FastJsonResponse({"error": "Method not allowed"}, status=405)
+
+
+# Async variants of the read views above, served under /student/async/ when the project runs on ASGI.
+# They return the same payloads; a slow query suspends the request instead of holding a worker thread.
+
+@csrf_exempt
+@async_conditional_on(RoomToRent)
+async def get_available_rooms_async(request, username):
+    """
+    Async version of get_available_rooms.
+    """
+    if request.method == "GET":
+        try:
+            room_list = [serialize_room_to_rent(room) async for room in RoomToRent.objects.filter(available=True)]
+            return FastJsonResponse({"rooms": room_list}, status=200)
+        except Exception as e:
+            return FastJsonResponse({"error": str(e)}, status=500)
+
+    return FastJsonResponse({"error": "Method not allowed"}, status=405)
+
+
+@csrf_exempt
+@async_conditional_on(Item, ItemBooking)
+async def get_available_items_async(request, id):
+    """
+    Async version of get_available_items.
+    """
+    if request.method == "GET":
+        try:
+            items = available_items(id).values(*AVAILABLE_ITEM_FIELDS)
+            item_list = [serialize_available_item(item) async for item in items]
+            return FastJsonResponse({"items": item_list}, status=200)
+        except Exception as e:
+            return FastJsonResponse({"error": str(e)}, status=500)
+    return FastJsonResponse({"error": "Method not allowed"}, status=405)
+
+
+@csrf_exempt
+@async_conditional_on(ItemBooking)
+async def get_reserved_items_async(request, username):
+    """
+    Async version of get_reserved_items.
+    """
+    if request.method == "GET":
+        try:
+            items = ItemBooking.objects.filter(student_id=username, returned=False)
+            item_list = [serialize_reserved_item(item) async for item in items]
+            return FastJsonResponse({"items": item_list}, status=200)
+        except Exception as e:
+            return FastJsonResponse({"error": str(e)}, status=500)
+    return FastJsonResponse({"error": "Method not allowed"}, status=405)
+
+
+@csrf_exempt
+@async_conditional_on(Booking)
+async def get_reserved_rooms_async(request, username):
+    """
+    Async version of get_reserved_rooms.
+    """
+    if request.method == "GET":
+        try:
+            rooms = Booking.objects.filter(user=username, returned=False)
+            room_list = [serialize_reserved_room(room) async for room in rooms]
+            return FastJsonResponse({"rooms": room_list}, status=200)
         except Exception as e:
-            return JsonResponse({"error": str(e)}, status=500)
-    return JsonResponse({"error": "Method not allowed"}, status=405)
+            return FastJsonResponse({"error": str(e)}, status=500)
+    return FastJsonResponse({"error": "Method not allowed"}, status=405)
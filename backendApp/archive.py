@@ -0,0 +1,141 @@
+# backendApp/archive.py
+#
+# Moves returned bookings older than BOOKING_ARCHIVE_AFTER_DAYS out of Booking and ItemBooking into the
+# booking_archive and itembooking_archive tables, which are range-partitioned by month, so the tables
+# the rental flow works on only hold open and recent rows. Every batch is a single statement that
+# deletes the rows with RETURNING and inserts them into the archive, committed on its own; rows are
+# claimed with SKIP LOCKED, so the move never waits for a rental and holds row locks for one batch only.
+# The returned_booking and returned_itembooking views read both sides (see backendApp/models.py).
+
+import time
+from datetime import timedelta
+
+from django.db import connection, transaction
+from django.utils import timezone
+
+from backendApp.Booking.models import Booking
+from backendApp.ItemBooking.models import ItemBooking
+from backendApp.RoomToRent.models import RoomReservation
+
+# ItemBooking keeps its dates as text; rows whose end date is not a valid ISO date (including ones such as
+# 2024-02-30, which match the pattern but would make the cast fail) are never archived. The day is checked
+# against the length of its month before casting, as CASE evaluates its branches in order.
+ISO_END_DATE = ("CASE WHEN end_date !~ '^(?!0000)[0-9]{4}-(0[1-9]|1[0-2])-(0[1-9]|[12][0-9]|3[01])$' THEN NULL "
+                "WHEN substr(end_date, 9, 2)::int <= extract(day from make_date(substr(end_date, 1, 4)::int, "
+                "substr(end_date, 6, 2)::int, 1) + interval '1 month - 1 day') THEN end_date::date END")
+
+
+def month_start(day):
+    return day.replace(day=1)
+
+
+def next_month(day):
+    return (day.replace(day=1) + timedelta(days=32)).replace(day=1)
+
+
+class Archive:
+    """
+    How the returned rows of one live table are moved into its partitioned archive table.
+
+    `key` is the SQL expression, over the live table's columns, of the date a row is archived and
+    partitioned by. When it is not a column of the live table it is stored in `key_column`.
+    """
+
+    def __init__(self, model, table, fields, key, key_column=None, unlink=()):
+        self.model = model
+        self.table = table
+        # The fields copied into the archive; a field added to the model must be added to the archive
+        # table by a migration and listed here, which test_archives_every_column_of_the_live_tables checks
+        self.fields = fields
+        self.key = key
+        self.key_column = key_column
+        # (model, column) pairs whose rows reference the moved rows and lose that reference
+        self.unlink = unlink
+
+    def move_sql(self):
+        quote = connection.ops.quote_name
+        live = quote(self.model._meta.db_table)
+        pk = quote(self.model._meta.pk.column)
+        columns = ', '.join(quote(column) for column in self.columns())
+        target, source = columns, columns
+        if self.key_column:
+            target, source = f"{columns}, {self.key_column}", f"{columns}, {self.key}"
+        unlinks = ''.join(
+            f"unlink_{n} AS (UPDATE {quote(model._meta.db_table)} SET {quote(column)} = NULL "
+            f"WHERE {quote(column)} IN (SELECT {pk} FROM batch)), "
+            for n, (model, column) in enumerate(self.unlink)
+        )
+        return (
+            f"WITH batch AS (SELECT {pk} FROM {live} WHERE returned AND {self.key} < %(cutoff)s "
+            f"ORDER BY {pk} LIMIT %(limit)s FOR UPDATE SKIP LOCKED), "
+            f"{unlinks}"
+            f"moved AS (DELETE FROM {live} WHERE {pk} IN (SELECT {pk} FROM batch) RETURNING *) "
+            f"INSERT INTO {self.table} ({target}) SELECT {source} FROM moved"
+        )
+
+    def columns(self):
+        return [self.model._meta.get_field(name).column for name in self.fields]
+
+    def missing_columns(self):
+        """
+        The columns the move writes that the archive table does not have.
+        """
+        with connection.cursor() as cursor:
+            archived = {column.name for column in connection.introspection.get_table_description(cursor, self.table)}
+        return [column for column in self.columns() + [self.key_column] if column and column not in archived]
+
+    def ensure_partitions(self, cutoff):
+        """
+        Creates the month partitions the rows due for archiving fall into.
+        """
+        live = connection.ops.quote_name(self.model._meta.db_table)
+        with connection.cursor() as cursor:
+            cursor.execute(f"SELECT min({self.key}), max({self.key}) FROM {live} WHERE returned AND {self.key} < %s",
+                           [cutoff])
+            first, last = cursor.fetchone()
+            if first is None:
+                return
+            month = month_start(first)
+            while month <= last:
+                # Each in its own short transaction: creating a partition briefly locks the archive table
+                cursor.execute(f"CREATE TABLE IF NOT EXISTS {self.table}_{month:%Y_%m} PARTITION OF {self.table} "
+                               f"FOR VALUES FROM (%s) TO (%s)", [month, next_month(month)])
+                month = next_month(month)
+
+    def run(self, cutoff, batch_size, sleep=0.0):
+        """
+        Moves every returned row whose key date is before `cutoff` and returns how many were moved.
+        """
+        self.ensure_partitions(cutoff)
+        sql = self.move_sql()
+        moved = 0
+        while True:
+            with transaction.atomic(), connection.cursor() as cursor:
+                cursor.execute(sql, {'cutoff': cutoff, 'limit': batch_size})
+                count = cursor.rowcount
+            moved += count
+            # A short batch means nothing is left, or the rest is locked by a request and waits for the next run
+            if count < batch_size:
+                return moved
+            if sleep:
+                time.sleep(sleep)
+
+
+ARCHIVES = (
+    Archive(Booking, 'booking_archive',
+            ('booking_id', 'item_id', 'room_number', 'user', 'start_time', 'end_time', 'building', 'faculty',
+             'isRoomToRent', 'returned', 'user_ref', 'building_ref', 'faculty_ref', 'room_ref'),
+            'end_time', unlink=((RoomReservation, 'booking_id'),)),
+    Archive(ItemBooking, 'itembooking_archive',
+            ('id', 'name', 'item_id', 'student_id', 'start_date', 'end_date', 'returned', 'item_ref', 'student_ref'),
+            ISO_END_DATE, key_column='ended_on'),
+)
+# Emptied together with the live booking tables by resetdb and seed --flush, whose ids they share
+ARCHIVE_TABLES = tuple(spec.table for spec in ARCHIVES)
+
+
+def cutoff_for(days, today=None):
+    """
+    The first day that is kept live when rows older than `days` days are archived.
+    """
+    return (today or timezone.localdate()) - timedelta(days=days)
@@ -0,0 +1,157 @@
+# backendApp/cache.py
+#
+# Two-tier cache for the read-mostly catalog endpoints (types, attributes, faculties, buildings, rooms).
+# L1 is a small LRU dictionary inside each worker process, L2 is the configured Django cache backend
+# shared by all workers. Write views call invalidate() for the namespaces they change. The views also
+# key their payloads by the ETag they answer with, so a payload is only ever served with the ETag of
+# the data it was built from, even in a worker whose L1 copy the invalidation of a write has not reached.
+
+import threading
+import time
+from collections import OrderedDict, defaultdict
+
+from django.core.cache import cache
+
+L1_MAX_ENTRIES = 256
+# Other workers drop their L1 copy after at most this many seconds once a write has happened
+L1_TIMEOUT = 5
+L2_TIMEOUT = 300
+
+TYPES = 'types'
+ATTRIBUTES = 'attributes'
+FACULTIES = 'faculties'
+BUILDINGS = 'buildings'
+ROOMS = 'rooms'
+NAMESPACES = (TYPES, ATTRIBUTES, FACULTIES, BUILDINGS, ROOMS)
+
+
+class LRUCache:
+    """
+    Thread-safe in-process LRU cache whose entries also expire after `timeout` seconds.
+    """
+
+    def __init__(self, max_entries, timeout):
+        self.max_entries = max_entries
+        self.timeout = timeout
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.timeout, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def delete_namespace(self, namespace):
+        with self._lock:
+            for key in [key for key in self._entries if key[0] == namespace]:
+                del self._entries[key]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+l1 = LRUCache(L1_MAX_ENTRIES, L1_TIMEOUT)
+_stats = defaultdict(lambda: {'l1_hits': 0, 'l2_hits': 0, 'misses': 0, 'invalidations': 0})
+_stats_lock = threading.Lock()
+
+
+def _count(namespace, counter):
+    with _stats_lock:
+        _stats[namespace][counter] += 1
+
+
+def _generation_key(namespace):
+    return f'catalog:{namespace}:generation'
+
+
+def _generation(namespace):
+    """
+    Current generation of a namespace in L2; invalidating bumps it so old L2 entries are never read again.
+    """
+    generation = cache.get(_generation_key(namespace))
+    if generation is None:
+        # Start from the clock, so a generation key evicted from L2 can never come back with the
+        # number of a generation whose entries are still cached
+        cache.add(_generation_key(namespace), time.time_ns(), timeout=None)
+        generation = cache.get(_generation_key(namespace))
+    return generation
+
+
+def get_or_build(namespace, key, build, version=''):
+    """
+    Return the cached payload for (namespace, key), calling `build()` and storing its result on a miss.
+
+    `version` identifies the state of the data the caller answers for, such as the request's table_etag;
+    payloads cached for another version are never returned.
+    """
+    l1_key = (namespace, key, version)
+    payload = l1.get(l1_key)
+    if payload is not None:
+        _count(namespace, 'l1_hits')
+        return payload
+
+    l2_key = f'catalog:{namespace}:{_generation(namespace)}:{version}:{key}'
+    payload = cache.get(l2_key)
+    if payload is not None:
+        _count(namespace, 'l2_hits')
+    else:
+        _count(namespace, 'misses')
+        payload = build()
+        cache.set(l2_key, payload, timeout=L2_TIMEOUT)
+    l1.set(l1_key, payload)
+    return payload
+
+
+def invalidate(*namespaces):
+    """
+    Drop every cached payload of the given namespaces, in this process and in the shared backend.
+    """
+    for namespace in namespaces:
+        l1.delete_namespace(namespace)
+        try:
+            cache.incr(_generation_key(namespace))
+        except ValueError:
+            cache.add(_generation_key(namespace), time.time_ns(), timeout=None)
+        _count(namespace, 'invalidations')
+
+
+def invalidate_all():
+    """
+    Drop every cached catalog payload; called when the database may have changed without the write views,
+    such as on server start or after the data was reset or generated.
+    """
+    invalidate(*NAMESPACES)
+
+
+def stats():
+    """
+    Hit/miss counters of this process, per namespace.
+    """
+    with _stats_lock:
+        return {namespace: dict(counters) for namespace, counters in _stats.items()}
+
+
+def clear():
+    """
+    Empty both tiers and reset the counters. L2 is emptied by moving every namespace to a new generation,
+    never by clearing the backend, which may hold the sessions and keys of other code.
+    """
+    l1.clear()
+    invalidate_all()
+    with _stats_lock:
+        _stats.clear()
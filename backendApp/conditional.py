@@ -0,0 +1,69 @@
+# backendApp/conditional.py
+
+from functools import wraps
+
+from django.db.models import Sum
+from django.utils.cache import get_conditional_response
+from django.utils.http import quote_etag
+from django.views.decorators.http import condition
+
+from backendApp.models import TableVersion
+
+
+def _versions(tables):
+    return (TableVersion.objects.filter(table_name__in=tables)
+            .values('table_name')
+            .annotate(total=Sum('version'))
+            .values_list('table_name', 'total'))
+
+
+def _format_etag(tables, versions):
+    return 'W/"' + '.'.join(str(versions.get(table, 0)) for table in tables) + '"'
+
+
+def table_etag(*models):
+    """
+    Build an ETag function from the change counters of the tables behind a view.
+
+    The counters are bumped by database triggers on every write (see backendApp/models.py),
+    so computing the ETag costs one small indexed query and no serialization of the data.
+    The ETag is also left on the request as `table_etag`, for views that cache their payload
+    per version of the data (see backendApp/cache.py).
+    """
+    tables = sorted(model._meta.db_table for model in models)
+
+    def etag(request, *args, **kwargs):
+        request.table_etag = _format_etag(tables, dict(_versions(tables)))
+        return request.table_etag
+
+    return etag
+
+
+def conditional_on(*models):
+    """
+    Answer GET requests with 304 Not Modified when none of the given tables changed since the client's ETag.
+    """
+    return condition(etag_func=table_etag(*models))
+
+
+def async_conditional_on(*models):
+    """
+    conditional_on() for async views; Django's condition() calls the ETag function synchronously,
+    which the async ORM does not allow, so the counters are read with an async query here.
+    """
+    tables = sorted(model._meta.db_table for model in models)
+
+    def decorator(view):
+        @wraps(view)
+        async def inner(request, *args, **kwargs):
+            etag = quote_etag(_format_etag(tables, {table: total async for table, total in _versions(tables)}))
+            response = get_conditional_response(request, etag=etag)
+            if response is None:
+                response = await view(request, *args, **kwargs)
+            if request.method in ("GET", "HEAD"):
+                response.headers.setdefault("ETag", etag)
+            return response
+
+        return inner
+
+    return decorator
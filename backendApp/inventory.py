@@ -0,0 +1,99 @@
+# backendApp/inventory.py
+#
+# Maintained totals of items and of available units per (type, attribute, building, faculty), so that
+# "how many laptops are free in building X" reads a few counter rows instead of every item. The views
+# that change an item's amount or group call adjust() in the same transaction as their write, so a
+# counter never shows a change that was rolled back; reconcile_inventory rebuilds the table from the
+# items should the two ever drift apart (for example after rows were edited by hand).
+
+from django.db import connection, transaction
+from django.db.models import Count, Sum
+
+from backendApp.Item.models import InventoryCounter, Item
+
+GROUP_FIELDS = ('type', 'attribute', 'building', 'faculty')
+
+
+def group_of(item):
+    return tuple(getattr(item, field) for field in GROUP_FIELDS)
+
+
+def adjust(group, items=0, available=0):
+    """
+    Adds `items` and `available` (either may be negative) to the counter of one group.
+    """
+    adjust_many({group: (items, available)})
+
+
+def adjust_many(deltas):
+    """
+    Applies {group: (items, available)} deltas with a single upsert.
+
+    Groups are written in sorted order, so transactions adjusting several counters always lock
+    them in the same order and cannot deadlock on each other.
+    """
+    rows = [(*group, items, available) for group, (items, available) in sorted(deltas.items())
+            if items or available]
+    if not rows:
+        return
+    table = connection.ops.quote_name(InventoryCounter._meta.db_table)
+    columns = GROUP_FIELDS + ('items', 'available')
+    placeholders = ', '.join(['(' + ', '.join(['%s'] * len(columns)) + ')'] * len(rows))
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"INSERT INTO {table} ({', '.join(columns)}) VALUES {placeholders} "
+            f"ON CONFLICT ({', '.join(GROUP_FIELDS)}) DO UPDATE "
+            f"SET items = {table}.items + EXCLUDED.items, available = {table}.available + EXCLUDED.available",
+            [value for row in rows for value in row],
+        )
+
+
+def totals(items):
+    """
+    {group: (items, available)} of a queryset of items, computed in the database.
+    """
+    return {
+        tuple(row[field] for field in GROUP_FIELDS): (row['item_count'], row['amount_total'] or 0)
+        for row in items.order_by().values(*GROUP_FIELDS).annotate(item_count=Count('pk'),
+                                                                   amount_total=Sum('amount'))
+    }
+
+
+def subtract(items):
+    """
+    Removes a queryset of items that is about to be deleted from the counters.
+    """
+    adjust_many({group: (-count, -amount) for group, (count, amount) in totals(items).items()})
+
+
+def counted():
+    return {group_of(counter): (counter.items, counter.available)
+            for counter in InventoryCounter.objects.exclude(items=0, available=0)}
+
+
+def drift():
+    """
+    The groups whose counter disagrees with the items, as {group: (counted, actual)}.
+    """
+    actual, current = totals(Item.objects.all()), counted()
+    return {group: (current.get(group, (0, 0)), actual.get(group, (0, 0)))
+            for group in actual.keys() | current.keys()
+            if current.get(group, (0, 0)) != actual.get(group, (0, 0))}
+
+
+def rebuild():
+    """
+    Replaces every counter with totals computed from the items and returns the number of groups.
+    """
+    with transaction.atomic():
+        with connection.cursor() as cursor:
+            # Item writes wait until the counters are rebuilt, so none of them is counted twice or lost
+            cursor.execute(f"LOCK TABLE {connection.ops.quote_name(Item._meta.db_table)} IN SHARE MODE")
+            actual = totals(Item.objects.all())
+            cursor.execute(f"DELETE FROM {connection.ops.quote_name(InventoryCounter._meta.db_table)}")
+        InventoryCounter.objects.bulk_create(
+            InventoryCounter(**dict(zip(GROUP_FIELDS, group)), items=count, available=amount)
+            for group, (count, amount) in actual.items()
+        )
+    return len(actual)
+
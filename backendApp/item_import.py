@@ -0,0 +1,175 @@
+# backendApp/item_import.py
+#
+# Bulk import of items from CSV or JSON Lines, shared by the admin_paths/import_items endpoint and the
+# import_items command. Rows are parsed one at a time, checked against lookup sets loaded once per
+# import and written with one upsert (keyed on Item.name) per batch, so an import of thousands of
+# items costs a handful of queries instead of one request and INSERT per item.
+
+import csv
+import json
+from collections import defaultdict
+
+from django.db import transaction
+
+from backendApp import inventory
+from backendApp.Attribute.models import Attribute
+from backendApp.Building.models import Building
+from backendApp.Faculty.models import Faculty
+from backendApp.Item.models import Item
+from backendApp.RoomWithItems.models import RoomWithItems
+from backendApp.Type.models import Type
+
+FORMATS = ('csv', 'ndjson')
+FIELDS = ('name', 'amount', 'type', 'attribute', 'building', 'faculty', 'room_number')
+# Columns an existing item with the same name gets overwritten with
+UPDATE_FIELDS = ('amount', 'type', 'attribute', 'building', 'faculty', 'room_number', 'building_ref',
+                 'faculty_ref', 'room_ref')
+DEFAULT_BATCH_SIZE = 1000
+
+
+class InvalidImport(Exception):
+    """
+    The input as a whole cannot be imported (unknown format, missing CSV columns).
+    """
+
+
+def format_for(name, content_type=''):
+    """
+    The format of an upload, from its file name or content type, or None if neither tells.
+    """
+    name = (name or '').lower()
+    if name.endswith('.csv') or content_type.startswith('text/csv'):
+        return 'csv'
+    if name.endswith(('.ndjson', '.jsonl')) or content_type.startswith(('application/x-ndjson',
+                                                                       'application/jsonl')):
+        return 'ndjson'
+    return None
+
+
+def read_rows(lines, format):
+    """
+    Yields (line number, row or None, error or None) for every record of an iterable of text lines.
+    """
+    if format == 'csv':
+        reader = csv.DictReader(lines)
+        missing = set(FIELDS) - {'room_number'} - set(reader.fieldnames or ())
+        if missing:
+            raise InvalidImport(f"Missing CSV columns: {', '.join(sorted(missing))}")
+        for row in reader:
+            yield reader.line_num, row, None
+    elif format == 'ndjson':
+        for line_number, line in enumerate(lines, start=1):
+            if not line.strip():
+                continue
+            try:
+                row = json.loads(line)
+            except json.JSONDecodeError as e:
+                yield line_number, None, f"Invalid JSON: {e.msg}"
+                continue
+            if isinstance(row, dict):
+                yield line_number, row, None
+            else:
+                yield line_number, None, "Expected a JSON object"
+    else:
+        raise InvalidImport(f"Unknown format; expected one of: {', '.join(FORMATS)}")
+
+
+class ItemImporter:
+    """
+    Validates rows against the catalog as it is when the importer is created and upserts them in batches.
+    """
+
+    def __init__(self, batch_size=DEFAULT_BATCH_SIZE):
+        self.batch_size = batch_size
+        self.types = set(Type.objects.values_list('type_name', flat=True))
+        self.attributes = set(Attribute.objects.values_list('attribute_name', flat=True))
+        self.faculties = dict(Faculty.objects.values_list('name', 'faculty_id'))
+        self.buildings = {name: (building_id, faculty)
+                          for building_id, name, faculty in Building.objects.values_list('id', 'name', 'faculty')}
+        self.rooms = {(room_number, building): room_id for room_id, room_number, building
+                      in RoomWithItems.objects.values_list('id', 'room_number', 'building')}
+        self.names = set()
+        self.created = 0
+        self.updated = 0
+        self.errors = []
+
+    def build(self, row):
+        """
+        The Item a row describes, or an error message.
+        """
+        values = {field: str(row.get(field) if row.get(field) is not None else '').strip() for field in FIELDS}
+        name = values['name']
+        if not name:
+            return "name is required"
+        if len(name) > Item._meta.get_field('name').max_length:
+            return "name is too long"
+        if name in self.names:
+            return f"Item '{name}' appears more than once in this import"
+        if not values['amount'].isdigit():
+            return "amount must be a non-negative integer"
+        if values['type'] not in self.types:
+            return f"Unknown type '{values['type']}'"
+        if values['attribute'] not in self.attributes:
+            return f"Unknown attribute '{values['attribute']}'"
+        if values['faculty'] not in self.faculties:
+            return f"Unknown faculty '{values['faculty']}'"
+        building_id, building_faculty = self.buildings.get(values['building'], (None, None))
+        if building_id is None:
+            return f"Unknown building '{values['building']}'"
+        if building_faculty != values['faculty']:
+            return f"Building '{values['building']}' does not belong to faculty '{values['faculty']}'"
+        room_id = None
+        if values['room_number']:
+            if not values['room_number'].isdigit():
+                return "room_number must be an integer"
+            room_id = self.rooms.get((int(values['room_number']), values['building']))
+            if room_id is None:
+                return f"Room {values['room_number']} not found in building '{values['building']}'"
+            values['room_number'] = str(int(values['room_number']))
+
+        self.names.add(name)
+        # bulk_create skips save(), so the foreign keys sync_refs() would derive are set here
+        return Item(name=name, amount=int(values['amount']), type=values['type'], attribute=values['attribute'],
+                    building=values['building'], faculty=values['faculty'],
+                    room_number=values['room_number'] or 'Unknown', building_ref_id=building_id,
+                    faculty_ref_id=self.faculties[values['faculty']], room_ref_id=room_id)
+
+    def run(self, records):
+        """
+        Imports (line number, row, error) records as produced by read_rows() and returns the report.
+        """
+        batch = []
+        for line_number, row, error in records:
+            item = self.build(row) if error is None else error
+            if isinstance(item, str):
+                self.errors.append({"line": line_number, "name": (row or {}).get('name'), "error": item})
+                continue
+            batch.append(item)
+            if len(batch) >= self.batch_size:
+                self.write(batch)
+                batch = []
+        if batch:
+            self.write(batch)
+        return self.report()
+
+    def write(self, batch):
+        # Each batch commits on its own; the upsert makes running a failed import again safe
+        with transaction.atomic():
+            # The replaced items are locked, so their amounts cannot change before they are uncounted
+            existing = list(Item.objects.select_for_update().filter(name__in=[item.name for item in batch])
+                            .values_list('amount', *inventory.GROUP_FIELDS))
+            Item.objects.bulk_create(batch, update_conflicts=True, unique_fields=['name'],
+                                     update_fields=UPDATE_FIELDS)
+            deltas = defaultdict(lambda: (0, 0))
+            for amount, *group in existing:
+                items, available = deltas[tuple(group)]
+                deltas[tuple(group)] = (items - 1, available - amount)
+            for item in batch:
+                items, available = deltas[inventory.group_of(item)]
+                deltas[inventory.group_of(item)] = (items + 1, available + item.amount)
+            inventory.adjust_many(deltas)
+        self.updated += len(existing)
+        self.created += len(batch) - len(existing)
+
+    def report(self):
+        return {"created": self.created, "updated": self.updated, "failed": len(self.errors), "errors": self.errors}
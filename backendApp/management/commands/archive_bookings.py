@@ -0,0 +1,37 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from backendApp import archive
+
+
+class Command(BaseCommand):
+    help = ("Moves returned room and item bookings that ended before a cutoff into the month-partitioned archive "
+            "tables, in short batches; meant to run periodically, e.g. nightly from cron")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--older-than-days", type=int, default=settings.BOOKING_ARCHIVE_AFTER_DAYS,
+                            help="Archive bookings that ended more than this many days ago "
+                                 "(default: settings.BOOKING_ARCHIVE_AFTER_DAYS)")
+        parser.add_argument("--batch-size", type=int, default=1000, help="Rows moved per transaction")
+        parser.add_argument("--sleep", type=float, default=0.0, help="Seconds to pause between batches")
+
+    def handle(self, *args, **options):
+        if options["older_than_days"] < 0 or options["batch_size"] < 1:
+            raise CommandError("--older-than-days must not be negative and --batch-size must be positive")
+
+        for spec in archive.ARCHIVES:
+            missing = spec.missing_columns()
+            if missing:
+                raise CommandError(f"{spec.table} has no column {', '.join(missing)}; add it with a migration "
+                                   f"before archiving {spec.model.__name__} rows")
+
+        cutoff = archive.cutoff_for(options["older_than_days"])
+        self.stdout.write(f"Archiving returned bookings that ended before {cutoff}...")
+        for spec in archive.ARCHIVES:
+            started = time.monotonic()
+            moved = spec.run(cutoff, options["batch_size"], options["sleep"])
+            self.stdout.write(f"{spec.model.__name__}: {moved} rows moved to {spec.table} "
+                              f"in {time.monotonic() - started:.1f}s")
+        self.stdout.write(self.style.SUCCESS("Archiving finished."))
@@ -0,0 +1,61 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from backendApp.relations import backfill_specs
+
+
+class Command(BaseCommand):
+    help = "Fills the *_ref foreign keys from the legacy string columns in small batches"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000, help="Rows updated per statement")
+        parser.add_argument("--sleep", type=float, default=0.0, help="Seconds to pause between batches")
+        parser.add_argument("--check", action="store_true",
+                            help="Only report rows whose foreign key is still empty")
+
+    def handle(self, *args, **options):
+        pending_total = 0
+        for model, field_name, source_filter, subquery in backfill_specs():
+            label = f"{model.__name__}.{field_name}"
+            pending = model.objects.filter(**{f"{field_name}__isnull": True}, **source_filter)
+
+            if options["check"]:
+                count = pending.count()
+                pending_total += count
+                self.stdout.write(f"{label}: {count} rows without a foreign key")
+                continue
+
+            updated = self.backfill(pending, field_name, subquery, options["batch_size"], options["sleep"])
+            self.stdout.write(f"{label}: {updated} rows processed")
+
+        if options["check"]:
+            if pending_total:
+                self.stdout.write(self.style.WARNING(
+                    f"{pending_total} rows still reference missing rows or have not been backfilled yet."))
+            else:
+                self.stdout.write(self.style.SUCCESS("Every foreign key is filled; the cutover can proceed."))
+
+    def backfill(self, pending, field_name, subquery, batch_size, sleep):
+        """
+        Walks the pending rows in primary key order and sets their foreign key one batch per UPDATE.
+
+        Each batch runs in its own short transaction, so row locks are held only for the
+        duration of one statement. Rows whose legacy value matches nothing stay empty and
+        are skipped by the cursor instead of being retried forever.
+        """
+        pk_name = pending.model._meta.pk.name
+        last_pk = None
+        updated = 0
+        while True:
+            batch = pending.order_by(pk_name)
+            if last_pk is not None:
+                batch = batch.filter(**{f"{pk_name}__gt": last_pk})
+            pks = list(batch.values_list(pk_name, flat=True)[:batch_size])
+            if not pks:
+                return updated
+
+            updated += pending.model.objects.filter(**{f"{pk_name}__in": pks}).update(**{field_name: subquery})
+            last_pk = pks[-1]
+            if sleep:
+                time.sleep(sleep)
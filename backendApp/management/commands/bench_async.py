@@ -0,0 +1,85 @@
+import asyncio
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from asgiref.sync import ThreadSensitiveContext, sync_to_async
+from django.core.management.base import BaseCommand
+from django.db import connections
+from django.test import AsyncClient, Client
+from django.test.utils import setup_test_environment, teardown_test_environment
+
+from backendApp.ItemBooking.models import ItemBooking
+
+ENDPOINTS = ("get_available_rooms", "get_available_items", "reserved_items", "reserved_rooms")
+
+
+class Command(BaseCommand):
+    help = ("Measures the throughput of the sync Student read views on a thread pool "
+            "against their async variants under many concurrent clients")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=1000, help="Requests sent to each endpoint")
+        parser.add_argument("--concurrency", type=int, default=100, help="Simultaneous clients for the async views")
+        parser.add_argument("--threads", type=int, default=8,
+                            help="Worker threads serving the sync views, as in one server process")
+        parser.add_argument("--student", help="Student username used in the URLs")
+
+    def handle(self, *args, **options):
+        student = options["student"] or self.sample_student()
+        self.stdout.write(f"{options['requests']} requests per endpoint, student {student}, "
+                          f"{options['threads']} sync threads, {options['concurrency']} async clients")
+
+        # The test clients send requests for the host "testserver"
+        setup_test_environment()
+        try:
+            for endpoint in ENDPOINTS:
+                sync_url = f"/student/{endpoint}/{student}"
+                async_url = f"/student/async/{endpoint}/{student}"
+                sync_result = self.run_sync(sync_url, options["requests"], options["threads"])
+                async_result = asyncio.run(self.run_async(async_url, options["requests"], options["concurrency"]))
+
+                self.stdout.write(self.style.MIGRATE_HEADING(f"\n{endpoint}"))
+                for name, (elapsed, latencies) in (("sync", sync_result), ("async", async_result)):
+                    self.stdout.write(f"{name:>6}: {len(latencies) / elapsed:8.1f} req/s, "
+                                      f"median latency {statistics.median(latencies) * 1000:.1f} ms")
+        finally:
+            teardown_test_environment()
+
+    def sample_student(self):
+        booking = ItemBooking.objects.order_by("-id").first()
+        return booking.student_id if booking else "123456"
+
+    def run_sync(self, url, requests, threads):
+        client = Client()
+
+        def get(_):
+            start = time.perf_counter()
+            response = client.get(url)
+            assert response.status_code == 200, response.content
+            # The test client keeps connections open between requests; close them like a real request end does
+            connections.close_all()
+            return time.perf_counter() - start
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=threads) as pool:
+            latencies = list(pool.map(get, range(requests)))
+        return time.perf_counter() - start, latencies
+
+    async def run_async(self, url, requests, concurrency):
+        client = AsyncClient()
+        slots = asyncio.Semaphore(concurrency)
+
+        async def get():
+            async with slots:
+                # An ASGI server gives each request its own thread for sync work, so do the same here
+                async with ThreadSensitiveContext():
+                    start = time.perf_counter()
+                    response = await client.get(url)
+                    assert response.status_code == 200, response.content
+                    await sync_to_async(connections.close_all)()
+                    return time.perf_counter() - start
+
+        start = time.perf_counter()
+        latencies = await asyncio.gather(*(get() for _ in range(requests)))
+        return time.perf_counter() - start, latencies
@@ -0,0 +1,62 @@
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.core.signals import request_finished, request_started
+from django.db import connection
+
+from backendApp.Booking.models import Booking
+
+
+class Command(BaseCommand):
+    help = ("Measures the per-request cost of opening a database connection by running a request-sized query "
+            "with and without persistent connections")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=500, help="Simulated requests per mode")
+
+    def handle(self, *args, **options):
+        settings_dict = connection.settings_dict
+        configured = (settings_dict["CONN_MAX_AGE"], settings_dict["CONN_HEALTH_CHECKS"])
+        self.stdout.write(f"{connection.vendor} at {settings_dict['HOST']}:{settings_dict['PORT']}, "
+                          f"configured CONN_MAX_AGE={configured[0]}, CONN_HEALTH_CHECKS={configured[1]}")
+
+        modes = (
+            ("reconnect per request (CONN_MAX_AGE=0)", (0, False)),
+            ("persistent, no health checks", (None, False)),
+            ("persistent with health checks", (None, True)),
+            ("configured settings", configured),
+        )
+        results = {}
+        try:
+            for name, (max_age, health_checks) in modes:
+                connection.close()
+                settings_dict["CONN_MAX_AGE"] = max_age
+                settings_dict["CONN_HEALTH_CHECKS"] = health_checks
+                results[name] = self.run(options["requests"])
+        finally:
+            connection.close()
+            settings_dict["CONN_MAX_AGE"], settings_dict["CONN_HEALTH_CHECKS"] = configured
+
+        baseline = statistics.mean(results["persistent, no health checks"])
+        for name, timings in results.items():
+            mean = statistics.mean(timings)
+            self.stdout.write(f"{name:>40}: mean {mean * 1000:7.3f} ms, p95 {self.p95(timings) * 1000:7.3f} ms, "
+                              f"overhead {(mean - baseline) * 1000:+7.3f} ms per request")
+
+    def run(self, requests):
+        """
+        Sends the request signals around a query, so Django opens and closes connections exactly as
+        it does for real requests under the current settings.
+        """
+        timings = []
+        for _ in range(requests):
+            start = time.perf_counter()
+            request_started.send(sender=self.__class__)
+            list(Booking.objects.filter(user="123456", returned=False)[:10])
+            request_finished.send(sender=self.__class__)
+            timings.append(time.perf_counter() - start)
+        return timings
+
+    def p95(self, timings):
+        return sorted(timings)[int(len(timings) * 0.95) - 1]
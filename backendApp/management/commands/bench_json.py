@@ -0,0 +1,56 @@
+import timeit
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand
+from django.http import JsonResponse
+
+from backendApp import responses
+from backendApp.responses import FastJsonResponse
+
+
+class Command(BaseCommand):
+    help = "Compares the serialization time of JsonResponse and FastJsonResponse on a list of booking rows"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=1000, help="Number of booking rows in the payload")
+        parser.add_argument("--repeat", type=int, default=5, help="Number of timing runs, the best one is reported")
+        parser.add_argument("--number", type=int, default=20, help="Responses built per timing run")
+
+    def handle(self, *args, **options):
+        payload = self.payload(options["rows"])
+        encoder = "orjson" if responses.orjson is not None else "json (orjson is not installed)"
+        self.stdout.write(f"{options['rows']} rows, FastJsonResponse encoder: {encoder}")
+
+        results = {}
+        for name, response_class in (("JsonResponse", JsonResponse), ("FastJsonResponse", FastJsonResponse)):
+            timings = timeit.repeat(lambda: response_class(payload), repeat=options["repeat"], number=options["number"])
+            results[name] = min(timings) / options["number"]
+            size = len(response_class(payload).content)
+            self.stdout.write(f"{name:>16}: {results[name] * 1000:8.3f} ms per response, {size} bytes")
+
+        self.stdout.write(self.style.SUCCESS(
+            f"FastJsonResponse is {results['JsonResponse'] / results['FastJsonResponse']:.1f}x faster"
+        ))
+
+    def payload(self, rows):
+        """
+        The shape of get_all_bookings: one dict per Booking with its date fields as date objects.
+        """
+        start = date(2024, 10, 1)
+        return {
+            "bookings": [
+                {
+                    "booking_id": booking_id,
+                    "room_number": str(100 + booking_id % 50),
+                    "user": str(100000 + booking_id),
+                    "building": f"B{booking_id % 10}",
+                    "faculty": f"W{booking_id % 12:02d}N",
+                    "isRoomToRent": booking_id % 2 == 0,
+                    "start_time": start + timedelta(days=booking_id % 30),
+                    "end_time": start + timedelta(days=booking_id % 30 + 7),
+                    "returned": booking_id % 3 == 0,
+                }
+                for booking_id in range(rows)
+            ],
+            "next_cursor": None,
+        }
@@ -0,0 +1,61 @@
+from django.core.management.base import BaseCommand
+
+from backendApp.Booking.models import Booking
+from backendApp.ItemBooking.models import ItemBooking
+from backendApp.RoomToRent.models import RoomToRent
+from backendApp.Student.views import available_items
+
+
+class Command(BaseCommand):
+    help = "Prints the EXPLAIN plan of every hot rental query to confirm which indexes they use"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--analyze", action="store_true", help="Run EXPLAIN ANALYZE (executes the queries)")
+        parser.add_argument("--student", help="Student username used as the query parameter")
+        parser.add_argument("--item-id", help="Item ID used as the query parameter")
+        parser.add_argument("--room-number", help="Room number used as the query parameter")
+        parser.add_argument("--building", help="Building name used as the query parameter")
+        parser.add_argument("--faculty", help="Faculty name used as the query parameter")
+
+    def handle(self, *args, **options):
+        params = self.sample_parameters(options)
+        self.stdout.write("Query parameters: " + ", ".join(f"{key}={value}" for key, value in params.items()))
+
+        for name, queryset in self.hot_queries(**params):
+            self.stdout.write(self.style.MIGRATE_HEADING(f"\n{name}"))
+            self.stdout.write(queryset.explain(analyze=options["analyze"]))
+
+    def sample_parameters(self, options):
+        """
+        Fills the parameters not given on the command line from the latest bookings in the database.
+        """
+        booking = Booking.objects.order_by("-booking_id").first()
+        item_booking = ItemBooking.objects.order_by("-id").first()
+        return {
+            "student": options["student"] or (item_booking.student_id if item_booking else "123456"),
+            "item_id": options["item_id"] or (item_booking.item_id if item_booking else "1"),
+            "room_number": options["room_number"] or (booking.room_number if booking else "101"),
+            "building": options["building"] or (booking.building if booking else "B1"),
+            "faculty": options["faculty"] or (booking.faculty if booking else "W04N"),
+        }
+
+    def hot_queries(self, student, item_id, room_number, building, faculty):
+        """
+        The filters of Student rent/reserve views and Admin return_room/return_item, in the form the views run them.
+        """
+        return [
+            ("get_available_rooms", RoomToRent.objects.filter(available=True)),
+            ("get_available_items", available_items(student)),
+            ("rent_item / return_item: open booking of an item by a student",
+             ItemBooking.objects.filter(item_id=item_id, student_id=student, returned=False)),
+            ("reserved_items: open item bookings of a student",
+             ItemBooking.objects.filter(student_id=student, returned=False)),
+            ("rent_room / return_room: open booking of a room",
+             Booking.objects.filter(room_number=room_number, building=building, faculty=faculty, returned=False)),
+            ("rent_room / reserved_rooms: open bookings of a student",
+             Booking.objects.filter(user=student, returned=False)),
+            ("return_room: room lookup",
+             RoomToRent.objects.filter(room_number=room_number, building=building, faculty=faculty)),
+            ("admin get_reserved_rooms: open room bookings",
+             Booking.objects.filter(isRoomToRent=True, returned=False).order_by("booking_id")),
+        ]
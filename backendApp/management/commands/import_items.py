@@ -0,0 +1,42 @@
+import json
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from backendApp import item_import
+
+
+class Command(BaseCommand):
+    help = ("Creates or updates items in bulk from a CSV or JSON Lines file; rows are matched on the item name "
+            "and invalid rows are reported with their line number")
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="File to import")
+        parser.add_argument("--format", choices=item_import.FORMATS,
+                            help="Format of the file (default: taken from its extension)")
+        parser.add_argument("--batch-size", type=int, default=item_import.DEFAULT_BATCH_SIZE,
+                            help="Rows written per statement")
+        parser.add_argument("--errors", help="File the per-row errors are written to as JSON Lines")
+
+    def handle(self, *args, **options):
+        format = options["format"] or item_import.format_for(options["path"])
+        started = time.monotonic()
+        try:
+            with open(options["path"], encoding="utf-8-sig", newline="") as f:
+                report = item_import.ItemImporter(options["batch_size"]).run(item_import.read_rows(f, format))
+        except OSError as e:
+            raise CommandError(f"Cannot read {options['path']}: {e}")
+        except item_import.InvalidImport as e:
+            raise CommandError(str(e))
+
+        if options["errors"]:
+            with open(options["errors"], "w") as f:
+                for error in report["errors"]:
+                    f.write(json.dumps(error) + "\n")
+        else:
+            for error in report["errors"]:
+                self.stderr.write(f"line {error['line']}: {error['error']}")
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {report['created'] + report['updated']} items ({report['created']} created, "
+            f"{report['updated']} updated), {report['failed']} rows failed, in {time.monotonic() - started:.1f}s"))
@@ -0,0 +1,42 @@
+import json
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from backendApp import student_import
+
+
+class Command(BaseCommand):
+    help = ("Creates student accounts in bulk from a CSV file with username and password columns (and optionally "
+            "email and additional_field), hashing the passwords in a process pool")
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="CSV file to import")
+        parser.add_argument("--workers", type=int, default=student_import.DEFAULT_WORKERS,
+                            help="Processes hashing passwords (default: one per CPU)")
+        parser.add_argument("--batch-size", type=int, default=student_import.DEFAULT_BATCH_SIZE,
+                            help="Students hashed and written per batch")
+        parser.add_argument("--errors", help="File the per-row errors are written to as JSON Lines")
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        importer = student_import.StudentImporter(options["batch_size"], options["workers"])
+        try:
+            with open(options["path"], encoding="utf-8-sig", newline="") as f:
+                report = importer.run(student_import.read_rows(f))
+        except OSError as e:
+            raise CommandError(f"Cannot read {options['path']}: {e}")
+        except student_import.InvalidImport as e:
+            raise CommandError(str(e))
+
+        if options["errors"]:
+            with open(options["errors"], "w") as f:
+                for error in report["errors"]:
+                    f.write(json.dumps(error) + "\n")
+        else:
+            for error in report["errors"]:
+                self.stderr.write(f"line {error['line']}: {error['error']}")
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Created {report['created']} students, {report['failed']} rows failed, "
+            f"in {time.monotonic() - started:.1f}s with {options['workers']} hashing processes"))
@@ -0,0 +1,315 @@
+import json
+import random
+import subprocess
+import threading
+import time
+from collections import Counter, defaultdict
+from datetime import date, timedelta
+
+import requests
+from django.core.management.base import BaseCommand, CommandError
+
+from backendApp.Building.models import Building
+from backendApp.Faculty.models import Faculty
+from backendApp.Item.models import Item
+from backendApp.Student.models import Student
+
+SCENARIOS = ("student_browse", "student_browse_async", "student_rent_item", "student_rent_room",
+             "student_reserve_room", "admin_listing", "admin_reports", "admin_bulk_return", "admin_import_items")
+# Rows of each admin_paths/import_items request of the admin_import_items scenario
+IMPORT_ROWS = 20
+
+
+def percentile(sorted_values, fraction):
+    """
+    Nearest-rank percentile of an already sorted list.
+    """
+    index = max(0, min(len(sorted_values) - 1, round(fraction * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+class Recorder:
+    """
+    Latencies and status codes per endpoint label, shared by all client threads.
+    """
+
+    def __init__(self):
+        self.latencies = defaultdict(list)
+        self.statuses = defaultdict(Counter)
+        self.recording = False
+        self._lock = threading.Lock()
+
+    def record(self, label, seconds, status):
+        if not self.recording:
+            return
+        with self._lock:
+            self.latencies[label].append(seconds)
+            self.statuses[label][status] += 1
+
+    def summary(self, elapsed):
+        endpoints = {}
+        for label in sorted(self.latencies):
+            latencies = sorted(self.latencies[label])
+            statuses = self.statuses[label]
+            endpoints[label] = {
+                "requests": len(latencies),
+                # Client errors such as "out of stock" are expected under contention; only count failures
+                "errors": sum(count for status, count in statuses.items() if status == "error" or status >= 500),
+                "statuses": {str(status): count for status, count in sorted(statuses.items(), key=str)},
+                "throughput": len(latencies) / elapsed,
+                "mean_ms": sum(latencies) / len(latencies) * 1000,
+                "p50_ms": percentile(latencies, 0.50) * 1000,
+                "p95_ms": percentile(latencies, 0.95) * 1000,
+                "p99_ms": percentile(latencies, 0.99) * 1000,
+            }
+        return endpoints
+
+
+class Client:
+    """
+    One simulated user: a keep-alive HTTP session that records every request under a label.
+    """
+
+    def __init__(self, base_url, recorder, timeout):
+        self.base_url = base_url.rstrip("/")
+        self.recorder = recorder
+        self.timeout = timeout
+        self.session = requests.Session()
+
+    def request(self, label, method, path, body=None, data=None, headers=None):
+        start = time.perf_counter()
+        try:
+            response = self.session.request(method, self.base_url + path, json=body, data=data, headers=headers,
+                                            timeout=self.timeout)
+        except requests.RequestException:
+            self.recorder.record(label, time.perf_counter() - start, "error")
+            return None
+        self.recorder.record(label, time.perf_counter() - start, response.status_code)
+        if response.status_code >= 400:
+            return None
+        return response.json()
+
+    def get(self, label, path):
+        return self.request(label, "GET", path)
+
+    def post(self, label, path, body):
+        return self.request(label, "POST", path, body)
+
+    def post_text(self, label, path, text, content_type):
+        return self.request(label, "POST", path, data=text.encode(), headers={"Content-Type": content_type})
+
+
+class Command(BaseCommand):
+    help = ("Drives concurrent clients through student and admin scenarios against a running server and "
+            "reports throughput and p50/p95/p99 latency per endpoint")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--url", default="http://localhost:8000", help="Base URL of the running server")
+        parser.add_argument("--clients", type=int, default=20, help="Concurrent simulated users")
+        parser.add_argument("--duration", type=float, default=30, help="Seconds of measured load")
+        parser.add_argument("--warmup", type=float, default=5, help="Seconds of unmeasured load before measuring")
+        parser.add_argument("--scenarios", default=",".join(SCENARIOS),
+                            help=f"Comma-separated scenarios to mix (default: all of {', '.join(SCENARIOS)})")
+        parser.add_argument("--seed", type=int, default=0, help="Random seed of the clients' choices")
+        parser.add_argument("--timeout", type=float, default=30, help="Per-request timeout in seconds")
+        parser.add_argument("--output", default="loadtest_results.json", help="File the JSON results are written to")
+
+    def handle(self, *args, **options):
+        scenarios = [name.strip() for name in options["scenarios"].split(",") if name.strip()]
+        unknown = set(scenarios) - set(SCENARIOS)
+        if unknown:
+            raise CommandError(f"Unknown scenarios: {', '.join(sorted(unknown))}")
+
+        self.load_fixtures()
+        recorder = Recorder()
+        stop = threading.Event()
+        threads = [
+            threading.Thread(target=self.run_client, args=(n, options, scenarios, recorder, stop), daemon=True)
+            for n in range(options["clients"])
+        ]
+        self.stdout.write(f"{options['clients']} clients against {options['url']}: {', '.join(scenarios)}")
+        for thread in threads:
+            thread.start()
+
+        time.sleep(options["warmup"])
+        recorder.recording = True
+        self.started_at = time.strftime("%Y-%m-%dT%H:%M:%S%z")
+        started = time.perf_counter()
+        time.sleep(options["duration"])
+        recorder.recording = False
+        elapsed = time.perf_counter() - started
+        stop.set()
+        for thread in threads:
+            thread.join()
+
+        endpoints = recorder.summary(elapsed)
+        if not endpoints:
+            raise CommandError("No request completed; is the server running?")
+        self.report(endpoints)
+        self.write_results(options, scenarios, elapsed, endpoints)
+
+    def load_fixtures(self):
+        """
+        Students, items, faculties and buildings the scenarios pick from, read from the seeded database.
+        """
+        self.students = list(Student.objects.order_by("id").values_list("username", flat=True))
+        self.item_ids = list(Item.objects.order_by("item_id").values_list("item_id", flat=True))
+        self.faculties = list(Faculty.objects.values_list("name", flat=True))
+        self.buildings = list(Building.objects.values_list("name", flat=True))
+        if not (self.students and self.item_ids and self.faculties and self.buildings):
+            raise CommandError("The database has no students, items or buildings; run resetdb or seed first.")
+        # The imported items are copies of an existing one, under names of their own
+        self.import_template = Item.objects.order_by("item_id").values(
+            "type", "attribute", "building", "faculty", "room_number").first()
+
+    def run_client(self, n, options, scenarios, recorder, stop):
+        client = Client(options["url"], recorder, options["timeout"])
+        rng = random.Random(options["seed"] * 100003 + n)
+        # Each client acts for its own students, so rentals of different clients never collide
+        students = self.students[n::options["clients"]] or self.students
+        while not stop.is_set():
+            scenario = getattr(self, rng.choice(scenarios))
+            scenario(client, rng, rng.choice(students))
+
+    def student_browse(self, client, rng, student):
+        client.get("GET student/get_available_rooms", f"/student/get_available_rooms/{student}")
+        client.get("GET student/get_available_items", f"/student/get_available_items/{student}")
+        client.get("GET student/reserved_items", f"/student/reserved_items/{student}")
+        client.get("GET student/reserved_rooms", f"/student/reserved_rooms/{student}")
+        client.get("GET student/room_reservations", f"/student/room_reservations/{student}")
+
+    def student_browse_async(self, client, rng, student):
+        client.get("GET student/async/get_available_rooms", f"/student/async/get_available_rooms/{student}")
+        client.get("GET student/async/get_available_items", f"/student/async/get_available_items/{student}")
+        client.get("GET student/async/reserved_items", f"/student/async/reserved_items/{student}")
+        client.get("GET student/async/reserved_rooms", f"/student/async/reserved_rooms/{student}")
+
+    def rent_item(self, client, rng, student):
+        """
+        Rents a random item for the student and returns its id, or None if the rental was refused.
+        """
+        item_id = rng.choice(self.item_ids)
+        today = date.today().isoformat()
+        rented = client.post("POST student/rent_item", "/student/rent_item", {
+            "student_id": student, "item_id": item_id, "start_date": today, "end_date": today,
+        })
+        return item_id if rented is not None else None
+
+    def rent_room(self, client, rng, student):
+        """
+        Rents a random available room for the student and returns its key fields, or None.
+        """
+        rooms = client.get("GET student/get_available_rooms", f"/student/get_available_rooms/{student}")
+        if not rooms or not rooms["rooms"]:
+            return None
+        room = rng.choice(rooms["rooms"])
+        # A returned room stays held until the end of today, so rent a day ahead to leave it rentable again
+        day = (date.today() + timedelta(days=rng.randint(1, 365))).isoformat()
+        body = {"room_number": room["room_number"], "building": room["building"], "faculty": room["faculty"]}
+        rented = client.post("POST student/rent_room", "/student/rent_room",
+                             {**body, "student_id": student, "start_date": day, "end_date": day})
+        return body if rented is not None else None
+
+    def student_rent_item(self, client, rng, student):
+        item_id = self.rent_item(client, rng, student)
+        if item_id is not None:
+            client.post("POST admin_paths/return_item", "/admin_paths/return_item", {
+                "id": item_id, "item_id": item_id, "reserved_by": student,
+            })
+
+    def student_rent_room(self, client, rng, student):
+        room = self.rent_room(client, rng, student)
+        if room is not None:
+            client.post("POST admin_paths/return_room", "/admin_paths/return_room", {**room, "reserved_by": student})
+
+    def student_reserve_room(self, client, rng, student):
+        rooms = client.get("GET student/get_available_rooms", f"/student/get_available_rooms/{student}")
+        if not rooms or not rooms["rooms"]:
+            return
+        room = rng.choice(rooms["rooms"])
+        # Far enough ahead not to block the rentals of student_rent_room; a 409 for days already taken is expected
+        start = date.today() + timedelta(days=rng.randint(400, 4000))
+        client.post("POST student/reserve_room", "/student/reserve_room", {
+            "student_id": student, "room_number": room["room_number"], "building": room["building"],
+            "faculty": room["faculty"], "start_date": start.isoformat(),
+            "end_date": (start + timedelta(days=rng.randint(0, 3))).isoformat(),
+        })
+        client.get("GET student/room_reservations", f"/student/room_reservations/{student}")
+
+    def admin_listing(self, client, rng, student):
+        client.get("GET admin_paths/get_all_items", "/admin_paths/get_all_items")
+        client.get("GET admin_paths/get_reserved_rooms", "/admin_paths/get_reserved_rooms")
+        client.get("GET admin_paths/get_reserved_items", "/admin_paths/get_reserved_items")
+        client.get("GET admin_paths/bookings", "/admin_paths/bookings")
+        client.get("GET admin_paths/returned_item_bookings", "/admin_paths/returned_item_bookings")
+        client.get("GET admin_paths/get_all_students", "/admin_paths/get_all_students")
+        client.get("GET admin_paths/get_all_faculty", "/admin_paths/get_all_faculty")
+        client.get("GET admin_paths/get_buildings_by_faculty",
+                   f"/admin_paths/get_buildings_by_faculty/{rng.choice(self.faculties)}")
+        client.get("GET admin_paths/get_rooms_by_building",
+                   f"/admin_paths/get_rooms_by_building/{rng.choice(self.buildings)}")
+        client.get("GET admin_paths/types", "/admin_paths/types")
+        client.get("GET admin_paths/attributes", "/admin_paths/attributes")
+
+    def admin_reports(self, client, rng, student):
+        client.get("GET admin_paths/inventory", "/admin_paths/inventory")
+        client.get("GET admin_paths/inventory (grouped)",
+                   "/admin_paths/inventory?group_by=faculty,building")
+        client.get("GET admin_paths/utilization", "/admin_paths/utilization")
+        client.get("GET admin_paths/get_all_admins", f"/admin_paths/get_all_admins/{student}")
+        client.get("GET admin_paths/cache_stats", "/admin_paths/cache_stats")
+
+    def admin_bulk_return(self, client, rng, student):
+        item_id = self.rent_item(client, rng, student)
+        if item_id is not None:
+            client.post("POST admin_paths/return_items", "/admin_paths/return_items", {
+                "returns": [{"item_id": item_id, "reserved_by": student}],
+            })
+        room = self.rent_room(client, rng, student)
+        if room is not None:
+            client.post("POST admin_paths/return_rooms", "/admin_paths/return_rooms", {
+                "returns": [{**room, "reserved_by": student}],
+            })
+
+    def admin_import_items(self, client, rng, student):
+        # Items are matched on their name, so repeated imports update the same rows instead of adding more;
+        # the names include the student, so the imports of different clients never update the same rows
+        template = self.import_template
+        room_number = template["room_number"] if template["room_number"].isdigit() else ""
+        rows = "".join(
+            f"Loadtest {student} {n},{rng.randint(0, 20)},{template['type']},{template['attribute']},"
+            f"{template['building']},{template['faculty']},{room_number}\n"
+            for n in range(IMPORT_ROWS)
+        )
+        client.post_text("POST admin_paths/import_items", "/admin_paths/import_items",
+                         "name,amount,type,attribute,building,faculty,room_number\n" + rows, "text/csv")
+
+    def report(self, endpoints):
+        self.stdout.write(f"\n{'endpoint':<45} {'requests':>8} {'errors':>6} {'req/s':>8} "
+                          f"{'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+        for label, result in endpoints.items():
+            self.stdout.write(f"{label:<45} {result['requests']:>8} {result['errors']:>6} "
+                              f"{result['throughput']:>8.1f} {result['p50_ms']:>8.1f} {result['p95_ms']:>8.1f} "
+                              f"{result['p99_ms']:>8.1f}")
+
+    def write_results(self, options, scenarios, elapsed, endpoints):
+        try:
+            commit = subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True,
+                                    check=True).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            commit = None
+        results = {
+            "commit": commit,
+            "started_at": self.started_at,
+            "url": options["url"],
+            "clients": options["clients"],
+            "duration": elapsed,
+            "scenarios": scenarios,
+            "seed": options["seed"],
+            "total_requests": sum(result["requests"] for result in endpoints.values()),
+            "total_errors": sum(result["errors"] for result in endpoints.values()),
+            "endpoints": endpoints,
+        }
+        with open(options["output"], "w") as f:
+            json.dump(results, f, indent=2)
+        self.stdout.write(self.style.SUCCESS(f"\nResults written to {options['output']}"))
@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+
+from backendApp import inventory
+
+
+class Command(BaseCommand):
+    help = "Rebuilds the inventory counters from the items, reporting the groups whose counter had drifted"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--check", action="store_true", help="Only report drifted counters, change nothing")
+
+    def handle(self, *args, **options):
+        drifted = inventory.drift()
+        for group, ((items, available), (actual_items, actual_available)) in sorted(drifted.items()):
+            self.stdout.write(f"{' / '.join(group)}: counted {items} items, {available} available; "
+                              f"actually {actual_items} items, {actual_available} available")
+
+        if options["check"]:
+            if drifted:
+                self.stdout.write(self.style.WARNING(f"{len(drifted)} counters have drifted."))
+            else:
+                self.stdout.write(self.style.SUCCESS("Every counter matches the items."))
+            return
+
+        groups = inventory.rebuild()
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {groups} counters ({len(drifted)} had drifted)."))
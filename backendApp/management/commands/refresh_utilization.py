@@ -0,0 +1,20 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from backendApp.models import UtilizationSummary
+
+
+class Command(BaseCommand):
+    help = ("Recomputes the utilization_summary materialized view behind admin_paths/utilization; "
+            "meant to run periodically, e.g. from cron")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--blocking", action="store_true",
+                            help="Refresh without CONCURRENTLY: faster, but reports wait until it finishes")
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        UtilizationSummary.refresh(concurrently=not options["blocking"])
+        self.stdout.write(self.style.SUCCESS(
+            f"Refreshed {UtilizationSummary.objects.count()} utilization rows in {time.monotonic() - started:.2f}s"))
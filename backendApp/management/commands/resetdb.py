@@ -1,33 +1,90 @@
 from django.core.management.base import BaseCommand
-from django.db import connection
+from django.core.management import call_command
+from django.core.management.color import no_style
+from django.db import connection, transaction
+from django.db.migrations.executor import MigrationExecutor
+import hashlib
+import json
 import os
 import shutil
+import tempfile
+from django.apps import apps
 from django.conf import settings
 from django.contrib.auth.hashers import make_password
 from django.utils.timezone import now
 from datetime import timedelta
 import random
 
-class Command(BaseCommand):
-    help = "Fully resets the database and populates initial data"
-
-    def handle(self, *args, **kwargs):
-        self.stdout.write("Starting database reset process...")
+from backendApp import archive
+from backendApp import cache as catalog_cache
+from backendApp import inventory
+from backendApp.models import TableVersion, UtilizationSummary
 
-        # Step 1: Drop the database schema
-        self.reset_database()
+MANIFEST = "manifest.json"
 
-        # Step 2: Delete all migration files
-        self.delete_migration_files()
 
-        # Step 3: Reapply migrations
-        self.apply_migrations()
+class Command(BaseCommand):
+    help = ("Resets the database to the initial data, restoring it from a COPY snapshot when the migrations "
+            "have not changed since the snapshot was taken and rebuilding it from scratch otherwise")
 
-        # Step 4: Populate initial data
-        self.create_initial_data()
+    def add_arguments(self, parser):
+        parser.add_argument("--full", action="store_true",
+                            help="Rebuild the schema and data from scratch even if a valid snapshot exists")
+        parser.add_argument("--snapshot-dir", default=settings.DB_SNAPSHOT_DIR,
+                            help="Directory of the snapshot (default: settings.DB_SNAPSHOT_DIR)")
 
+    def handle(self, *args, **options):
+        self.stdout.write("Starting database reset process...")
+        snapshot_dir = options["snapshot_dir"]
+        fingerprint = self.fingerprint()
+
+        if not options["full"] and self.snapshot_fingerprint(snapshot_dir) == fingerprint:
+            # The schema only needs rebuilding when the database is not already at the latest migrations
+            if not self.schema_is_current():
+                self.reset_database()
+                self.apply_migrations()
+            self.restore_snapshot(snapshot_dir)
+        else:
+            self.stdout.write("No snapshot for the current migrations, rebuilding from scratch...")
+            self.reset_database()
+            self.apply_migrations()
+            self.create_initial_data()
+            self.write_snapshot(snapshot_dir, fingerprint)
+
+        # The snapshot holds tables only; the utilization view is recomputed from the restored rows
+        UtilizationSummary.refresh(concurrently=False)
+        # Cached catalog payloads describe the data that was just replaced
+        catalog_cache.clear()
         self.stdout.write("Database reset and initial data population completed successfully.")
 
+    def fingerprint(self):
+        """
+        Hash of every migration file and of this command, which together define the schema and the initial data.
+        """
+        digest = hashlib.sha256()
+        paths = [__file__]
+        for app_config in apps.get_app_configs():
+            migration_path = os.path.join(app_config.path, "migrations")
+            if os.path.isdir(migration_path):
+                paths += sorted(os.path.join(migration_path, name) for name in os.listdir(migration_path)
+                                if name.endswith(".py"))
+        for path in paths:
+            digest.update(os.path.relpath(path, settings.BASE_DIR).encode())
+            with open(path, "rb") as f:
+                digest.update(f.read())
+        return digest.hexdigest()
+
+    def snapshot_fingerprint(self, snapshot_dir):
+        try:
+            with open(os.path.join(snapshot_dir, MANIFEST)) as f:
+                return json.load(f)["fingerprint"]
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def schema_is_current(self):
+        executor = MigrationExecutor(connection)
+        return not executor.migration_plan(executor.loader.graph.leaf_nodes())
+
     def reset_database(self):
         """
         Drops and recreates the database schema.
@@ -37,32 +94,65 @@ class Command(BaseCommand):
             cursor.execute("DROP SCHEMA public CASCADE; CREATE SCHEMA public;")
         self.stdout.write("Database schema reset successfully.")
 
-    def delete_migration_files(self):
-        """
-        Deletes all migration files from the project.
-        """
-        self.stdout.write("Deleting migration files...")
-        for app_name in settings.INSTALLED_APPS:
-            app_path = app_name.split(".")[0]
-            migration_path = os.path.join(settings.BASE_DIR, app_path, "migrations")
-            if os.path.exists(migration_path):
-                for file_name in os.listdir(migration_path):
-                    if file_name != "__init__.py" and file_name.endswith(".py"):
-                        file_path = os.path.join(migration_path, file_name)
-                        os.remove(file_path)
-                        self.stdout.write(f"Deleted: {file_path}")
-        self.stdout.write("Migration files deleted.")
-
     def apply_migrations(self):
         """
-        Reapplies all migrations.
+        Applies the committed migrations.
         """
         self.stdout.write("Applying migrations...")
-        from django.core.management import call_command
-        call_command("makemigrations")
         call_command("migrate", "--noinput")
         self.stdout.write("Migrations applied successfully.")
 
+    def snapshot_tables(self):
+        """
+        Every table of the project's models; the change counters are left out, the triggers
+        bump them when the data is copied back in.
+        """
+        tables = connection.introspection.django_table_names(only_existing=True, include_views=False)
+        return sorted(set(tables) - {TableVersion._meta.db_table})
+
+    def write_snapshot(self, snapshot_dir, fingerprint):
+        """
+        Dumps every table in COPY format and records the fingerprint it belongs to.
+        """
+        self.stdout.write(f"Writing snapshot to {snapshot_dir}...")
+        parent = os.path.dirname(os.path.abspath(snapshot_dir))
+        os.makedirs(parent, exist_ok=True)
+        # Written next to the old snapshot and swapped in at the end, so an interrupted dump is never used
+        staging_dir = tempfile.mkdtemp(dir=parent)
+        tables = self.snapshot_tables()
+        with connection.cursor() as cursor:
+            for table in tables:
+                with open(os.path.join(staging_dir, f"{table}.copy"), "wb") as f:
+                    cursor.copy_expert(f"COPY {connection.ops.quote_name(table)} TO STDOUT", f)
+        with open(os.path.join(staging_dir, MANIFEST), "w") as f:
+            json.dump({"fingerprint": fingerprint, "tables": tables}, f)
+
+        shutil.rmtree(snapshot_dir, ignore_errors=True)
+        os.rename(staging_dir, snapshot_dir)
+        self.stdout.write("Snapshot written.")
+
+    def restore_snapshot(self, snapshot_dir):
+        """
+        Replaces the contents of every table with the snapshot in a single transaction.
+        """
+        self.stdout.write(f"Restoring snapshot from {snapshot_dir}...")
+        with open(os.path.join(snapshot_dir, MANIFEST)) as f:
+            tables = json.load(f)["tables"]
+        quoted = [connection.ops.quote_name(table) for table in tables]
+
+        with transaction.atomic(), connection.cursor() as cursor:
+            # The booking archives are not in the snapshot (they are empty after a rebuild), but share their ids
+            # with the booking tables, whose sequences restart below
+            cursor.execute(f"TRUNCATE {', '.join(quoted + list(archive.ARCHIVE_TABLES))} CASCADE")
+            for table, quoted_table in zip(tables, quoted):
+                with open(os.path.join(snapshot_dir, f"{table}.copy"), "rb") as f:
+                    cursor.copy_expert(f"COPY {quoted_table} FROM STDIN", f)
+            # Ids continue after the restored rows
+            models = [model for model in apps.get_models(include_auto_created=True) if model._meta.managed]
+            for sql in connection.ops.sequence_reset_sql(no_style(), models):
+                cursor.execute(sql)
+        self.stdout.write("Snapshot restored.")
+
     def create_initial_data(self):
         """
         Populates initial data into the database.
@@ -449,4 +539,6 @@ class Command(BaseCommand):
                     )
 
 
+        # The items above were written directly, not through the views that keep the counters
+        inventory.rebuild()
         self.stdout.write("Initial data population complete.")
@@ -0,0 +1,235 @@
+import random
+import time
+from datetime import timedelta
+from itertools import islice
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.utils import timezone
+
+from backendApp import archive
+from backendApp import cache as catalog_cache
+from backendApp import inventory
+from backendApp.Admin.models import Admin
+from backendApp.Attribute.models import Attribute
+from backendApp.Booking.models import Booking
+from backendApp.Building.models import Building
+from backendApp.Faculty.models import Faculty
+from backendApp.Item.models import Item
+from backendApp.ItemBooking.models import ItemBooking
+from backendApp.models import UtilizationSummary
+from backendApp.RoomToRent.models import RoomReservation, RoomToRent
+from backendApp.RoomWithItems.models import RoomWithItems
+from backendApp.Student.models import Student
+from backendApp.Type.models import Type
+
+TYPES = ["Laptop", "Charger", "Mouse", "Keyboard", "Monitor", "Headphones", "Tablet", "Webcam", "Power Bank",
+         "Hard Drive"]
+ATTRIBUTES = ["Portable", "Charging", "Wireless", "Ergonomic", "Adjustable", "Noise Cancelling", "Touchscreen",
+              "Compact", "Waterproof", "High-Speed"]
+
+# Rows generated per unit of --scale
+PER_SCALE = {
+    "faculties": 4,
+    "buildings": 20,
+    "rooms_to_rent": 400,
+    "rooms_with_items": 400,
+    "items": 5000,
+    "students": 10000,
+    "bookings": 40000,
+    "item_bookings": 100000,
+}
+# Share of rooms that are rented right now and of students holding an item right now
+OPEN_ROOM_SHARE = 0.2
+OPEN_ITEM_SHARE = 0.05
+# Seeded usernames start here, above the six-digit ones created by resetdb
+FIRST_USERNAME = 1000000
+
+# Tables emptied by --flush, in one TRUNCATE together with the booking archives
+SEEDED_MODELS = (Faculty, Building, RoomToRent, RoomReservation, RoomWithItems, Item, Booking, ItemBooking,
+                 Student, Type, Attribute)
+
+
+def batched(iterable, size):
+    iterator = iter(iterable)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+class Command(BaseCommand):
+    help = ("Generates a production-sized synthetic data set (faculties, buildings, rooms, items, students "
+            "and months of booking history), deterministic for a given --seed")
+
+    def add_arguments(self, parser):
+        parser.add_argument("--scale", type=float, default=1.0,
+                            help=f"Size multiplier; 1 generates about {sum(PER_SCALE.values())} rows")
+        parser.add_argument("--seed", type=int, default=0, help="Random seed; the same seed generates the same data")
+        parser.add_argument("--months", type=int, default=6, help="Months of returned booking history")
+        parser.add_argument("--batch-size", type=int, default=5000, help="Rows inserted per statement")
+        parser.add_argument("--flush", action="store_true",
+                            help="Empty the generated tables first (also removes the resetdb data)")
+
+    def handle(self, *args, **options):
+        self.random = random.Random(options["seed"])
+        self.batch_size = options["batch_size"]
+        self.today = timezone.localdate()
+        self.history_days = options["months"] * 30
+        counts = {name: max(1, round(per_scale * options["scale"])) for name, per_scale in PER_SCALE.items()}
+        counts["buildings"] = max(counts["buildings"], counts["faculties"])
+
+        if options["flush"]:
+            self.flush()
+        elif Faculty.objects.filter(name="SW0").exists():
+            raise CommandError("The database already contains seeded data; run again with --flush.")
+
+        started = time.monotonic()
+        self.seed_catalog()
+        faculties = self.seed_faculties(counts["faculties"])
+        buildings = self.seed_buildings(counts["buildings"], faculties)
+        rooms_to_rent = self.seed_rooms_to_rent(counts["rooms_to_rent"], buildings)
+        rooms_with_items = self.seed_rooms_with_items(counts["rooms_with_items"], buildings)
+        items = self.seed_items(counts["items"], rooms_with_items)
+        students = self.seed_students(counts["students"])
+        self.seed_bookings(counts["bookings"], rooms_to_rent, students)
+        self.seed_item_bookings(counts["item_bookings"], items, students)
+
+        inventory.rebuild()
+        UtilizationSummary.refresh()
+        catalog_cache.invalidate_all()
+        self.stdout.write(self.style.SUCCESS(f"Seeding finished in {time.monotonic() - started:.1f}s"))
+
+    def flush(self):
+        tables = ", ".join([connection.ops.quote_name(model._meta.db_table) for model in SEEDED_MODELS]
+                           + list(archive.ARCHIVE_TABLES))
+        with connection.cursor() as cursor:
+            cursor.execute(f"TRUNCATE {tables} RESTART IDENTITY CASCADE")
+        self.stdout.write("Emptied the seeded tables.")
+
+    def insert(self, model, rows):
+        """
+        Inserts the generated objects in batches and returns them with their primary keys set.
+        """
+        created = []
+        for batch in batched(rows, self.batch_size):
+            created += model.objects.bulk_create(batch)
+        self.stdout.write(f"{model.__name__}: {len(created)} rows")
+        return created
+
+    def seed_catalog(self):
+        Type.objects.bulk_create([Type(type_name=name) for name in TYPES], ignore_conflicts=True)
+        Attribute.objects.bulk_create([Attribute(attribute_name=name) for name in ATTRIBUTES], ignore_conflicts=True)
+
+    def seed_faculties(self, count):
+        admin_ids = [str(admin_id) for admin_id in Admin.objects.order_by("id").values_list("id", flat=True)]
+        return self.insert(Faculty, (
+            Faculty(name=f"SW{n}", admin_id=admin_ids[n % len(admin_ids)] if admin_ids else "Unknown")
+            for n in range(count)
+        ))
+
+    def seed_buildings(self, count, faculties):
+        return self.insert(Building, (
+            Building(name=f"SB{n}", faculty=faculties[n % len(faculties)].name) for n in range(count)
+        ))
+
+    def seed_rooms_to_rent(self, count, buildings):
+        rooms = []
+        for n in range(count):
+            building = buildings[n % len(buildings)]
+            rooms.append(RoomToRent(room_number=100 + n // len(buildings), building=building.name,
+                                    faculty=building.faculty, building_ref_id=building.id,
+                                    available=self.random.random() >= OPEN_ROOM_SHARE))
+        return self.insert(RoomToRent, rooms)
+
+    def seed_rooms_with_items(self, count, buildings):
+        return self.insert(RoomWithItems, (
+            RoomWithItems(room_number=500 + n // len(buildings), building=buildings[n % len(buildings)].name,
+                          faculty=buildings[n % len(buildings)].faculty)
+            for n in range(count)
+        ))
+
+    def seed_items(self, count, rooms):
+        buildings = {building.name: building.id for building in Building.objects.filter(name__startswith="SB")}
+        faculties = {faculty.name: faculty.faculty_id for faculty in Faculty.objects.filter(name__startswith="SW")}
+        items = []
+        for n in range(count):
+            room = self.random.choice(rooms)
+            type_index = self.random.randrange(len(TYPES))
+            items.append(Item(
+                name=f"{TYPES[type_index]} S{n}", amount=self.random.randint(0, 20),
+                type=TYPES[type_index], attribute=ATTRIBUTES[type_index],
+                room_number=str(room.room_number), building=room.building, faculty=room.faculty,
+                room_ref_id=room.id, building_ref_id=buildings[room.building], faculty_ref_id=faculties[room.faculty],
+            ))
+        return self.insert(Item, items)
+
+    def seed_students(self, count):
+        # Hashing is deliberately slow, so every seeded student shares one hash of the same password
+        password = make_password("student123")
+        return self.insert(Student, (
+            Student(username=str(FIRST_USERNAME + n), password=password,
+                    email=f"{FIRST_USERNAME + n}@student.example.com", additional_field="Seeded")
+            for n in range(count)
+        ))
+
+    def history_dates(self, max_days):
+        """
+        A returned rental of up to `max_days` days that ended before today.
+        """
+        start = self.today - timedelta(days=self.random.randint(max_days + 1, self.history_days + max_days + 1))
+        return start, start + timedelta(days=self.random.randint(0, max_days))
+
+    def seed_bookings(self, count, rooms, students):
+        faculties = {faculty.name: faculty.faculty_id for faculty in Faculty.objects.filter(name__startswith="SW")}
+
+        def booking(room, student, start, end, returned):
+            return Booking(room_number=str(room.room_number), user=student.username, start_time=start, end_time=end,
+                           building=room.building, faculty=room.faculty, returned=returned,
+                           user_ref_id=student.id, building_ref_id=room.building_ref_id,
+                           faculty_ref_id=faculties[room.faculty], room_ref_id=room.id)
+
+        def history():
+            for _ in range(count):
+                start, end = self.history_dates(14)
+                yield booking(self.random.choice(rooms), self.random.choice(students), start, end, True)
+
+        self.insert(Booking, history())
+
+        # Every room marked unavailable is rented right now, with the reservation rent_room would have made, by
+        # a student holding no other room, as rent_room allows; rooms left over once every student holds one
+        # are made available again
+        rented = [room for room in rooms if not room.available]
+        holders = self.random.sample(students, min(len(students), len(rented)))
+        unheld = rented[len(holders):]
+        if unheld:
+            RoomToRent.objects.filter(id__in=[room.id for room in unheld]).update(available=True)
+        open_bookings = []
+        for room, student in zip(rented, holders):
+            start = self.today - timedelta(days=self.random.randint(0, 3))
+            end = self.today + timedelta(days=self.random.randint(0, 7))
+            open_bookings.append(booking(room, student, start, end, False))
+        open_bookings = self.insert(Booking, open_bookings)
+        self.insert(RoomReservation, (
+            RoomReservation(room_id=booking.room_ref_id, user=booking.user, start_date=booking.start_time,
+                            end_date=booking.end_time, booking_id=booking.booking_id)
+            for booking in open_bookings
+        ))
+
+    def seed_item_bookings(self, count, items, students):
+        def item_booking(item, student, start, end, returned):
+            return ItemBooking(item_id=str(item.item_id), name=item.name, student_id=student.username,
+                               start_date=start.isoformat(), end_date=end.isoformat(), returned=returned,
+                               item_ref_id=item.item_id, student_ref_id=student.id)
+
+        def history():
+            for _ in range(count):
+                start, end = self.history_dates(7)
+                yield item_booking(self.random.choice(items), self.random.choice(students), start, end, True)
+
+            # One item currently held by each of a share of the students
+            for student in students:
+                if self.random.random() < OPEN_ITEM_SHARE:
+                    start = self.today - timedelta(days=self.random.randint(0, 5))
+                    yield item_booking(self.random.choice(items), student, start, start + timedelta(days=5), False)
+
+        self.insert(ItemBooking, history())
@@ -0,0 +1,184 @@
+# backendApp/metrics.py
+#
+# Per-route request metrics in the Prometheus text format. Every worker process aggregates its own
+# requests in memory; a background thread writes them, every FLUSH_INTERVAL while there is anything
+# new, to a file of the process in METRICS_DIR, and gunicorn's worker_exit hook writes them a last
+# time. /metrics adds up the files of all workers, so any worker can answer it.
+
+import json
+import os
+import tempfile
+import threading
+import time
+from collections import defaultdict
+
+from django.conf import settings
+from django.http import HttpResponse
+
+# Prometheus' default latency buckets, in seconds
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+FLUSH_INTERVAL = 1.0
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+def _new_series():
+    return {'count': 0, 'duration': 0.0, 'buckets': [0] * len(BUCKETS), 'queries': 0, 'query_duration': 0.0}
+
+
+def _add(total, series):
+    for field in ('count', 'duration', 'queries', 'query_duration'):
+        total[field] += series[field]
+    total['buckets'] = [a + b for a, b in zip(total['buckets'], series['buckets'])]
+
+
+class Collector:
+    """
+    Metrics of the requests served by this process, keyed by (route, method, status).
+    """
+
+    def __init__(self):
+        self._series = defaultdict(_new_series)
+        self._lock = threading.Lock()
+        self._dirty = False
+        # The process the flushing thread runs in; threads do not survive gunicorn forking the workers
+        self._flusher_pid = None
+
+    def record(self, route, method, status, duration, queries, query_duration):
+        with self._lock:
+            series = self._series[(route, method, str(status))]
+            series['count'] += 1
+            series['duration'] += duration
+            for index, bound in enumerate(BUCKETS):
+                if duration <= bound:
+                    series['buckets'][index] += 1
+                    break
+            series['queries'] += queries
+            series['query_duration'] += query_duration
+            self._dirty = True
+            if self._flusher_pid != os.getpid():
+                self._flusher_pid = os.getpid()
+                threading.Thread(target=self._flush_periodically, name='metrics-flush', daemon=True).start()
+
+    def _flush_periodically(self):
+        while True:
+            time.sleep(FLUSH_INTERVAL)
+            if self._dirty:
+                try:
+                    self.flush()
+                except OSError:
+                    # Tried again at the next interval
+                    self._dirty = True
+
+    def flush(self):
+        """
+        Writes this process's totals to its file, replacing the previous version atomically.
+        """
+        with self._lock:
+            self._dirty = False
+            snapshot = json.dumps([[list(key), series] for key, series in self._series.items()])
+        directory = settings.METRICS_DIR
+        os.makedirs(directory, exist_ok=True)
+        fd, path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        with os.fdopen(fd, 'w') as f:
+            f.write(snapshot)
+        os.replace(path, os.path.join(directory, f'{os.getpid()}.json'))
+
+    def reset(self):
+        with self._lock:
+            self._series.clear()
+            self._dirty = False
+
+
+collector = Collector()
+
+
+def clear_directory():
+    """
+    Removes the files of earlier server runs; called by the server before it starts the workers.
+    """
+    directory = settings.METRICS_DIR
+    if os.path.isdir(directory):
+        for name in os.listdir(directory):
+            if name.endswith('.json'):
+                os.remove(os.path.join(directory, name))
+
+
+def merged_series():
+    """
+    Totals of every process that has written a file, including workers that have exited since.
+    """
+    totals = defaultdict(_new_series)
+    directory = settings.METRICS_DIR
+    for name in os.listdir(directory) if os.path.isdir(directory) else ():
+        if not name.endswith('.json'):
+            continue
+        try:
+            with open(os.path.join(directory, name)) as f:
+                snapshot = json.load(f)
+        except (OSError, ValueError):
+            continue
+        for key, series in snapshot:
+            _add(totals[tuple(key)], series)
+    return totals
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(**labels):
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in labels.items()) + '}'
+
+
+def render():
+    """
+    All workers' metrics in the Prometheus text exposition format.
+    """
+    totals = sorted(merged_series().items())
+    lines = [
+        '# HELP http_requests_total Requests handled, by route, method and status.',
+        '# TYPE http_requests_total counter',
+    ]
+    lines += [f'http_requests_total{_labels(route=route, method=method, status=status)} {series["count"]}'
+              for (route, method, status), series in totals]
+
+    lines += [
+        '# HELP http_request_duration_seconds Time spent handling requests, by route and method.',
+        '# TYPE http_request_duration_seconds histogram',
+    ]
+    by_route = defaultdict(_new_series)
+    for (route, method, _status), series in totals:
+        _add(by_route[(route, method)], series)
+    for (route, method), series in sorted(by_route.items()):
+        cumulative = 0
+        for bound, count in zip(BUCKETS, series['buckets']):
+            cumulative += count
+            lines.append(f'http_request_duration_seconds_bucket{_labels(route=route, method=method, le=bound)} '
+                         f'{cumulative}')
+        lines.append(f'http_request_duration_seconds_bucket{_labels(route=route, method=method, le="+Inf")} '
+                     f'{series["count"]}')
+        lines.append(f'http_request_duration_seconds_sum{_labels(route=route, method=method)} {series["duration"]}')
+        lines.append(f'http_request_duration_seconds_count{_labels(route=route, method=method)} {series["count"]}')
+
+    lines += [
+        '# HELP db_queries_total Database queries run while handling requests, by route and method.',
+        '# TYPE db_queries_total counter',
+    ]
+    lines += [f'db_queries_total{_labels(route=route, method=method)} {series["queries"]}'
+              for (route, method), series in sorted(by_route.items())]
+    lines += [
+        '# HELP db_query_duration_seconds_total Time spent in database queries, by route and method.',
+        '# TYPE db_query_duration_seconds_total counter',
+    ]
+    lines += [f'db_query_duration_seconds_total{_labels(route=route, method=method)} {series["query_duration"]}'
+              for (route, method), series in sorted(by_route.items())]
+    return '\n'.join(lines) + '\n'
+
+
+def metrics(request):
+    """
+    Prometheus scrape endpoint; the other workers' files are at most FLUSH_INTERVAL behind.
+    """
+    collector.flush()
+    return HttpResponse(render(), content_type=CONTENT_TYPE)
@@ -1,5 +1,14 @@
 # backendApp/middleware.py
 
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.db import connection
+
+from backendApp.metrics import collector
+from backendApp.slow_queries import SlowQueryRecorder
+
+
 class CustomCORSHeadersMiddleware:
     def __init__(self, get_response):
         self.get_response = get_response
@@ -15,4 +24,79 @@ class CustomCORSHeadersMiddleware:
             response['Access-Control-Allow-Methods'] = 'GET, POST, PUT, DELETE, OPTIONS'
             response['Access-Control-Max-Age'] = '86400'
             response.status_code = 200
-        return response
\ No newline at end of file
+        return response
+
+
+class MetricsMiddleware:
+    """
+    Records the latency, database query count and database time of every request under its URL route.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        queries = QueryTimer()
+        start = time.perf_counter()
+        with connection.execute_wrapper(queries):
+            response = self.get_response(request)
+        self.record(request, response, time.perf_counter() - start, queries)
+        return response
+
+    async def __acall__(self, request):
+        # Under ASGI the queries run on other threads with their own connections, out of reach of an
+        # execute wrapper installed here, so only the request count and latency are recorded
+        start = time.perf_counter()
+        response = await self.get_response(request)
+        self.record(request, response, time.perf_counter() - start, QueryTimer())
+        return response
+
+    def record(self, request, response, duration, queries):
+        # The route pattern, not the path, so /student/reserved_items/123456 and /654321 share one series
+        match = getattr(request, 'resolver_match', None)
+        route = match.route if match else 'unmatched'
+        collector.record(route, request.method, response.status_code, duration, queries.count, queries.duration)
+
+
+class SlowQueryMiddleware:
+    """
+    Logs the slow queries of every request with the view that ran them (see backendApp/slow_queries.py).
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            # Queries of async requests run on other threads, where this wrapper is not installed
+            return self.get_response(request)
+        with connection.execute_wrapper(SlowQueryRecorder(request)):
+            return self.get_response(request)
+
+
+class QueryTimer:
+    """
+    Database execute wrapper that counts the queries run through it and the time they take.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.count += 1
+            self.duration += time.perf_counter() - start
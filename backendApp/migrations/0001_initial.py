@@ -0,0 +1,27 @@
+# Generated by Django 5.1.3 on 2026-10-18 20:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TableVersion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('table_name', models.CharField(max_length=100)),
+                ('shard', models.SmallIntegerField()),
+                ('version', models.BigIntegerField(default=0)),
+            ],
+            options={
+                'db_table': 'table_version',
+                'constraints': [models.UniqueConstraint(fields=('table_name', 'shard'), name='table_version_shard_unique')],
+            },
+        ),
+    ]
@@ -0,0 +1,78 @@
+from django.db import migrations
+
+TRACKED_TABLES = [
+    'Admin_admin',
+    'Attribute_attribute',
+    'Booking_booking',
+    'Building_building',
+    'Faculty_faculty',
+    'Item_item',
+    'ItemBooking_itembooking',
+    'RoomToRent_roomreservation',
+    'RoomToRent_roomtorent',
+    'RoomWithItems_roomwithitems',
+    'Student_student',
+    'Type_type',
+]
+
+SHARDS = 8
+
+CREATE_FUNCTION = f'''
+CREATE OR REPLACE FUNCTION bump_table_version() RETURNS trigger LANGUAGE plpgsql AS $$
+DECLARE
+    shard_id bigint;
+BEGIN
+    -- Take any shard no other transaction is writing to, so writers never queue on the counter
+    SELECT id INTO shard_id FROM table_version
+     WHERE table_name = TG_TABLE_NAME
+     ORDER BY random() LIMIT 1
+       FOR UPDATE SKIP LOCKED;
+
+    IF shard_id IS NULL THEN
+        -- Either the shards do not exist yet or every one of them is taken: create the missing
+        -- ones and wait for a random shard
+        INSERT INTO table_version (table_name, shard, version)
+        SELECT TG_TABLE_NAME, shard, 0 FROM generate_series(0, {SHARDS - 1}) AS shard
+        ON CONFLICT (table_name, shard) DO NOTHING;
+
+        SELECT id INTO shard_id FROM table_version
+         WHERE table_name = TG_TABLE_NAME
+         ORDER BY random() LIMIT 1;
+    END IF;
+
+    UPDATE table_version SET version = version + 1 WHERE id = shard_id;
+    RETURN NULL;
+END
+$$;
+'''
+
+CREATE_TRIGGERS = [
+    f'CREATE TRIGGER bump_table_version AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON "{table}" '
+    f'FOR EACH STATEMENT EXECUTE FUNCTION bump_table_version();'
+    for table in TRACKED_TABLES
+]
+
+DROP_TRIGGERS = [f'DROP TRIGGER IF EXISTS bump_table_version ON "{table}";' for table in TRACKED_TABLES]
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('backendApp', '0001_initial'),
+        ('Admin', '0002_alter_admin_options_alter_admin_managers_and_more'),
+        ('Attribute', '0001_initial'),
+        ('Booking', '0009_open_booking_indexes'),
+        ('Building', '0004_building_faculty'),
+        ('Faculty', '0004_remove_faculty_id_alter_faculty_faculty_id'),
+        ('Item', '0009_item_building_ref_item_faculty_ref_item_room_ref_and_more'),
+        ('ItemBooking', '0008_open_booking_indexes'),
+        ('RoomToRent', '0008_roomreservation'),
+        ('RoomWithItems', '0004_roomwithitems_faculty'),
+        ('Student', '0002_alter_student_id'),
+        ('Type', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunSQL(CREATE_FUNCTION, 'DROP FUNCTION IF EXISTS bump_table_version();'),
+        migrations.RunSQL(CREATE_TRIGGERS, DROP_TRIGGERS),
+    ]
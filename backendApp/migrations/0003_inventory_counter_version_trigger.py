@@ -0,0 +1,19 @@
+from django.db import migrations
+
+TABLE = 'Item_inventorycounter'
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('backendApp', '0002_table_version_triggers'),
+        ('Item', '0010_inventorycounter'),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            f'CREATE TRIGGER bump_table_version AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON "{TABLE}" '
+            f'FOR EACH STATEMENT EXECUTE FUNCTION bump_table_version();',
+            f'DROP TRIGGER IF EXISTS bump_table_version ON "{TABLE}";',
+        ),
+    ]
@@ -0,0 +1,88 @@
+# Generated by Django 5.1.3 on 2026-10-18 19:34
+
+from django.db import migrations, models
+
+WINDOW_DAYS = 30
+
+CREATE_VIEW = f'''
+CREATE MATERIALIZED VIEW utilization_summary AS
+WITH bookings AS (
+    SELECT 'room' AS kind, faculty, building, start_time AS start_date, end_time AS end_date, returned
+      FROM "Booking_booking"
+    UNION ALL
+    -- Item bookings keep their dates as text and reach their item through item_ref
+    SELECT 'item', coalesce(item.faculty, 'Unknown'), coalesce(item.building, 'Unknown'),
+           CASE WHEN booking.start_date ~ '^[0-9]{{4}}-[0-9]{{2}}-[0-9]{{2}}$' THEN booking.start_date::date END,
+           CASE WHEN booking.end_date ~ '^[0-9]{{4}}-[0-9]{{2}}-[0-9]{{2}}$' THEN booking.end_date::date END,
+           booking.returned
+      FROM "ItemBooking_itembooking" booking
+      LEFT JOIN "Item_item" item ON item.item_id = booking.item_ref_id
+),
+usage AS (
+    SELECT kind, faculty, building,
+           count(*) FILTER (WHERE start_date BETWEEN current_date - {WINDOW_DAYS - 1} AND current_date)
+               AS recent_bookings,
+           count(*) FILTER (WHERE returned AND end_date >= start_date) AS returned_bookings,
+           coalesce(sum(end_date - start_date + 1) FILTER (WHERE returned AND end_date >= start_date), 0)
+               AS loan_days,
+           count(*) FILTER (WHERE NOT returned) AS out
+      FROM bookings
+     GROUP BY kind, faculty, building
+),
+stock AS (
+    SELECT 'room' AS kind, faculty, building, count(*) AS stock
+      FROM "RoomToRent_roomtorent"
+     GROUP BY faculty, building
+    UNION ALL
+    SELECT 'item', faculty, building, sum(amount)
+      FROM "Item_item"
+     GROUP BY faculty, building
+)
+SELECT row_number() OVER (ORDER BY kind, faculty, building) AS id, kind, faculty, building,
+       coalesce(usage.recent_bookings, 0) AS recent_bookings,
+       coalesce(usage.returned_bookings, 0) AS returned_bookings,
+       coalesce(usage.loan_days, 0) AS loan_days,
+       -- A rented room is still counted among the rooms, a rented unit is no longer in an item's amount
+       coalesce(stock.stock, 0) + CASE WHEN kind = 'item' THEN coalesce(usage.out, 0) ELSE 0 END AS stock,
+       coalesce(usage.out, 0) AS out,
+       now() AS refreshed_at
+  FROM usage
+  FULL JOIN stock USING (kind, faculty, building);
+
+-- REFRESH ... CONCURRENTLY needs a unique index without a WHERE clause
+CREATE UNIQUE INDEX utilization_summary_group ON utilization_summary (kind, faculty, building);
+'''
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('backendApp', '0003_inventory_counter_version_trigger'),
+        ('Booking', '0009_open_booking_indexes'),
+        ('Item', '0010_inventorycounter'),
+        ('ItemBooking', '0008_open_booking_indexes'),
+        ('RoomToRent', '0008_roomreservation'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UtilizationSummary',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('kind', models.CharField(max_length=4)),
+                ('faculty', models.CharField(max_length=100)),
+                ('building', models.CharField(max_length=100)),
+                ('recent_bookings', models.BigIntegerField()),
+                ('returned_bookings', models.BigIntegerField()),
+                ('loan_days', models.BigIntegerField()),
+                ('stock', models.BigIntegerField()),
+                ('out', models.BigIntegerField()),
+                ('refreshed_at', models.DateTimeField()),
+            ],
+            options={
+                'db_table': 'utilization_summary',
+                'managed': False,
+            },
+        ),
+        migrations.RunSQL(CREATE_VIEW, 'DROP MATERIALIZED VIEW IF EXISTS utilization_summary;'),
+    ]
@@ -0,0 +1,141 @@
+# Generated by Django 5.1.3 on 2026-10-18 19:37
+
+from importlib import import_module
+
+from django.db import migrations, models
+
+previous = import_module('backendApp.migrations.0004_utilization_summary')
+
+BOOKING_COLUMNS = (
+    'booking_id, item_id, room_number, "user", start_time, end_time, building, faculty, "isRoomToRent", returned'
+)
+ITEM_BOOKING_COLUMNS = 'id, name, item_id, student_id, start_date, end_date, returned'
+
+# Same columns as the live tables, without their defaults, foreign keys and sequences; month partitions
+# are created by the archive_bookings command as it needs them
+CREATE_ARCHIVES = '''
+CREATE TABLE booking_archive (LIKE "Booking_booking") PARTITION BY RANGE (end_time);
+ALTER TABLE booking_archive ADD PRIMARY KEY (booking_id, end_time);
+
+CREATE TABLE itembooking_archive (LIKE "ItemBooking_itembooking", ended_on date NOT NULL)
+    PARTITION BY RANGE (ended_on);
+ALTER TABLE itembooking_archive ADD PRIMARY KEY (id, ended_on);
+'''
+
+CREATE_VIEWS = f'''
+CREATE VIEW returned_booking AS
+SELECT {BOOKING_COLUMNS} FROM "Booking_booking" WHERE returned
+UNION ALL
+SELECT {BOOKING_COLUMNS} FROM booking_archive;
+
+CREATE VIEW returned_itembooking AS
+SELECT {ITEM_BOOKING_COLUMNS} FROM "ItemBooking_itembooking" WHERE returned
+UNION ALL
+SELECT {ITEM_BOOKING_COLUMNS} FROM itembooking_archive;
+'''
+
+# The utilization figures keep counting the history once it has been archived
+CREATE_UTILIZATION_VIEW = f'''
+CREATE MATERIALIZED VIEW utilization_summary AS
+WITH bookings AS (
+    SELECT 'room' AS kind, faculty, building, start_time AS start_date, end_time AS end_date, returned
+      FROM "Booking_booking"
+    UNION ALL
+    SELECT 'room', faculty, building, start_time, end_time, returned
+      FROM booking_archive
+    UNION ALL
+    -- Item bookings keep their dates as text and reach their item through item_ref
+    SELECT 'item', coalesce(item.faculty, 'Unknown'), coalesce(item.building, 'Unknown'),
+           CASE WHEN booking.start_date ~ '^[0-9]{{4}}-[0-9]{{2}}-[0-9]{{2}}$' THEN booking.start_date::date END,
+           CASE WHEN booking.end_date ~ '^[0-9]{{4}}-[0-9]{{2}}-[0-9]{{2}}$' THEN booking.end_date::date END,
+           booking.returned
+      FROM (SELECT item_ref_id, start_date, end_date, returned FROM "ItemBooking_itembooking"
+            UNION ALL
+            SELECT item_ref_id, start_date, end_date, returned FROM itembooking_archive) booking
+      LEFT JOIN "Item_item" item ON item.item_id = booking.item_ref_id
+),
+usage AS (
+    SELECT kind, faculty, building,
+           count(*) FILTER (WHERE start_date BETWEEN current_date - {previous.WINDOW_DAYS - 1} AND current_date)
+               AS recent_bookings,
+           count(*) FILTER (WHERE returned AND end_date >= start_date) AS returned_bookings,
+           coalesce(sum(end_date - start_date + 1) FILTER (WHERE returned AND end_date >= start_date), 0)
+               AS loan_days,
+           count(*) FILTER (WHERE NOT returned) AS out
+      FROM bookings
+     GROUP BY kind, faculty, building
+),
+stock AS (
+    SELECT 'room' AS kind, faculty, building, count(*) AS stock
+      FROM "RoomToRent_roomtorent"
+     GROUP BY faculty, building
+    UNION ALL
+    SELECT 'item', faculty, building, sum(amount)
+      FROM "Item_item"
+     GROUP BY faculty, building
+)
+SELECT row_number() OVER (ORDER BY kind, faculty, building) AS id, kind, faculty, building,
+       coalesce(usage.recent_bookings, 0) AS recent_bookings,
+       coalesce(usage.returned_bookings, 0) AS returned_bookings,
+       coalesce(usage.loan_days, 0) AS loan_days,
+       -- A rented room is still counted among the rooms, a rented unit is no longer in an item's amount
+       coalesce(stock.stock, 0) + CASE WHEN kind = 'item' THEN coalesce(usage.out, 0) ELSE 0 END AS stock,
+       coalesce(usage.out, 0) AS out,
+       now() AS refreshed_at
+  FROM usage
+  FULL JOIN stock USING (kind, faculty, building);
+
+CREATE UNIQUE INDEX utilization_summary_group ON utilization_summary (kind, faculty, building);
+'''
+DROP_UTILIZATION_VIEW = 'DROP MATERIALIZED VIEW IF EXISTS utilization_summary;'
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('backendApp', '0004_utilization_summary'),
+        ('Booking', '0009_open_booking_indexes'),
+        ('ItemBooking', '0008_open_booking_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReturnedBooking',
+            fields=[
+                ('booking_id', models.IntegerField(primary_key=True, serialize=False)),
+                ('item_id', models.CharField(max_length=100)),
+                ('room_number', models.CharField(max_length=100)),
+                ('user', models.CharField(max_length=100)),
+                ('start_time', models.DateField()),
+                ('end_time', models.DateField()),
+                ('building', models.CharField(max_length=100)),
+                ('faculty', models.CharField(max_length=100)),
+                ('isRoomToRent', models.BooleanField()),
+                ('returned', models.BooleanField()),
+            ],
+            options={
+                'db_table': 'returned_booking',
+                'managed': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='ReturnedItemBooking',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('name', models.CharField(max_length=100)),
+                ('item_id', models.CharField(max_length=100)),
+                ('student_id', models.CharField(max_length=100)),
+                ('start_date', models.CharField(max_length=100)),
+                ('end_date', models.CharField(max_length=100)),
+                ('returned', models.BooleanField()),
+            ],
+            options={
+                'db_table': 'returned_itembooking',
+                'managed': False,
+            },
+        ),
+        migrations.RunSQL(CREATE_ARCHIVES, 'DROP TABLE IF EXISTS booking_archive, itembooking_archive;'),
+        migrations.RunSQL(CREATE_VIEWS, 'DROP VIEW IF EXISTS returned_booking, returned_itembooking;'),
+        migrations.RunSQL(DROP_UTILIZATION_VIEW + CREATE_UTILIZATION_VIEW,
+                          DROP_UTILIZATION_VIEW + previous.CREATE_VIEW),
+    ]
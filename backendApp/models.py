@@ -0,0 +1,108 @@
+from django.db import connection, models
+
+
+class TableVersion(models.Model):
+    """
+    Change counter of a database table, bumped by a trigger on every write statement.
+
+    Each table has several shards so that concurrent writers increment different rows and never
+    wait on each other; the version of a table is the sum of its shards. The counters are updated
+    inside the writing transaction, so a new version becomes visible together with the data.
+    """
+    table_name = models.CharField(max_length=100)
+    shard = models.SmallIntegerField()
+    version = models.BigIntegerField(default=0)
+
+    class Meta:
+        db_table = 'table_version'
+        constraints = [
+            models.UniqueConstraint(fields=['table_name', 'shard'], name='table_version_shard_unique'),
+        ]
+
+    def __str__(self):
+        return f"{self.table_name}[{self.shard}] = {self.version}"
+
+
+class UtilizationSummary(models.Model):
+    """
+    Room and item usage per faculty and building, read from the `utilization_summary` materialized view.
+
+    The view aggregates the whole booking history once per refresh (see the refresh_utilization
+    command), so reports read a few rows per building instead of scanning Booking and ItemBooking.
+    It keeps sums rather than averages, so rows can be added up to faculty level without skewing them.
+    """
+    WINDOW_DAYS = 30
+    VIEW = 'utilization_summary'
+
+    id = models.BigIntegerField(primary_key=True)
+    kind = models.CharField(max_length=4)  # 'room' or 'item'
+    faculty = models.CharField(max_length=100)
+    building = models.CharField(max_length=100)
+    # Bookings that started in the last WINDOW_DAYS days
+    recent_bookings = models.BigIntegerField()
+    returned_bookings = models.BigIntegerField()
+    # Days of all returned bookings, both ends included
+    loan_days = models.BigIntegerField()
+    # Rooms, or units of items (in stock plus rented out)
+    stock = models.BigIntegerField()
+    out = models.BigIntegerField()
+    refreshed_at = models.DateTimeField()
+
+    class Meta:
+        managed = False
+        db_table = 'utilization_summary'
+
+    @classmethod
+    def refresh(cls, concurrently=True):
+        """
+        Recomputes the view. A concurrent refresh lets reports keep reading the previous rows meanwhile.
+        """
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT ispopulated FROM pg_matviews WHERE matviewname = %s", [cls.VIEW])
+            # A view that has never been filled can only be refreshed the blocking way
+            concurrently = concurrently and cursor.fetchone()[0]
+            cursor.execute(f"REFRESH MATERIALIZED VIEW {'CONCURRENTLY ' if concurrently else ''}{cls.VIEW}")
+
+    def __str__(self):
+        return f"{self.kind} usage in {self.building} ({self.faculty})"
+
+
+class ReturnedBooking(models.Model):
+    """
+    Every returned room booking, live or archived: the `returned_booking` view over the returned rows of
+    Booking and the `booking_archive` table they are moved to by the archive_bookings command.
+
+    Archived rows keep their booking_id, so keyset pagination on it runs across both tables.
+    """
+    booking_id = models.IntegerField(primary_key=True)
+    item_id = models.CharField(max_length=100)
+    room_number = models.CharField(max_length=100)
+    user = models.CharField(max_length=100)
+    start_time = models.DateField()
+    end_time = models.DateField()
+    building = models.CharField(max_length=100)
+    faculty = models.CharField(max_length=100)
+    isRoomToRent = models.BooleanField()
+    returned = models.BooleanField()
+
+    class Meta:
+        managed = False
+        db_table = 'returned_booking'
+
+
+class ReturnedItemBooking(models.Model):
+    """
+    Every returned item booking, live or archived: the `returned_itembooking` view over the returned rows of
+    ItemBooking and the `itembooking_archive` table.
+    """
+    id = models.BigIntegerField(primary_key=True)
+    name = models.CharField(max_length=100)
+    item_id = models.CharField(max_length=100)
+    student_id = models.CharField(max_length=100)
+    start_date = models.CharField(max_length=100)
+    end_date = models.CharField(max_length=100)
+    returned = models.BooleanField()
+
+    class Meta:
+        managed = False
+        db_table = 'returned_itembooking'
@@ -0,0 +1,71 @@
+# backendApp/pagination.py
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+
+PAGINATION_PARAMETERS = [
+    {"name": "after", "in": "query", "required": False, "description": "Return rows with an ID greater than this cursor",
+     "schema": {"type": "integer"}},
+    {"name": "limit", "in": "query", "required": False, "description": f"Page size (max {MAX_PAGE_SIZE})",
+     "schema": {"type": "integer", "default": DEFAULT_PAGE_SIZE}},
+    {"name": "paginate", "in": "query", "required": False,
+     "description": "Set to 'false' to return every row without pagination", "schema": {"type": "boolean"}},
+]
+
+
+class PaginationError(ValueError):
+    pass
+
+
+def wants_full_list(request):
+    """
+    Return True when the client explicitly asked for the old, unpaginated response.
+    """
+    return request.GET.get('paginate', '').lower() in ('0', 'false', 'no')
+
+
+def keyset_page(request, queryset, pk_field, fields):
+    """
+    Return one page of `queryset` as a list of dicts plus the cursor of the next page.
+
+    Rows are ordered by `pk_field` and the page starts strictly after the `after`
+    query parameter, so the database seeks on the primary key index instead of
+    scanning past skipped rows like OFFSET would. `next_cursor` is None on the last page.
+    """
+    after = request.GET.get('after')
+    limit = request.GET.get('limit', DEFAULT_PAGE_SIZE)
+    try:
+        limit = int(limit)
+        after = int(after) if after not in (None, '') else None
+    except (TypeError, ValueError):
+        raise PaginationError("'after' and 'limit' must be integers")
+    if limit < 1:
+        raise PaginationError("'limit' must be a positive integer")
+    limit = min(limit, MAX_PAGE_SIZE)
+
+    queryset = queryset.order_by(pk_field)
+    if after is not None:
+        queryset = queryset.filter(**{f'{pk_field}__gt': after})
+
+    # Fetch one extra row to know whether another page exists without a COUNT(*)
+    rows = list(queryset.values(pk_field, *fields)[:limit + 1])
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = rows[-1][pk_field]
+    return rows, next_cursor
+
+
+def list_payload(request, key, queryset, pk_field, fields, serialize):
+    """
+    Build the JSON payload of a list endpoint.
+
+    By default the response is one keyset page under `key` plus `next_cursor`;
+    `?paginate=false` keeps the old shape with every row under `key`.
+    """
+    if wants_full_list(request):
+        rows = queryset.order_by(pk_field).values(pk_field, *fields)
+        return {key: [serialize(row) for row in rows.iterator()]}
+
+    rows, next_cursor = keyset_page(request, queryset, pk_field, fields)
+    return {key: [serialize(row) for row in rows], "next_cursor": next_cursor}
@@ -0,0 +1,110 @@
+# backendApp/relations.py
+#
+# Helpers for the move from free-text relation columns (building, faculty, room_number, user, ...)
+# to real foreign keys. During the transition every model keeps its legacy string column and a
+# nullable `*_ref` foreign key next to it: saves fill the key from the string (dual write) and the
+# `backfill_relations` command fills rows written before the key existed or through bulk paths.
+
+from django.db.models import BigIntegerField, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Cast
+
+DIGITS = r'^[0-9]+$'
+
+
+def as_int(value):
+    """
+    Return `value` as an int, or None when the legacy column holds something like 'Unknown'.
+    """
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def resolve_ref(instance, field_name, **lookup):
+    """
+    Return the primary key of the row `field_name` should point to, or None if there is no match.
+
+    The row is only looked up when the key may be out of date: a key already resolved from, or loaded
+    with (see RefSyncMixin), the same lookup is kept, and so is a key the caller set on a new instance
+    from a row it already had.
+    """
+    field = instance._meta.get_field(field_name)
+    current = getattr(instance, field.attname)
+    resolved = instance.__dict__.setdefault('_resolved_refs', {})
+    if instance.__dict__.get('_recording_refs'):
+        # Loaded from the database: a key that is set belongs to the columns loaded with it
+        if current is not None:
+            resolved[field_name] = lookup
+        return current
+    if resolved.get(field_name) == lookup:
+        return current
+    if current is not None and field_name not in resolved and instance._state.adding:
+        resolved[field_name] = lookup
+        return current
+
+    resolved[field_name] = lookup
+    if any(value is None for value in lookup.values()):
+        return None
+    return field.related_model.objects.filter(**lookup).values_list('pk', flat=True).first()
+
+
+class RefSyncMixin:
+    """
+    Mixin of the models with dual-written *_ref keys: remembers the lookups the keys of a loaded row
+    correspond to, so saving it again only looks up the keys whose legacy columns were changed.
+    """
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # With deferred fields, reading the legacy columns here would load each of them
+        if len(values) == len(cls._meta.concrete_fields):
+            instance._recording_refs = True
+            instance.sync_refs()
+            del instance._recording_refs
+        return instance
+
+
+def ref_subquery(model, **lookup):
+    """
+    Correlated subquery returning the primary key of the `model` row matching `lookup`,
+    used by the backfill to set a whole batch of foreign keys with one UPDATE.
+    """
+    return Subquery(model.objects.filter(**lookup).values('pk')[:1])
+
+
+def backfill_specs():
+    """
+    Return (model, ref field, source filter, subquery) for every foreign key to backfill.
+
+    The source filter only lets through rows whose legacy value can match at all, so the
+    integer casts inside the subqueries never see values such as 'Unknown'.
+    """
+    from django.apps import apps
+
+    Booking = apps.get_model('Booking', 'Booking')
+    Building = apps.get_model('Building', 'Building')
+    Faculty = apps.get_model('Faculty', 'Faculty')
+    Item = apps.get_model('Item', 'Item')
+    ItemBooking = apps.get_model('ItemBooking', 'ItemBooking')
+    RoomToRent = apps.get_model('RoomToRent', 'RoomToRent')
+    RoomWithItems = apps.get_model('RoomWithItems', 'RoomWithItems')
+    Student = apps.get_model('Student', 'Student')
+
+    room_number = Cast(OuterRef('room_number'), IntegerField())
+    return [
+        (Item, 'building_ref', {}, ref_subquery(Building, name=OuterRef('building'))),
+        (Item, 'faculty_ref', {}, ref_subquery(Faculty, name=OuterRef('faculty'))),
+        (Item, 'room_ref', {'room_number__regex': DIGITS},
+         ref_subquery(RoomWithItems, room_number=room_number, building=OuterRef('building'))),
+        (Booking, 'user_ref', {}, ref_subquery(Student, username=OuterRef('user'))),
+        (Booking, 'building_ref', {}, ref_subquery(Building, name=OuterRef('building'))),
+        (Booking, 'faculty_ref', {}, ref_subquery(Faculty, name=OuterRef('faculty'))),
+        (Booking, 'room_ref', {'room_number__regex': DIGITS},
+         ref_subquery(RoomToRent, room_number=room_number, building=OuterRef('building'))),
+        (ItemBooking, 'item_ref', {'item_id__regex': DIGITS},
+         ref_subquery(Item, item_id=Cast(OuterRef('item_id'), BigIntegerField()))),
+        (ItemBooking, 'student_ref', {}, ref_subquery(Student, username=OuterRef('student_id'))),
+        (RoomToRent, 'building_ref', {}, ref_subquery(Building, name=OuterRef('building'))),
+    ]
@@ -0,0 +1,42 @@
+# backendApp/responses.py
+
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import HttpResponse
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - depends on the installed packages
+    orjson = None
+
+_encoder = DjangoJSONEncoder()
+
+
+def _default(obj):
+    # Types orjson does not know (Decimal, Promise, timedelta, ...) are encoded the way Django encodes them
+    return _encoder.default(obj)
+
+
+def dumps(data):
+    """
+    Serialize `data` to JSON bytes with orjson when it is installed, else with the standard library.
+
+    Dates, datetimes and UUIDs are encoded natively by orjson; the result matches DjangoJSONEncoder
+    for dates and UTC datetimes without microseconds.
+    """
+    if orjson is not None:
+        return orjson.dumps(data, default=_default, option=orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS)
+    return json.dumps(data, cls=DjangoJSONEncoder, separators=(',', ':')).encode()
+
+
+class FastJsonResponse(HttpResponse):
+    """
+    Drop-in replacement for django.http.JsonResponse that serializes through dumps().
+    """
+
+    def __init__(self, data, safe=True, **kwargs):
+        if safe and not isinstance(data, dict):
+            raise TypeError("In order to allow non-dict objects to be serialized set the safe parameter to False.")
+        kwargs.setdefault("content_type", "application/json")
+        super().__init__(content=dumps(data), **kwargs)
@@ -0,0 +1,96 @@
+# backendApp/slow_queries.py
+#
+# Logs every query slower than SLOW_QUERY_THRESHOLD_MS together with the view that ran it and, for a
+# sample of them, its EXPLAIN plan. Fast queries only pay for a timer and a comparison.
+
+import logging
+import random
+import re
+import time
+from collections import Counter
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+EXPLAINABLE_PREFIXES = ('SELECT', 'WITH', 'INSERT', 'UPDATE', 'DELETE')
+# EXPLAIN ANALYZE executes the statement it explains, so it is only used for plain SELECTs: a WITH may
+# contain writes and a locking SELECT would wait for, or take, row locks
+LOCKING_CLAUSE = re.compile(r'\bFOR\s+(UPDATE|NO\s+KEY\s+UPDATE|SHARE|KEY\s+SHARE)\b')
+
+
+def analyzable(statement):
+    return statement.startswith('SELECT') and not LOCKING_CLAUSE.search(statement)
+
+
+def describe_params(params):
+    """
+    The number and types of a query's parameters; their values are not logged, they may be password hashes.
+    """
+    if params is None:
+        return "none"
+    values = params.values() if isinstance(params, dict) else params
+    types = Counter(type(value).__name__ for value in values)
+    return f"{sum(types.values())} ({', '.join(f'{name} x{count}' for name, count in types.items())})"
+
+
+class SlowQueryRecorder:
+    """
+    Database execute wrapper installed for one request by SlowQueryMiddleware.
+    """
+
+    def __init__(self, request):
+        self.request = request
+
+    def view_name(self):
+        # Known once the URL has been resolved; queries of earlier middleware have no view yet
+        match = getattr(self.request, 'resolver_match', None)
+        return match.view_name if match else 'unresolved'
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        result = execute(sql, params, many, context)
+        duration_ms = (time.perf_counter() - start) * 1000
+        if duration_ms >= settings.SLOW_QUERY_THRESHOLD_MS:
+            self.log(sql, params, many, context, duration_ms)
+        return result
+
+    def log(self, sql, params, many, context, duration_ms):
+        plan = None
+        if not many and random.random() < settings.SLOW_QUERY_EXPLAIN_SAMPLE_RATE:
+            plan = self.explain(context['connection'], sql, params)
+        logger.warning(
+            "Slow query (%.1f ms) in %s %s view=%s\nSQL: %s\nParams: %s%s",
+            duration_ms, self.request.method, self.request.path, self.view_name(), sql, describe_params(params),
+            f"\nPlan:\n{plan}" if plan else "",
+        )
+
+    def explain(self, connection, sql, params):
+        """
+        EXPLAIN (or EXPLAIN ANALYZE for plain SELECTs, if enabled) of the query just run.
+        """
+        statement = sql.lstrip().upper()
+        if not statement.startswith(EXPLAINABLE_PREFIXES):
+            return None
+        analyze = settings.SLOW_QUERY_EXPLAIN_ANALYZE and analyzable(statement)
+        in_transaction = not connection.get_autocommit()
+        # A raw cursor, so the EXPLAIN is not timed and logged again by this wrapper
+        with connection.connection.cursor() as cursor:
+            # A failing EXPLAIN must not abort the request's transaction, and whatever an ANALYZE did is
+            # always undone; outside a transaction the ANALYZE gets one of its own
+            if in_transaction:
+                begin, undo = "SAVEPOINT slow_query_explain", "ROLLBACK TO SAVEPOINT slow_query_explain"
+            else:
+                begin, undo = ("BEGIN", "ROLLBACK") if analyze else (None, None)
+            if begin:
+                cursor.execute(begin)
+            try:
+                cursor.execute(f"EXPLAIN {'ANALYZE ' if analyze else ''}{sql}", params)
+                return "\n".join(row[0] for row in cursor.fetchall())
+            except Exception as e:
+                return f"EXPLAIN failed: {e}"
+            finally:
+                if undo:
+                    cursor.execute(undo)
+                if in_transaction:
+                    cursor.execute("RELEASE SAVEPOINT slow_query_explain")
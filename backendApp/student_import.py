@@ -0,0 +1,146 @@
+# backendApp/student_import.py
+#
+# Bulk provisioning of student accounts from CSV, shared by the admin_paths/import_students endpoint and
+# the import_students command. Hashing a password with the configured hasher is deliberately slow (a
+# few hundred milliseconds for PBKDF2), so the command computes the hashes of a batch in a process pool,
+# one per core, and the batch is then written with a single bulk_create. The HTTP endpoint hashes in the
+# request's thread and only accepts MAX_UPLOAD_ROWS rows, so a request stays within the worker timeout.
+
+import csv
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+from django.contrib.auth.hashers import get_hasher, make_password
+from django.db import IntegrityError, transaction
+
+from backendApp.Student.models import Student
+
+REQUIRED_FIELDS = ('username', 'password')
+OPTIONAL_FIELDS = ('email', 'additional_field')
+DEFAULT_BATCH_SIZE = 500
+DEFAULT_WORKERS = os.cpu_count() or 1
+# Rows one admin_paths/import_students request may contain; about 20 seconds of PBKDF2 hashing
+MAX_UPLOAD_ROWS = 100
+
+
+class InvalidImport(Exception):
+    """
+    The input as a whole cannot be imported (missing CSV columns).
+    """
+
+
+def read_rows(lines):
+    """
+    Yields (line number, row) for every record of an iterable of CSV text lines.
+    """
+    reader = csv.DictReader(lines)
+    missing = set(REQUIRED_FIELDS) - set(reader.fieldnames or ())
+    if missing:
+        raise InvalidImport(f"Missing CSV columns: {', '.join(sorted(missing))}")
+    for row in reader:
+        yield reader.line_num, row
+
+
+class StudentImporter:
+    """
+    Creates the students of a CSV file in batches; rows naming an existing username are reported, never updated.
+    """
+
+    def __init__(self, batch_size=DEFAULT_BATCH_SIZE, workers=DEFAULT_WORKERS):
+        self.batch_size = batch_size
+        self.workers = workers
+        self.usernames = set()
+        self.created = 0
+        self.errors = []
+
+    def build(self, row):
+        """
+        The (unsaved, not yet hashed) Student a row describes, or an error message.
+        """
+        values = {field: (row.get(field) or '').strip() for field in REQUIRED_FIELDS + OPTIONAL_FIELDS}
+        if not values['username']:
+            return "username is required"
+        if len(values['username']) > Student._meta.get_field('username').max_length:
+            return "username is too long"
+        if values['username'] in self.usernames:
+            return f"Student '{values['username']}' appears more than once in this import"
+        # Leading and trailing spaces of a password are kept, only an empty one is rejected
+        if not row.get('password'):
+            return "password is required"
+        self.usernames.add(values['username'])
+        return Student(username=values['username'], password=row['password'], email=values['email'],
+                       additional_field=values['additional_field'] or None)
+
+    def run(self, records):
+        """
+        Imports (line number, row) records as produced by read_rows() and returns the report.
+        """
+        pool = None
+        if self.workers > 1:
+            # forkserver rather than fork: the web workers that call this run threads
+            pool = ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context('forkserver'))
+        try:
+            batch = []
+            for line_number, row in records:
+                student = self.build(row)
+                if isinstance(student, str):
+                    self.errors.append({"line": line_number, "username": row.get('username'), "error": student})
+                    continue
+                batch.append((line_number, student))
+                if len(batch) >= self.batch_size:
+                    self.write(batch, pool)
+                    batch = []
+            if batch:
+                self.write(batch, pool)
+        finally:
+            if pool is not None:
+                pool.shutdown()
+        return self.report()
+
+    def without_existing(self, batch):
+        """
+        The (line number, student) pairs of a batch whose username is still free; the others are reported.
+        """
+        existing = set(Student.objects.filter(username__in=[student.username for _, student in batch])
+                       .values_list('username', flat=True))
+        for line_number, student in batch:
+            if student.username in existing:
+                self.errors.append({"line": line_number, "username": student.username,
+                                    "error": f"Student '{student.username}' already exists"})
+        return [(line_number, student) for line_number, student in batch if student.username not in existing]
+
+    def write(self, batch, pool):
+        batch = self.without_existing(batch)
+        if not batch:
+            return
+
+        passwords = [student.password for _, student in batch]
+        # The hasher is passed along, so the workers use this process's settings (and their overrides in tests)
+        hash_password = partial(make_password, hasher=get_hasher())
+        if pool is None:
+            hashes = map(hash_password, passwords)
+        else:
+            hashes = pool.map(hash_password, passwords, chunksize=max(1, len(passwords) // (self.workers * 4)))
+        for (_, student), password in zip(batch, hashes):
+            student.password = password
+
+        while batch:
+            try:
+                with transaction.atomic():
+                    Student.objects.bulk_create([student for _, student in batch])
+            except IntegrityError:
+                # A username was taken by another request since it was looked up; the batch is written again
+                # without it, so the batches already committed are still reported
+                remaining = self.without_existing(batch)
+                if len(remaining) == len(batch):
+                    raise
+                batch = remaining
+            else:
+                self.created += len(batch)
+                return
+
+    def report(self):
+        errors = sorted(self.errors, key=lambda error: error["line"])
+        return {"created": self.created, "failed": len(errors), "errors": errors}
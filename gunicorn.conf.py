@@ -0,0 +1,58 @@
+# gunicorn.conf.py
+#
+# Production server settings, used by start-prod.sh: gunicorn --config gunicorn.conf.py
+
+import gc
+import multiprocessing
+import os
+
+wsgi_app = 'backend.wsgi:application'
+bind = os.environ.get('GUNICORN_BIND', '0.0.0.0:8000')
+
+# Import Django and the whole URL configuration once in the master, so the workers start
+# with it already in memory instead of each importing it again
+preload_app = True
+
+# One process per core plus one, so a core is never idle while a worker waits; threads cover the
+# time each request spends waiting on Postgres. Every thread keeps its own database connection,
+# so workers * threads must stay below the server's max_connections.
+worker_class = 'gthread'
+workers = int(os.environ.get('GUNICORN_WORKERS') or multiprocessing.cpu_count() + 1)
+threads = int(os.environ.get('GUNICORN_THREADS') or 4)
+
+timeout = int(os.environ.get('GUNICORN_TIMEOUT') or 30)
+accesslog = '-'
+
+
+def when_ready(server):
+    """
+    Runs in the master once the app is loaded, just before the workers are forked.
+    """
+    from django.db import connections
+    from django.urls import get_resolver
+
+    from backendApp import cache as catalog_cache
+    from backendApp import metrics
+
+    # Import every view module now rather than on the first request of each worker
+    get_resolver().url_patterns
+    # A connection opened while loading must not be shared by the forked workers
+    connections.close_all()
+    # Counters start from zero with every server start, as Prometheus expects after a restart
+    metrics.clear_directory()
+    # The shared cache tier outlives the server, and the database may have changed while it was down
+    catalog_cache.invalidate_all()
+
+    # Move everything allocated so far out of the collector's reach: collections in the workers then
+    # never write to these objects, so their memory pages stay shared with the master copy-on-write
+    gc.collect()
+    gc.freeze()
+
+
+def worker_exit(server, worker):
+    """
+    Runs in a worker as it exits, e.g. when it is stopped or restarted, so its last requests are exported.
+    """
+    from backendApp import metrics
+
+    metrics.collector.flush()
@@ -0,0 +1,7 @@
+#!/bin/sh
+# Production start: apply the committed migrations and serve with gunicorn (see gunicorn.conf.py).
+# Unlike the development command it neither regenerates migrations nor resets the data.
+set -e
+
+python manage.py migrate --noinput
+exec gunicorn --config gunicorn.conf.py